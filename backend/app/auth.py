@@ -1,49 +1,80 @@
+from collections import namedtuple
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-import hashlib
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select, update, union_all, literal, literal_column
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import models, database
+from app import models, database, cache, passwords
 import os
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+# Authenticated accounts are cached by token subject, so most requests skip the account query
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+# The authenticated user or recruiter handed to the routes (company_name is None for users,
+# full_name for recruiters)
+Principal = namedtuple("Principal", "id email user_type full_name company_name")
+ACCOUNT_MODELS = {"user": models.User, "recruiter": models.Recruiter}
+
+principal_cache = cache.TTLCache("auth_principals", ttl=PRINCIPAL_CACHE_TTL_SECONDS, maxsize=PRINCIPAL_CACHE_SIZE)
+# Any committed change to an account drops the cached principals (other workers catch up within the TTL)
+cache.invalidate_on_commit(principal_cache, models.User, models.Recruiter)
+
+
+def _pool_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def verify_password(plain_password, hashed_password):
+    """(matches, upgraded hash or None), computed on the password hash pool"""
+    try:
+        return await passwords.pool.run(passwords.verify_and_update, plain_password, hashed_password)
+    except passwords.HashPoolFull:
+        raise _pool_busy()
+
 
-def verify_password(plain_password, hashed_password):
-    # Handle both new SHA256 and old bcrypt hashes
-    if hashed_password.startswith("sha256$"):
-        parts = hashed_password.split("$")
-        if len(parts) == 3:
-            _, salt, stored_hash = parts
-            computed_hash = hashlib.sha256((plain_password + salt).encode()).hexdigest()
-            return computed_hash == stored_hash
-        return False
-    
-    # Fallback to bcrypt for existing users
-    if len(plain_password.encode('utf-8')) > 72:
-        return False
+async def get_password_hash(password):
     try:
-        return pwd_context.verify(plain_password, hashed_password)
-    except ValueError as e:
-        if "password cannot be longer than 72 bytes" in str(e):
-            return False
-        raise e
+        return await passwords.pool.run(passwords.hash_password, password)
+    except passwords.HashPoolFull:
+        raise _pool_busy()
 
 
-def get_password_hash(password):
-    # Temporary fallback to SHA256 with salt to avoid bcrypt version issues
-    import secrets
-    salt = secrets.token_hex(16)
-    hashed = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"sha256${salt}${hashed}"
+def login_accounts_query(email):
+    """User and recruiter accounts with this email in one query, the user account first"""
+    accounts = [
+        select(
+            literal(user_type).label("user_type"), model.id, model.email, model.hashed_password
+        ).where(model.email == email)
+        for user_type, model in ACCOUNT_MODELS.items()
+    ]
+    # "user" sorts after "recruiter"
+    return union_all(*accounts).order_by(literal_column("user_type").desc())
+
+
+async def upgrade_password_hash(db: AsyncSession, account, new_hash):
+    """Store the rehashed password of a login_accounts_query() row; a failure doesn't fail the login"""
+    model = ACCOUNT_MODELS[account.user_type]
+    try:
+        await db.execute(update(model).where(model.id == account.id).values(hashed_password=new_hash))
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"Warning: could not upgrade the password hash of {account.user_type} {account.id}: {e}")
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -57,43 +88,75 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _token_subject(token, user_type):
+    """(email, account id) of a valid access token for user_type; raises 401 otherwise"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        user_type: str = payload.get("type")
-        if email is None or user_type != "user":
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    email: str = payload.get("sub")
+    if email is None or payload.get("type") != user_type:
+        raise _credentials_exception()
+    # Tokens issued before the account id was added to them carry only the email
+    return email, payload.get("uid")
 
 
-def get_current_recruiter(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+def _account_query(user_type, email, account_id):
+    model = ACCOUNT_MODELS[user_type]
+    if account_id is None:
+        return select(model).where(model.email == email)
+    # Primary key lookup; the email check rejects a token whose account was replaced
+    return select(model).where(model.id == account_id, model.email == email)
+
+
+def _remember(key, account, generation):
+    if account is None:
+        raise _credentials_exception()
+    principal = Principal(
+        id=account.id,
+        email=account.email,
+        user_type=key[0],
+        full_name=getattr(account, "full_name", None),
+        company_name=getattr(account, "company_name", None),
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        user_type: str = payload.get("type")
-        if email is None or user_type != "recruiter":
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    recruiter = db.query(models.Recruiter).filter(models.Recruiter.email == email).first()
-    if recruiter is None:
-        raise credentials_exception
-    return recruiter
\ No newline at end of file
+    principal_cache.set(key, principal, generation)
+    return principal
+
+
+def _current_principal(token, user_type, db):
+    email, account_id = _token_subject(token, user_type)
+    key = (user_type, email, account_id)
+    principal = principal_cache.get(key)
+    if principal is None:
+        generation = principal_cache.generation
+        account = db.execute(_account_query(user_type, email, account_id)).scalars().first()
+        principal = _remember(key, account, generation)
+    return principal
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    return _current_principal(token, "user", db)
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
+    """get_current_user for async routes (see database.get_async_db)"""
+    email, account_id = _token_subject(token, "user")
+    key = ("user", email, account_id)
+    principal = principal_cache.get(key)
+    if principal is None:
+        generation = principal_cache.generation
+        account = (await db.execute(_account_query("user", email, account_id))).scalars().first()
+        principal = _remember(key, account, generation)
+    return principal
+
+
+def get_current_recruiter(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    return _current_principal(token, "recruiter", db)
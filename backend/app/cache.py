@@ -0,0 +1,106 @@
+"""
+In-process caches
+Small thread-safe TTL caches for expensive read results (search counts,
+facets, ...), cleared when the rows they depend on are committed.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import metrics
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache whose entries expire ttl seconds after they were stored"""
+
+    def __init__(self, name, ttl=30.0, maxsize=1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on clear() so a value computed before an invalidation is not stored after it
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        metrics.register_collector(self._collect)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                metrics.inc("cache_hits", cache=self.name)
+                return entry[0]
+            if entry is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+        metrics.inc("cache_misses", cache=self.name)
+        return default
+
+    def set(self, key, value, generation=None):
+        """Store value; skipped if the cache was cleared since generation was read"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+        metrics.inc("cache_invalidations", cache=self.name)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def _collect(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            metrics.set_gauge("cache_entries", len(self._data), cache=self.name)
+            metrics.set_gauge("cache_hit_ratio", round(self.hits / lookups, 4) if lookups else 0, cache=self.name)
+
+
+_invalidations = []
+
+
+def invalidate_on_commit(cache, *model_classes):
+    """Clear cache whenever a session commits changes to any of model_classes"""
+    _invalidations.append((cache, model_classes))
+
+
+def mark_changed(session, *model_classes):
+    """For Core writes, which the ORM doesn't see: clear the caches of model_classes on commit"""
+    session.info.setdefault("changed_models", set()).update(model_classes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_models(session, flush_context):
+    changed = session.info.setdefault("changed_models", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        changed.add(type(obj))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed(session):
+    changed = session.info.pop("changed_models", None)
+    if not changed:
+        return
+    for cache, model_classes in _invalidations:
+        if any(issubclass(cls, model_classes) for cls in changed):
+            cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed(session):
+    session.info.pop("changed_models", None)
@@ -0,0 +1,114 @@
+"""
+Circuit breaker for upstream dependencies
+Fails fast while a dependency is unhealthy instead of letting requests pile up
+"""
+import threading
+import time
+
+from app import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Numeric encoding used for the state gauge
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} is temporarily unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+    - closed: calls pass through; consecutive failures are counted
+    - open: calls are rejected immediately until reset_timeout has passed
+    - half_open: a single trial call is let through; success closes the
+      circuit, failure opens it again
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started_at = 0.0
+
+        metrics.register_collector(self._collect)
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Reserve a call slot, raising CircuitOpenError if the call must be rejected"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            # A trial call that never reported back is abandoned after reset_timeout
+            trial_stale = time.monotonic() - self._trial_started_at >= self.reset_timeout
+            if state == HALF_OPEN and (not self._trial_in_flight or trial_stale):
+                self._trial_in_flight = True
+                self._trial_started_at = time.monotonic()
+                return
+            retry_after = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+        metrics.inc("circuit_breaker_rejected", breaker=self.name)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+            if self._state != CLOSED:
+                print(f"Circuit breaker '{self.name}' closed")
+            self._state = CLOSED
+
+    def release(self):
+        """Finish a call without counting it (an error that says nothing about the dependency's health)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._trial_in_flight = False
+            state = self._current_state()
+            should_open = state == HALF_OPEN or (
+                state == CLOSED and self._consecutive_failures >= self.failure_threshold
+            )
+            if should_open:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+        metrics.inc("circuit_breaker_failures", breaker=self.name)
+        if should_open:
+            metrics.inc("circuit_breaker_opened", breaker=self.name)
+            print(f"Warning: circuit breaker '{self.name}' opened after {self._consecutive_failures} consecutive failure(s)")
+
+    def _collect(self):
+        with self._lock:
+            state = self._current_state()
+            failures = self._consecutive_failures
+        metrics.set_gauge("circuit_breaker_state", STATE_VALUES[state], breaker=self.name)
+        metrics.set_gauge("circuit_breaker_consecutive_failures", failures, breaker=self.name)
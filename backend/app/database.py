@@ -1,19 +1,435 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+"""
+Database engine and sessions
+create_db_engine() applies the production settings for the database in the URL:
+
+- SQLite: foreign key enforcement, WAL journal (readers and the writer
+  don't block each other), synchronous=NORMAL, memory-mapped reads and a
+  busy timeout, set on every new connection
+- PostgreSQL: a sized connection pool with pre-ping and connection recycling
+
+How long each checkout waits for a pooled connection is timed into the
+db_pool_checkout_wait_seconds histogram, how long the connection then stays
+checked out into db_pool_connection_held_seconds, and pool usage is
+reported as gauges, at /api/metrics.
+
+Most routes use the sync SessionLocal (get_db) and run in the threadpool.
+The hot read endpoints use AsyncSessionLocal (get_async_db) on the same
+database through its async driver (aiosqlite / asyncpg), so waiting on the
+database does not hold a threadpool thread.
+
+Read-only endpoints use get_read_db / get_async_read_db instead: their
+sessions read from a healthy replica in DATABASE_REPLICA_URLS (round-robin)
+and fall back to the primary. A client that has just written gets the
+primary for READ_YOUR_WRITES_SECONDS so it sees its own changes.
+"""
+import hashlib
+import itertools
 import os
+import threading
+import time
+
 from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import create_engine, event, text, Insert, Update, Delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from app import metrics, cache
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pathfinder.db")
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# SQLite connection settings
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+# Connection pool (pre-ping and recycle only apply to server databases)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Time a request waits for a free connection (up to DB_POOL_TIMEOUT_SECONDS)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Time a connection is held by a request; long holds are what exhaust the pool
+HOLD_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Driver used for each database by the async engine
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Read replicas (comma-separated URLs); without any, reads use the primary
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("REPLICA_HEALTH_CHECK_SECONDS", "5"))
+# How long a client's reads stay on the primary after it writes (cover the replication lag)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_PRIMARY_COOKIE = "pf_read_primary"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class _TimedCheckout:
+    """
+    Pool mixin timing each checkout: the wait for a free connection (or for a
+    new one to open) until the pool hands it over. Labelled by the pool's
+    logging name, which create_db_engine sets to the engine's metrics name.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            metrics.inc("db_pool_checkout_timeouts", pool=self.logging_name)
+            raise
+        finally:
+            metrics.observe(
+                "db_pool_checkout_wait_seconds", time.perf_counter() - started,
+                buckets=WAIT_BUCKETS, pool=self.logging_name
+            )
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+# Engines whose pools are reported by _collect_pools, by metrics name (a new engine replaces one of the same name)
+_pool_engines = {}
+
+
+def _instrument_pool(db_engine, name):
+    """Time how long each connection is checked out, through the pool's checkout/checkin events"""
+    @event.listens_for(db_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        metrics.inc("db_pool_checkouts", pool=name)
+
+    @event.listens_for(db_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.observe(
+                "db_pool_connection_held_seconds", time.perf_counter() - started,
+                buckets=HOLD_BUCKETS, pool=name
+            )
+
+    _pool_engines[name] = db_engine
+
+
+@metrics.register_collector
+def _collect_pools():
+    for name, db_engine in list(_pool_engines.items()):
+        pool = db_engine.pool
+        metrics.set_gauge("db_pool_size", pool.size(), pool=name)
+        metrics.set_gauge("db_pool_checked_out", pool.checkedout(), pool=name)
+        metrics.set_gauge("db_pool_overflow", max(pool.overflow(), 0), pool=name)
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # Off by default in SQLite; needed for the ON DELETE CASCADE foreign keys
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        mode = cursor.fetchone()[0]
+        if mode.lower() != "wal":
+            print(f"Warning: SQLite is using journal_mode={mode}; WAL is not available for this database")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    finally:
+        cursor.close()
+
+
+def async_database_url(url):
+    """url with its async driver: sqlite:// -> sqlite+aiosqlite://, postgresql:// -> postgresql+asyncpg://"""
+    url = make_url(url)
+    return url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}")
+
+
+def create_db_engine(url=DATABASE_URL, name="primary", asynchronous=False, **kwargs):
+    """
+    Engine for url with the settings above; name labels its pool metrics.
+    With asynchronous, an AsyncEngine on the database's async driver.
+    """
+    backend = make_url(url).get_backend_name()
+    in_memory = backend == "sqlite" and make_url(url).database in (None, "", ":memory:")
+
+    options = {}
+    if backend == "sqlite" and not asynchronous:
+        options["connect_args"] = {"check_same_thread": False}
+    if not in_memory:
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+            pool_logging_name=name,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT_SECONDS,
+        )
+    if backend != "sqlite":
+        options.update(pool_pre_ping=DB_POOL_PRE_PING, pool_recycle=DB_POOL_RECYCLE_SECONDS)
+    options.update(kwargs)
+
+    if asynchronous:
+        db_engine = create_async_engine(async_database_url(url), **options)
+    else:
+        db_engine = create_engine(url, **options)
+    sync_engine = db_engine.sync_engine if asynchronous else db_engine
+    if backend == "sqlite":
+        event.listen(sync_engine, "connect", _enable_sqlite_foreign_keys)
+        if not in_memory:
+            event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    if isinstance(sync_engine.pool, QueuePool):
+        _instrument_pool(sync_engine, name)
+
+    return db_engine
+
+
+class LazyAsyncEngine:
+    """
+    AsyncEngine built on first use, so importing the app does not need the
+    async driver (asyncpg for PostgreSQL); only the async endpoints do.
+    on_create(async_engine) runs once the engine exists.
+    """
+
+    def __init__(self, url, name, on_create=None):
+        self.url = url
+        self.name = name
+        self.on_create = on_create
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    async_engine = create_db_engine(self.url, name=self.name, asynchronous=True)
+                    if self.on_create:
+                        self.on_create(async_engine)
+                    self._engine = async_engine
+        return self._engine
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+
+
+engine = create_db_engine(DATABASE_URL)
+async_engine = LazyAsyncEngine(DATABASE_URL, "primary_async")
+
+
+def schema_version(bind):
+    """Latest migration applied to the database behind bind"""
+    with bind.connect() as conn:
+        return conn.execute(text("SELECT max(version) FROM schema_migrations")).scalar()
+
+
+class Replica:
+    """A read replica: sync and (lazily built) async engines plus its health"""
+
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+        self.engine = create_db_engine(url, name=name)
+        self.async_engine = LazyAsyncEngine(
+            url, f"{name}_async", on_create=lambda e: event.listen(e.sync_engine, "handle_error", self._on_error)
+        )
+        self.healthy = True
+        self._lock = threading.Lock()
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # Lost or refused connections take the replica out until the next good health check
+        if context.is_disconnect or context.connection is None:
+            self.set_healthy(False, str(context.original_exception).splitlines()[0])
+
+    def set_healthy(self, healthy, reason=""):
+        with self._lock:
+            changed = healthy != self.healthy
+            self.healthy = healthy
+        if changed and healthy:
+            print(f"✓ Read replica {self.name} is healthy again")
+        elif changed:
+            print(f"Warning: read replica {self.name} taken out of rotation: {reason}")
+
+    def check(self, primary_version):
+        """Healthy if it answers and has every migration the primary has"""
+        try:
+            version = schema_version(self.engine)
+        except SQLAlchemyError as e:
+            self.set_healthy(False, str(e).splitlines()[0])
+            return
+        if version != primary_version:
+            self.set_healthy(False, f"schema version {version}, primary is at {primary_version}")
+        else:
+            self.set_healthy(True)
+
+
+class ReplicaSet:
+    """The read replicas, handed out round-robin among the healthy ones"""
+
+    def __init__(self, urls):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls, 1)]
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+        metrics.register_collector(self._collect)
+
+    def choose(self):
+        """Next healthy replica, or None when reads must use the primary"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def check(self):
+        try:
+            primary_version = schema_version(engine)
+        except SQLAlchemyError as e:
+            print(f"Warning: replica health check skipped, primary unavailable: {e}")
+            return
+        for replica in self.replicas:
+            replica.check(primary_version)
+
+    def start_health_checks(self, interval=None):
+        """Check every replica now, then every interval seconds in a daemon thread"""
+        interval = REPLICA_HEALTH_CHECK_SECONDS if interval is None else interval
+        if not self.replicas or (self._thread is not None and self._thread.is_alive()):
+            return
+        self.check()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="replica-health-check", daemon=True)
+        self._thread.start()
+
+    def stop_health_checks(self):
+        self._stop.set()
+
+    async def dispose(self):
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+    def _collect(self):
+        for replica in self.replicas:
+            metrics.set_gauge("db_replica_healthy", int(replica.healthy), replica=replica.name)
+
+
+replicas = ReplicaSet(DATABASE_REPLICA_URLS)
+
+
+class RoutingSession(Session):
+    """
+    Session for read-only requests: reads go to one replica (chosen on first
+    use), writes to the primary. Once it writes, or after use_primary(),
+    everything goes to the primary so it reads its own writes.
+    """
+
+    primary = engine
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = None
+        self.primary_only = False
+        # "primary" or "replica" once a statement has run, for the db_read_sessions counter
+        self.served_by = None
+
+    def use_primary(self):
+        self.primary_only = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            self.primary_only = True
+        if not self.primary_only and (self.replica is None or not self.replica.healthy):
+            self.replica = replicas.choose()
+        if self.primary_only or self.replica is None:
+            self.served_by = "primary"
+            return self.primary
+        self.served_by = "replica"
+        return self._replica_bind(self.replica)
+
+    def _replica_bind(self, replica):
+        return replica.engine
+
+
+class AsyncRoutingSession(RoutingSession):
+    """RoutingSession behind an AsyncSession: binds are the async engines' sync facades"""
+
+    @property
+    def primary(self):
+        return async_engine.get().sync_engine
+
+    def _replica_bind(self, replica):
+        return replica.async_engine.get().sync_engine
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, class_=RoutingSession)
+# Objects stay readable after commit: async sessions cannot lazy-load expired attributes.
+# Bound to async_engine when opened (get_async_db), so the engine is only built when first needed.
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(
+    autoflush=False, expire_on_commit=False, sync_session_class=AsyncRoutingSession
+)
+
+# Clients that wrote recently -> their reads go to the primary
+_recent_writers = cache.TTLCache("recent_writers", ttl=READ_YOUR_WRITES_SECONDS, maxsize=10000)
+
+
+def _client_key(request):
+    # The bearer token identifies a logged-in client; anonymous clients go by address
+    identity = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def record_write(request, response):
+    """Send this client's reads to the primary for the next READ_YOUR_WRITES_SECONDS"""
+    if not replicas.replicas:
+        return
+    _recent_writers.set(_client_key(request), True)
+    # The cookie covers the other API workers, which don't share _recent_writers
+    response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=max(1, round(READ_YOUR_WRITES_SECONDS)), httponly=True)
+
+
+def reads_need_primary(request):
+    if not replicas.replicas:
+        return False
+    return READ_PRIMARY_COOKIE in request.cookies or _recent_writers.get(_client_key(request), False)
+
+
+def served_by_replica(session):
+    """
+    Whether session's last statement was answered by a replica. Such results
+    can predate a write the primary has already committed (and cleared the
+    caches for), so they must not be stored in the process-wide caches.
+    """
+    return getattr(session, "served_by", None) == "replica"
+
+
+def _count_read(db):
+    if replicas.replicas and db.served_by:
+        metrics.inc("db_read_sessions", served_by=db.served_by)
+
 
 Base = declarative_base()
 
@@ -23,4 +439,32 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=async_engine.get()) as db:
+        yield db
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints (see RoutingSession)"""
+    db = ReadSessionLocal()
+    if reads_need_primary(request):
+        db.use_primary()
+    try:
+        yield db
+    finally:
+        _count_read(db)
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    """Async session for read-only endpoints (see RoutingSession)"""
+    async with AsyncReadSessionLocal() as db:
+        if reads_need_primary(request):
+            db.sync_session.use_primary()
+        try:
+            yield db
+        finally:
+            _count_read(db.sync_session)
@@ -0,0 +1,138 @@
+"""
+Streaming data exports
+Dumps jobs, roadmaps or user profiles as NDJSON or CSV, optionally gzipped,
+for analytics pulls. Rows are read with yield_per (a server-side cursor on
+PostgreSQL, batched fetches on SQLite) as plain column tuples, so nothing is
+kept in the session, and each row is written out as soon as it is read:
+memory stays at about one batch however large the table is.
+
+Used by GET /api/exports/{dataset} and export_data.py.
+"""
+import csv
+import io
+import json
+import os
+import time
+import zlib
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app import models, metrics
+
+# Rows fetched from the database at a time
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Output is sent in chunks of about this many bytes
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Key required by the HTTP export endpoint (unset: the endpoint is disabled)
+EXPORT_API_KEY = os.getenv("EXPORT_API_KEY", "")
+
+DATASETS = {
+    "jobs": models.Job,
+    "roadmaps": models.Roadmap,
+    "profiles": models.UserProfile,
+}
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+EXPORT_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+
+def columns(dataset):
+    return list(DATASETS[dataset].__table__.columns)
+
+
+def export_query(dataset, since=None):
+    """SELECT of every column of dataset, oldest first, optionally only rows created since"""
+    model = DATASETS[dataset]
+    query = select(*columns(dataset)).order_by(model.id)
+    if since is not None:
+        query = query.where(model.created_at >= since)
+    return query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_lines(names, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(names, row)), default=_json_default) + "\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(names, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _chunked(lines):
+    # Many small lines -> fewer, larger writes
+    parts = []
+    size = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield b"".join(parts)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(session_factory, dataset, fmt="ndjson", gzip=False, since=None):
+    """
+    Generator of the export's bytes. Opens its own session with session_factory
+    and closes it when the generator finishes or is closed (client went away).
+    """
+    names = [column.name for column in columns(dataset)]
+    started = time.perf_counter()
+    count = 0
+    db = session_factory()
+    try:
+        def rows():
+            nonlocal count
+            for row in db.execute(export_query(dataset, since)):
+                count += 1
+                yield row
+
+        lines = ndjson_lines(names, rows()) if fmt == "ndjson" else csv_lines(names, rows())
+        chunks = _chunked(lines)
+        yield from (_gzipped(chunks) if gzip else chunks)
+    finally:
+        db.close()
+        metrics.inc("export_rows", count, dataset=dataset, format=fmt)
+        metrics.observe("export_seconds", time.perf_counter() - started, buckets=EXPORT_BUCKETS, dataset=dataset)
+
+
+def filename(dataset, fmt, gzip=False):
+    return f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}" + (".gz" if gzip else "")
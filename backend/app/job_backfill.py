@@ -0,0 +1,177 @@
+"""
+Legacy job backfill
+Jobs created before the job board schema only have the legacy title /
+description / location columns, and some have empty work_type, job_type or
+experience_level. normalize_legacy_jobs() rewrites those rows in place so
+every job has the job board columns filled in, and readers no longer need
+per-row fallbacks.
+
+It walks the table in id order in small batches, committing and pausing
+after each one, so it can run against a live database. It only touches rows
+that still need it, so it can be stopped and re-run at any time (pass
+start_after to skip ahead). normalize_salaries() and normalize_locations()
+fill the annual INR salary and canonical location columns the same way. See
+backfill_legacy_jobs.py.
+"""
+import time
+
+from sqlalchemy import text
+
+from app import salary, locations
+
+# Values for columns that are empty on legacy rows
+DEFAULTS = {
+    "job_title": "Untitled Job",
+    "company_name": "Company Not Specified",
+    "work_type": "onsite",
+    "job_type": "full_time",
+    "experience_level": "fresher",
+}
+
+# Columns every job must have once the backfill has run (constrained by migration 7)
+REQUIRED_COLUMNS = ("job_title", "company_name", "jd_text", "work_type", "job_type", "experience_level")
+
+NEEDS_NORMALIZING = (
+    "job_title IS NULL OR job_title = '' "
+    "OR company_name IS NULL OR company_name = '' "
+    "OR jd_text IS NULL "
+    "OR work_type IS NULL OR work_type = '' "
+    "OR job_type IS NULL OR job_type = '' "
+    "OR experience_level IS NULL OR experience_level = '' "
+    "OR is_remote IS NULL "
+    "OR skills_required IS NULL OR nice_to_have_skills IS NULL "
+    "OR title IS NULL OR description IS NULL"
+)
+
+_JOB_TITLE = "COALESCE(NULLIF(job_title, ''), NULLIF(title, ''), :job_title)"
+_JD_TEXT = "COALESCE(jd_text, description, '')"
+
+NORMALIZE = text(
+    "UPDATE jobs SET "
+    f"job_title = {_JOB_TITLE}, "
+    f"jd_text = {_JD_TEXT}, "
+    "company_name = COALESCE(NULLIF(company_name, ''), "
+    "(SELECT NULLIF(recruiters.company_name, '') FROM recruiters WHERE recruiters.id = jobs.recruiter_id), "
+    ":company_name), "
+    "work_type = COALESCE(NULLIF(work_type, ''), :work_type), "
+    "job_type = COALESCE(NULLIF(job_type, ''), :job_type), "
+    "experience_level = COALESCE(NULLIF(experience_level, ''), :experience_level), "
+    "is_remote = COALESCE(is_remote, FALSE), "
+    "skills_required = COALESCE(skills_required, '[]'), "
+    "nice_to_have_skills = COALESCE(nice_to_have_skills, '[]'), "
+    # The legacy columns are still served by /api/jobs and /api/recruiter/jobs
+    f"title = COALESCE(title, {_JOB_TITLE}), "
+    f"description = COALESCE(description, SUBSTR({_JD_TEXT}, 1, 500)) "
+    f"WHERE id > :low AND id <= :high AND ({NEEDS_NORMALIZING})"
+)
+
+
+MISSING_REQUIRED = " OR ".join(f"{column} IS NULL" for column in REQUIRED_COLUMNS)
+
+
+def count_remaining(conn):
+    return conn.execute(text(f"SELECT COUNT(*) FROM jobs WHERE {NEEDS_NORMALIZING}")).scalar()
+
+
+def count_missing_required(conn):
+    """Jobs that would violate migration 7's NOT NULL constraint on REQUIRED_COLUMNS"""
+    return conn.execute(text(f"SELECT COUNT(*) FROM jobs WHERE {MISSING_REQUIRED}")).scalar()
+
+
+def _batches(engine, batch_size, start_after):
+    """Yield (low, high) id ranges of up to batch_size jobs"""
+    low = start_after
+    while True:
+        with engine.connect() as conn:
+            high = conn.execute(
+                text("SELECT MAX(id) FROM (SELECT id FROM jobs WHERE id > :low ORDER BY id LIMIT :limit) AS batch"),
+                {"low": low, "limit": batch_size}
+            ).scalar()
+        if high is None:
+            return
+        yield low, high
+        low = high
+
+
+def normalize_legacy_jobs(engine, batch_size=500, pause=0.05, start_after=0, verbose=True):
+    """
+    Normalize legacy job rows in id order, batch_size ids per transaction,
+    sleeping pause seconds between batches. Returns the number of rows updated.
+    """
+    updated = 0
+    for low, high in _batches(engine, batch_size, start_after):
+        with engine.begin() as conn:
+            result = conn.execute(NORMALIZE, {"low": low, "high": high, **DEFAULTS})
+        updated += result.rowcount
+        if verbose and result.rowcount:
+            print(f"✓ Normalized {result.rowcount} job(s) with id {low + 1}-{high}")
+        if pause:
+            time.sleep(pause)
+    return updated
+
+
+def normalize_salaries(engine, batch_size=500, pause=0.05, start_after=0, verbose=True):
+    """
+    Recompute salary_annual_min/max_normalized for every job, in the same
+    batches as normalize_legacy_jobs(). Returns the number of rows changed.
+    """
+    updated = 0
+    for low, high in _batches(engine, batch_size, start_after):
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, min_salary, max_salary, salary_currency, salary_pay_period, "
+                "salary_annual_min_normalized, salary_annual_max_normalized "
+                "FROM jobs WHERE id > :low AND id <= :high"
+            ), {"low": low, "high": high}).all()
+            changes = []
+            for row in rows:
+                annual = salary.normalized_range(row.min_salary, row.max_salary, row.salary_currency, row.salary_pay_period)
+                if annual != (row.salary_annual_min_normalized, row.salary_annual_max_normalized):
+                    changes.append({"id": row.id, "annual_min": annual[0], "annual_max": annual[1]})
+            if changes:
+                conn.execute(text(
+                    "UPDATE jobs SET salary_annual_min_normalized = :annual_min, "
+                    "salary_annual_max_normalized = :annual_max WHERE id = :id"
+                ), changes)
+        updated += len(changes)
+        if verbose and changes:
+            print(f"✓ Normalized salaries of {len(changes)} job(s) with id {low + 1}-{high}")
+        if pause:
+            time.sleep(pause)
+    return updated
+
+
+def normalize_locations(engine, batch_size=500, pause=0.05, start_after=0, verbose=True):
+    """
+    Recompute location_city_id / location_country_code and the legacy
+    location of every job, in the same batches as normalize_legacy_jobs().
+    Returns the number of rows changed.
+    """
+    updated = 0
+    for low, high in _batches(engine, batch_size, start_after):
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT id, location_city, location_country, location_city_id, location_country_code, location "
+                "FROM jobs WHERE id > :low AND id <= :high"
+            ), {"low": low, "high": high}).all()
+            changes = []
+            for row in rows:
+                place = locations.normalize_location(row.location_city, row.location_country)
+                country = row.location_country
+                if place.country_code and not (country or "").strip():
+                    country = place.country
+                current = (row.location_city_id, row.location_country_code, row.location_country, row.location)
+                wanted = (place.city_id, place.country_code, country, place.label)
+                if wanted != current:
+                    changes.append(dict(zip(("city_id", "country_code", "country", "label"), wanted), id=row.id))
+            if changes:
+                conn.execute(text(
+                    "UPDATE jobs SET location_city_id = :city_id, location_country_code = :country_code, "
+                    "location_country = :country, location = :label WHERE id = :id"
+                ), changes)
+        updated += len(changes)
+        if verbose and changes:
+            print(f"✓ Normalized locations of {len(changes)} job(s) with id {low + 1}-{high}")
+        if pause:
+            time.sleep(pause)
+    return updated
@@ -0,0 +1,155 @@
+"""
+Stored job embeddings
+Job matching compares a profile vector with a Doc2Vec vector per job.
+Inferring every job's vector on each match request was most of its cost, so
+the vectors are computed once, in the background, and kept in the
+job_embeddings table.
+
+enqueue(job_ids) queues one embedding task for a group of jobs (a whole
+import batch, or a job that was just created or edited); a worker thread
+embeds each task's jobs together and writes the vectors in one statement.
+stored_vectors() returns them for the matcher. Vectors computed elsewhere
+(the job corpus ships with its own) are saved with store_vectors().
+"""
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import insert
+
+from app import models, metrics, ml_service, job_search
+from app.database import SessionLocal
+
+MODEL_NAME = "doc2vec"
+# Jobs embedded and written per transaction
+JOB_EMBEDDING_BATCH_SIZE = int(os.getenv("JOB_EMBEDDING_BATCH_SIZE", "256"))
+
+EMBED_FIELDS = (
+    "id", "job_title", "jd_text", "skills_required", "nice_to_have_skills", "industry", "experience_level",
+)
+
+EMBED_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_queue = queue.Queue()
+# Job ids queued or being embedded, so repeated requests don't queue them again
+_pending = set()
+_pending_lock = threading.Lock()
+_stop = threading.Event()
+_worker = None
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def embed_jobs(db, job_ids):
+    """Compute and store the vectors of job_ids (replacing old ones). Returns how many were stored."""
+    stored = 0
+    for ids in _chunks(list(job_ids), JOB_EMBEDDING_BATCH_SIZE):
+        jobs = (
+            db.query(models.Job)
+            .options(job_search.load_fields(EMBED_FIELDS))
+            .filter(models.Job.id.in_(ids))
+            .all()
+        )
+        vectors = ml_service.embed_documents([ml_service.job_document(job) for job in jobs])
+        db.query(models.JobEmbedding).filter(models.JobEmbedding.job_id.in_(ids)).delete(synchronize_session=False)
+        store_vectors(db, [(job.id, vector) for job, vector in zip(jobs, vectors)])
+        db.commit()
+        stored += len(jobs)
+    return stored
+
+
+def store_vectors(db, vectors):
+    """Insert (job id, vector) pairs of jobs that have no stored vector yet (not committed)"""
+    rows = [
+        {"job_id": job_id, "model": MODEL_NAME, "vector": np.asarray(vector, dtype=np.float32).tobytes()}
+        for job_id, vector in vectors
+    ]
+    if rows:
+        db.execute(insert(models.JobEmbedding), rows)
+
+
+def stored_vectors(db, job_ids):
+    """{job id: vector} for the jobs in job_ids that have a stored vector"""
+    vectors = {}
+    for ids in _chunks(list(job_ids), 500):
+        rows = db.query(models.JobEmbedding.job_id, models.JobEmbedding.vector).filter(
+            models.JobEmbedding.job_id.in_(ids),
+            models.JobEmbedding.model == MODEL_NAME,
+        )
+        for job_id, vector in rows:
+            vectors[job_id] = np.frombuffer(vector, dtype=np.float32)
+    return vectors
+
+
+def enqueue(job_ids):
+    """Queue the jobs for embedding as one task (ids already queued are skipped)"""
+    if ml_service.DOC2VEC_MODEL is None:
+        return
+    with _pending_lock:
+        ids = [job_id for job_id in dict.fromkeys(job_ids) if job_id not in _pending]
+        _pending.update(ids)
+    if ids:
+        _queue.put(ids)
+        metrics.inc("job_embedding_jobs_queued", len(ids))
+
+
+def _run_task(ids):
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        stored = embed_jobs(db, ids)
+        metrics.inc("job_embeddings_stored", stored)
+    except Exception as e:
+        db.rollback()
+        metrics.inc("job_embedding_failures")
+        print(f"Warning: could not embed {len(ids)} job(s): {e}")
+    finally:
+        db.close()
+        with _pending_lock:
+            _pending.difference_update(ids)
+        metrics.observe("job_embedding_task_seconds", time.perf_counter() - started, buckets=EMBED_BUCKETS)
+
+
+def start_worker():
+    """Embed queued jobs in a daemon thread (needs the Doc2Vec model)"""
+    global _worker
+    if ml_service.DOC2VEC_MODEL is None:
+        print("Warning: Doc2Vec model not loaded; job embeddings will not be computed")
+        return
+    if _worker is not None and _worker.is_alive():
+        return
+
+    def run():
+        while not _stop.is_set():
+            try:
+                ids = _queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                _run_task(ids)
+            finally:
+                _queue.task_done()
+
+    _stop.clear()
+    _worker = threading.Thread(target=run, name="job-embeddings", daemon=True)
+    _worker.start()
+
+
+def stop_worker():
+    _stop.set()
+
+
+def wait_until_idle():
+    """Block until every queued task has been processed"""
+    _queue.join()
+
+
+@metrics.register_collector
+def _collect():
+    with _pending_lock:
+        metrics.set_gauge("job_embedding_pending_jobs", len(_pending))
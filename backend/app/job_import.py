@@ -0,0 +1,247 @@
+"""
+Bulk job import
+Reads an upload of CSV (header row + one job per row) or JSON Lines (one job
+object per line) row by row, validates each row as JobCreateEnhanced and
+inserts the valid ones in batched transactions: one multi-row INSERT per
+batch, with the batch's skills indexed in the same transaction and its
+embeddings queued as a single background task. Rows that fail are reported
+by row number; they don't stop the import. Rows without a company_name get
+the recruiter's.
+
+import_corpus() loads the legacy Kaggle job corpus the Doc2Vec model was
+trained on (ml_service.JOB_METADATA) the same way, as catalogue jobs with no
+recruiter, and stores the corpus's precomputed vectors (JOB_VECTORS) as
+their embeddings instead of inferring them again. Catalogue jobs have status
+"catalogue", so they stay off the job board, search and facets; job matching
+serves them alongside recruiters' active postings from the one jobs table.
+"""
+import csv
+import io
+import json
+import os
+import re
+from types import SimpleNamespace
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import models, schemas, job_skills, job_embeddings, cache, salary, locations, skill_gap_engine
+
+JOB_IMPORT_BATCH_SIZE = int(os.getenv("JOB_IMPORT_BATCH_SIZE", "500"))
+JOB_IMPORT_MAX_ROWS = int(os.getenv("JOB_IMPORT_MAX_ROWS", "10000"))
+# Errors listed in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+CONTENT_TYPES = {"text/csv": "csv", "application/x-ndjson": "jsonl", "application/jsonl": "jsonl"}
+
+# CSV cells holding lists: "Python, SQL; Docker"
+LIST_FIELDS = ("skills_required", "nice_to_have_skills")
+LIST_SEPARATOR = re.compile(r"[,;]")
+
+# Job corpus rows are loaded as jobs of source CORPUS_SOURCE, source_id ID_num
+CORPUS_SOURCE = "kaggle_job_corpus"
+JOB_CORPUS_COMPANY = os.getenv("JOB_CORPUS_COMPANY", "PathFinder Career Catalogue")
+CORPUS_OWNER = SimpleNamespace(id=None, company_name=JOB_CORPUS_COMPANY)
+
+
+def detect_format(filename, content_type):
+    """"csv" or "jsonl" from the upload's file name or content type, else None"""
+    extension = os.path.splitext(filename or "")[1].lower()
+    return FORMATS.get(extension) or CONTENT_TYPES.get((content_type or "").split(";")[0].strip())
+
+
+def _split_lists(row):
+    for field in LIST_FIELDS:
+        if isinstance(row.get(field), str):
+            row[field] = [item.strip() for item in LIST_SEPARATOR.split(row[field]) if item.strip()]
+    return row
+
+
+def read_rows(file, fmt):
+    """Yield (row number, row dict or None, error or None) from a binary file object"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(text), 1):
+            # Empty cells use the field's default
+            cells = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            yield number, _split_lists(cells), None
+        return
+
+    for number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "expected a JSON object"
+            continue
+        yield number, _split_lists(row), None
+
+
+def job_values(job, recruiter):
+    """Column values of a new Job from a JobCreateEnhanced posted by recruiter"""
+    return dict(
+        recruiter_id=recruiter.id,
+        job_title=job.job_title,
+        company_name=job.company_name or recruiter.company_name,
+        location_city=job.location_city,
+        location_country=job.location_country,
+        is_remote=job.is_remote,
+        work_type=job.work_type,
+        job_type=job.job_type,
+        experience_level=job.experience_level,
+        min_experience_years=job.min_experience_years,
+        max_experience_years=job.max_experience_years,
+        min_salary=job.min_salary,
+        max_salary=job.max_salary,
+        salary_currency=job.salary_currency,
+        salary_pay_period=job.salary_pay_period,
+        is_salary_visible=job.is_salary_visible,
+        industry=job.industry,
+        jd_text=job.jd_text,
+        skills_required=job.skills_required or [],
+        nice_to_have_skills=job.nice_to_have_skills or [],
+        employment_level=job.employment_level,
+        application_url=job.application_url,
+        application_email=job.application_email,
+        application_deadline=job.application_deadline,
+        status="active",
+        # Legacy fields
+        title=job.job_title,
+        description=job.jd_text[:500] if len(job.jd_text) > 500 else job.jd_text,
+    )
+
+
+def _normalized(values):
+    # What the Job before_insert hooks do, for rows inserted without the ORM
+    job = SimpleNamespace(**values)
+    salary.set_normalized_salary(job)
+    locations.set_job_location(job)
+    return vars(job)
+
+
+def _validation_errors(error):
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()]
+
+
+class _Result:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.job_ids = []
+
+    def fail(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": number, "errors": errors})
+
+    def as_dict(self):
+        return {"imported": self.imported, "failed": self.failed, "errors": self.errors, "job_ids": self.job_ids}
+
+
+def _save_batch(db, batch, result):
+    # batch: [(row number, column values, precomputed vector or None)]
+    rows = [values for _, values, _ in batch]
+    try:
+        job_ids = db.execute(
+            insert(models.Job).returning(models.Job.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        job_skills.add_job_skills(db, zip(job_ids, (row["skills_required"] for row in rows)))
+        job_embeddings.store_vectors(db, [
+            (job_id, vector) for job_id, (_, _, vector) in zip(job_ids, batch) if vector is not None
+        ])
+        cache.mark_changed(db, models.Job, models.JobSkill)
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        message = str(e.orig if getattr(e, "orig", None) else e).splitlines()[0]
+        for number, _, _ in batch:
+            result.fail(number, [f"batch not saved: {message}"])
+        return
+    result.imported += len(job_ids)
+    result.job_ids.extend(job_ids)
+    job_embeddings.enqueue([job_id for job_id, (_, _, vector) in zip(job_ids, batch) if vector is None])
+
+
+def import_jobs(db, rows, recruiter, batch_size=JOB_IMPORT_BATCH_SIZE, max_rows=JOB_IMPORT_MAX_ROWS):
+    """
+    Insert the valid rows of read_rows() as jobs of recruiter.
+    Returns {"imported", "failed", "errors": [{"row", "errors"}], "job_ids"}.
+    """
+    result = _Result()
+    batch = []
+    number = 0
+    try:
+        for number, row, error in rows:
+            if number > max_rows:
+                result.fail(number, [f"import limit of {max_rows} rows reached; this and later rows were not read"])
+                break
+            if error:
+                result.fail(number, [error])
+                continue
+            if not row.get("company_name"):
+                row["company_name"] = recruiter.company_name
+            try:
+                job = schemas.JobCreateEnhanced.model_validate(row)
+            except ValidationError as e:
+                result.fail(number, _validation_errors(e))
+                continue
+            batch.append((number, _normalized(job_values(job, recruiter)), None))
+            if len(batch) >= batch_size:
+                _save_batch(db, batch, result)
+                batch = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Unreadable from here on: keep what was read before it
+        result.fail(number + 1, [f"could not read the file from about this row on: {e}"])
+    if batch:
+        _save_batch(db, batch, result)
+    return result.as_dict()
+
+
+def corpus_rows(metadata, vocabulary):
+    """Yield (ID_num, JobCreateEnhanced fields, vector_id) for each row of the job corpus DataFrame"""
+    for record in metadata.itertuples(index=False):
+        yield int(record.ID_num), {
+            "job_title": record.job_title,
+            "company_name": JOB_CORPUS_COMPANY,
+            "jd_text": f"{record.Short_description}\n\nSkills: {record.Skills_required}",
+            "industry": record.Industry,
+            "skills_required": sorted(skill_gap_engine.job_corpus_skills(record.Skills_required, vocabulary)),
+        }, int(record.vector_id)
+
+
+def import_corpus(db, metadata, vectors, batch_size=JOB_IMPORT_BATCH_SIZE):
+    """
+    Insert the job corpus (JOB_METADATA rows, their JOB_VECTORS rows as
+    embeddings) as catalogue jobs. Rows loaded before are skipped, so it can
+    be re-run. Returns import_jobs()' result plus "skipped".
+    """
+    loaded = {
+        source_id for (source_id,) in
+        db.query(models.Job.source_id).filter(models.Job.source == CORPUS_SOURCE)
+    }
+    pending = metadata[~metadata["ID_num"].astype(str).isin(loaded)]
+    vocabulary = {entry["skill"] for entry in skill_gap_engine.get_skill_metadata()["skills"].values()}
+    result = _Result()
+    batch = []
+    for number, row, vector_id in corpus_rows(pending, vocabulary):
+        try:
+            job = schemas.JobCreateEnhanced.model_validate(row)
+        except ValidationError as e:
+            result.fail(number, _validation_errors(e))
+            continue
+        values = _normalized(job_values(job, CORPUS_OWNER))
+        values.update(source=CORPUS_SOURCE, source_id=str(number), status=models.CATALOGUE_JOB_STATUS)
+        batch.append((number, values, vectors[vector_id]))
+        if len(batch) >= batch_size:
+            _save_batch(db, batch, result)
+            batch = []
+    if batch:
+        _save_batch(db, batch, result)
+    return {**result.as_dict(), "skipped": len(metadata) - len(pending)}
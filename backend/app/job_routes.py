@@ -1,66 +1,100 @@
 """Enhanced Job Board API Routes"""
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, String
 from typing import Optional
-from datetime import datetime, timedelta
 
-from app import models, schemas, auth
-from app.database import get_db
-from app.job_roadmap_service import generate_job_roadmap
+from app import models, schemas, auth, job_search, job_skills, job_embeddings, job_import, locations
+from app.database import get_db, get_read_db, get_async_read_db
+from app.job_roadmap_service import generate_job_roadmap, stream_job_roadmap
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
 
+def _job_to_roadmap_dict(job):
+    """Convert a Job row into the dict format expected by the roadmap service"""
+    return {
+        "id": job.id,
+        "job_title": job.job_title,
+        "company_name": job.company_name,
+        "jd_text": job.jd_text,
+        "location_city": job.location_city,
+        "location_country": job.location_country,
+        "work_type": job.work_type,
+        "job_type": job.job_type,
+        "experience_level": job.experience_level,
+        "min_experience_years": job.min_experience_years,
+        "max_experience_years": job.max_experience_years,
+        "skills_required": job.skills_required if isinstance(job.skills_required, list) else [],
+        "nice_to_have_skills": job.nice_to_have_skills if isinstance(job.nice_to_have_skills, list) else [],
+        "industry": job.industry,
+        "roadmap_json": job.roadmap_json,
+    }
+
+
+def _user_roadmap_profile(current_user, profile, job):
+    """Build the user profile dict used for personalized job roadmaps"""
+    all_skills = (profile.skills or []) + (profile.extracted_skills or [])
+    # Separate technical and soft skills (basic heuristic)
+    technical_skills = [s for s in all_skills if any(tech in s.lower() for tech in ['python', 'java', 'react', 'node', 'sql', 'aws', 'docker', 'javascript', 'html', 'css', 'api', 'database', 'cloud', 'ml', 'ai'])]
+    soft_skills = [s for s in all_skills if s not in technical_skills]
+    
+    return {
+        "name": current_user.full_name,
+        "degree": profile.degree or "N/A",
+        "cgpa_10th": profile.cgpa_10th,
+        "cgpa_12th": profile.cgpa_12th,
+        "experience_years": 0,  # Could be calculated from profile if available
+        "current_role": "Student",
+        "technical_skills": technical_skills,
+        "soft_skills": soft_skills,
+        "certifications": profile.certifications or [],
+        "achievements": profile.achievements or [],
+        "target_career": job.job_title
+    }
+
+
 @router.post("/create", response_model=schemas.JobResponseEnhanced)
 def create_job_enhanced(
     job: schemas.JobCreateEnhanced,
-    current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter),
+    current_recruiter: auth.Principal = Depends(auth.get_current_recruiter),
     db: Session = Depends(get_db)
 ):
     """Create a new job posting with enhanced fields"""
-    company_name = job.company_name or current_recruiter.company_name
-    
-    db_job = models.Job(
-        recruiter_id=current_recruiter.id,
-        job_title=job.job_title,
-        company_name=company_name,
-        location_city=job.location_city,
-        location_country=job.location_country,
-        is_remote=job.is_remote,
-        work_type=job.work_type,
-        job_type=job.job_type,
-        experience_level=job.experience_level,
-        min_experience_years=job.min_experience_years,
-        max_experience_years=job.max_experience_years,
-        min_salary=job.min_salary,
-        max_salary=job.max_salary,
-        salary_currency=job.salary_currency,
-        salary_pay_period=job.salary_pay_period,
-        is_salary_visible=job.is_salary_visible,
-        industry=job.industry,
-        jd_text=job.jd_text,
-        skills_required=job.skills_required or [],
-        nice_to_have_skills=job.nice_to_have_skills or [],
-        employment_level=job.employment_level,
-        application_url=job.application_url,
-        application_email=job.application_email,
-        application_deadline=job.application_deadline,
-        status="active",
-        # Legacy fields
-        title=job.job_title,
-        description=job.jd_text[:500] if len(job.jd_text) > 500 else job.jd_text,
-        location=f"{job.location_city or ''}, {job.location_country or ''}".strip(", "),
-    )
+    db_job = models.Job(**job_import.job_values(job, current_recruiter))
     
     db.add(db_job)
+    db.flush()
+    job_skills.sync_job_skills(db, db_job)
     db.commit()
     db.refresh(db_job)
+    job_embeddings.enqueue([db_job.id])
     return db_job
 
 
+@router.post("/import")
+def import_jobs(
+    file: UploadFile = File(..., description="CSV with a header row, or JSON Lines with one job object per line"),
+    format: Optional[str] = Query(None, pattern="^(csv|jsonl)$", description="Defaults to the file extension"),
+    current_recruiter: auth.Principal = Depends(auth.get_current_recruiter),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many job postings at once. Each row has the fields of /create
+    (list fields as "a, b; c" in CSV); invalid rows are reported by row number.
+    """
+    fmt = format or job_import.detect_format(file.filename, file.content_type)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Unknown file format; upload a .csv or .jsonl file or pass format=csv|jsonl")
+    return job_import.import_jobs(db, job_import.read_rows(file.file, fmt), current_recruiter)
+
+
 @router.get("/search")
-def search_jobs(
+async def search_jobs(
     keyword: Optional[str] = Query(None),
     location_city: Optional[str] = Query(None),
     location_country: Optional[str] = Query(None),
@@ -72,120 +106,131 @@ def search_jobs(
     max_salary: Optional[int] = Query(None),
     industry: Optional[str] = Query(None),
     skills_required: Optional[str] = Query(None),
+    skills_match: str = Query("all", pattern="^(all|any)$"),
+    include_skill_facets: bool = Query(False),
     posted_within: Optional[str] = Query("any"),
     sort_by: Optional[str] = Query("newest"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; skip is ignored when set"),
+    count_mode: str = Query("exact", pattern="^(exact|approx|none)$"),
+    fields: Optional[str] = Query(None, description="Comma-separated job fields to return; defaults to the job card fields"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Search and filter jobs with pagination"""
-    # Include both "active" and "open" status for backward compatibility
-    query = db.query(models.Job).filter(models.Job.status.in_(["active", "open"]))
-    
-    if keyword:
-        keyword_filter = or_(
-            models.Job.job_title.ilike(f"%{keyword}%"),
-            models.Job.company_name.ilike(f"%{keyword}%"),
-            models.Job.jd_text.ilike(f"%{keyword}%"),
-            models.Job.industry.ilike(f"%{keyword}%")
+    try:
+        # The search is built with the sync Query API; run_sync runs it on the async connection
+        result = await db.run_sync(
+            job_search.search_jobs,
+            keyword=keyword,
+            location_city=location_city,
+            location_country=location_country,
+            remote_only=remote_only,
+            experience_level=experience_level,
+            job_type=job_type,
+            work_type=work_type,
+            min_salary=min_salary,
+            max_salary=max_salary,
+            industry=industry,
+            skills_required=skills_required,
+            skills_match=skills_match,
+            posted_within=posted_within,
+            sort_by=sort_by,
+            skip=skip,
+            limit=limit,
+            include_skill_facets=include_skill_facets,
+            cursor=cursor,
+            count_mode=count_mode,
+            fields=job_search.parse_fields(fields)
         )
-        query = query.filter(keyword_filter)
-    
-    if location_city:
-        query = query.filter(models.Job.location_city.ilike(f"%{location_city}%"))
-    if location_country:
-        query = query.filter(models.Job.location_country.ilike(f"%{location_country}%"))
-    if remote_only:
-        query = query.filter(models.Job.is_remote == True)
-    
-    if experience_level:
-        levels = [l.strip() for l in experience_level.split(",")]
-        query = query.filter(models.Job.experience_level.in_(levels))
-    
-    if job_type:
-        types = [t.strip() for t in job_type.split(",")]
-        query = query.filter(models.Job.job_type.in_(types))
-    
-    if work_type:
-        types = [t.strip() for t in work_type.split(",")]
-        query = query.filter(models.Job.work_type.in_(types))
-    
-    if min_salary:
-        query = query.filter(
-            or_(
-                models.Job.max_salary >= min_salary,
-                models.Job.min_salary >= min_salary
-            )
-        )
-    if max_salary:
-        query = query.filter(
-            or_(
-                models.Job.min_salary <= max_salary,
-                models.Job.max_salary <= max_salary
-            )
-        )
-    
-    if industry:
-        industries = [i.strip() for i in industry.split(",")]
-        query = query.filter(models.Job.industry.in_(industries))
-    
-    if skills_required:
-        skills = [s.strip().lower() for s in skills_required.split(",")]
-        for skill in skills:
-            query = query.filter(
-                func.lower(func.cast(models.Job.skills_required, String)).contains(skill)
-            )
-    
-    if posted_within and posted_within != "any":
-        days = int(posted_within)
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(models.Job.created_at >= cutoff_date)
-    
-    if sort_by == "salary_high":
-        query = query.order_by(models.Job.max_salary.desc().nulls_last())
-    elif sort_by == "relevance":
-        query = query.order_by(models.Job.created_at.desc())
-    else:
-        query = query.order_by(models.Job.created_at.desc())
-    
-    total = query.count()
-    jobs = query.offset(skip).limit(limit).all()
-    
-    # Convert to response format - handle both old and new job formats
-    jobs_list = []
-    for job in jobs:
-        # Ensure we have job_title (use title as fallback for old jobs)
-        if not job.job_title and job.title:
-            job.job_title = job.title
-        if not job.jd_text and job.description:
-            job.jd_text = job.description
-        if not job.company_name:
-            job.company_name = "Company Not Specified"
-        
-        jobs_list.append(job)
-    
-    return {
-        "jobs": jobs_list,
-        "total": total,
+    except (job_search.InvalidCursor, job_search.InvalidFields) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {
+        "jobs": result["jobs"],
+        "total": result["total"],
+        "total_relation": result["total_relation"],
         "skip": skip,
         "limit": limit,
-        "has_more": (skip + limit) < total
+        "has_more": result["has_more"],
+        "next_cursor": result["next_cursor"]
     }
+    if include_skill_facets:
+        response["skill_facets"] = result["skill_facets"]
+    return response
+
+
+@router.get("/facets")
+def get_job_facets(
+    keyword: Optional[str] = Query(None),
+    location_city: Optional[str] = Query(None),
+    location_country: Optional[str] = Query(None),
+    remote_only: Optional[bool] = Query(None),
+    experience_level: Optional[str] = Query(None),
+    job_type: Optional[str] = Query(None),
+    work_type: Optional[str] = Query(None),
+    min_salary: Optional[int] = Query(None),
+    max_salary: Optional[int] = Query(None),
+    industry: Optional[str] = Query(None),
+    skills_required: Optional[str] = Query(None),
+    skills_match: str = Query("all", pattern="^(all|any)$"),
+    posted_within: Optional[str] = Query("any"),
+    db: Session = Depends(get_read_db)
+):
+    """Job counts per experience level, job type, work type, industry, remote flag, salary band and skill"""
+    return job_search.facet_counts(
+        db,
+        keyword=keyword,
+        location_city=location_city,
+        location_country=location_country,
+        remote_only=remote_only,
+        experience_level=experience_level,
+        job_type=job_type,
+        work_type=work_type,
+        min_salary=min_salary,
+        max_salary=max_salary,
+        industry=industry,
+        skills_required=skills_required,
+        skills_match=skills_match,
+        posted_within=posted_within
+    )
+
+
+@router.get("/locations/autocomplete")
+def autocomplete_locations(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """City and country suggestions for the location filters (served from memory)"""
+    return {"suggestions": locations.autocomplete(q, limit)}
 
 
 @router.get("/{job_id}", response_model=schemas.JobResponseEnhanced)
-def get_job_by_id(job_id: int, db: Session = Depends(get_db)):
+async def get_job_by_id(
+    job_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated job fields to return; defaults to all"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Get a single job by ID"""
-    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    query = select(models.Job).where(models.Job.id == job_id)
+    if fields:
+        try:
+            fields = job_search.parse_fields(fields)
+        except job_search.InvalidFields as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.options(job_search.load_fields(fields))
+    job = (await db.execute(query)).scalars().first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
+    if fields:
+        # Partial job: bypass the full response model
+        return JSONResponse(jsonable_encoder(job_search.job_to_dict(job, fields)))
     return job
 
 
 @router.post("/{job_id}/generate-roadmap")
 def generate_job_roadmap_endpoint(
     job_id: int,
-    current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter),
+    current_recruiter: auth.Principal = Depends(auth.get_current_recruiter),
     db: Session = Depends(get_db)
 ):
     """Generate AI roadmap for a job (recruiter can generate template roadmap)"""
@@ -210,28 +255,22 @@ def generate_job_roadmap_endpoint(
     }
     
     # Convert job to dict format
-    job_dict = {
-        "id": job.id,
-        "job_title": job.job_title or job.title,
-        "company_name": job.company_name,
-        "jd_text": job.jd_text or job.description or "",
-        "location_city": job.location_city,
-        "location_country": job.location_country,
-        "work_type": job.work_type,
-        "job_type": job.job_type,
-        "experience_level": job.experience_level,
-        "min_experience_years": job.min_experience_years,
-        "max_experience_years": job.max_experience_years,
-        "skills_required": job.skills_required if isinstance(job.skills_required, list) else [],
-        "nice_to_have_skills": job.nice_to_have_skills if isinstance(job.nice_to_have_skills, list) else [],
-        "industry": job.industry,
-    }
+    job_dict = _job_to_roadmap_dict(job)
     
     result = generate_job_roadmap(job_dict, generic_user)
     
     if result.get("error"):
         raise HTTPException(status_code=503, detail=result["error"])
     
+    # A degraded (locally built) roadmap must not replace the saved template
+    if result.get("degraded"):
+        return {
+            "job_id": job_id,
+            "roadmap": result.get("roadmap"),
+            "degraded": True,
+            "message": "AI roadmap generation is temporarily unavailable. Showing a basic roadmap."
+        }
+    
     # Save roadmap to job
     job.roadmap_json = result.get("roadmap")
     db.commit()
@@ -246,7 +285,7 @@ def generate_job_roadmap_endpoint(
 @router.post("/{job_id}/generate-roadmap-for-user")
 def generate_job_roadmap_for_user(
     job_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Generate personalized AI roadmap for a specific job and user"""
@@ -260,42 +299,10 @@ def generate_job_roadmap_for_user(
         raise HTTPException(status_code=404, detail="User profile not found. Please complete your profile first.")
     
     # Prepare user profile data
-    all_skills = (profile.skills or []) + (profile.extracted_skills or [])
-    # Separate technical and soft skills (basic heuristic)
-    technical_skills = [s for s in all_skills if any(tech in s.lower() for tech in ['python', 'java', 'react', 'node', 'sql', 'aws', 'docker', 'javascript', 'html', 'css', 'api', 'database', 'cloud', 'ml', 'ai'])]
-    soft_skills = [s for s in all_skills if s not in technical_skills]
-    
-    user_profile = {
-        "name": current_user.full_name,
-        "degree": profile.degree or "N/A",
-        "cgpa_10th": profile.cgpa_10th,
-        "cgpa_12th": profile.cgpa_12th,
-        "experience_years": 0,  # Could be calculated from profile if available
-        "current_role": "Student",
-        "technical_skills": technical_skills,
-        "soft_skills": soft_skills,
-        "certifications": profile.certifications or [],
-        "achievements": profile.achievements or [],
-        "target_career": job.job_title or "Software Engineer"
-    }
+    user_profile = _user_roadmap_profile(current_user, profile, job)
     
     # Convert job to dict format
-    job_dict = {
-        "id": job.id,
-        "job_title": job.job_title or job.title,
-        "company_name": job.company_name,
-        "jd_text": job.jd_text or job.description or "",
-        "location_city": job.location_city,
-        "location_country": job.location_country,
-        "work_type": job.work_type,
-        "job_type": job.job_type,
-        "experience_level": job.experience_level,
-        "min_experience_years": job.min_experience_years,
-        "max_experience_years": job.max_experience_years,
-        "skills_required": job.skills_required if isinstance(job.skills_required, list) else [],
-        "nice_to_have_skills": job.nice_to_have_skills if isinstance(job.nice_to_have_skills, list) else [],
-        "industry": job.industry,
-    }
+    job_dict = _job_to_roadmap_dict(job)
     
     # Generate roadmap
     result = generate_job_roadmap(job_dict, user_profile)
@@ -305,8 +312,40 @@ def generate_job_roadmap_for_user(
     
     return {
         "job_id": job_id,
-        "job_title": job.job_title or job.title,
+        "job_title": job.job_title,
         "roadmap": result.get("roadmap"),
+        "degraded": result.get("degraded", False),
         "message": "Personalized roadmap generated successfully"
     }
 
+
+@router.post("/{job_id}/generate-roadmap-for-user/stream")
+def stream_job_roadmap_for_user(
+    job_id: int,
+    current_user: auth.Principal = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a personalized AI roadmap as newline-delimited JSON.
+    
+    Each line is one event: role_summary, gap_analysis and every roadmap phase
+    are sent as soon as they are complete, followed by a final "complete"
+    event carrying the full (or, if the AI response was cut off, salvaged)
+    roadmap, or an "error" event.
+    """
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
+    if not profile:
+        raise HTTPException(status_code=404, detail="User profile not found. Please complete your profile first.")
+    
+    job_dict = _job_to_roadmap_dict(job)
+    user_profile = _user_roadmap_profile(current_user, profile, job)
+    
+    def event_stream():
+        for event in stream_job_roadmap(job_dict, user_profile):
+            yield json.dumps({"job_id": job_id, **event}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
@@ -0,0 +1,577 @@
+"""
+Job search
+Shared filter/sort logic behind /api/jobs/search, plus the full-text index
+used for keyword search:
+
+- SQLite: an FTS5 table (jobs_fts) over job_title, company_name, jd_text
+  and industry, kept in sync with the jobs table by triggers
+- PostgreSQL: a generated tsvector column (jobs.search_vector) with a GIN index
+
+Keywords are matched by word prefix ("pyth" finds "Python") and
+sort_by=relevance orders by BM25 (ts_rank_cd on PostgreSQL). Without a
+full-text index the search falls back to ILIKE matching.
+"""
+import base64
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, and_, case, func, tuple_, literal, bindparam, Integer, Float, text, literal_column
+from sqlalchemy.orm import load_only
+
+from app import models, job_skills, cache, locations, database
+
+ACTIVE_STATUSES = list(models.ACTIVE_JOB_STATUSES)
+MATCHABLE_STATUSES = ACTIVE_STATUSES + [models.CATALOGUE_JOB_STATUS]
+
+# Column weights for ranking: title matters most, then company/industry, then the description
+FTS_COLUMNS = ("job_title", "company_name", "jd_text", "industry")
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 3.0)
+
+# Jobs without a salary sort last; matches the idx_jobs_active_salary_annual expression index
+SALARY_SORT_KEY = models.SALARY_SORT_KEY
+
+# Filters given as comma-separated lists
+LIST_FILTERS = ("experience_level", "job_type", "work_type", "industry", "skills_required")
+
+# Search totals are cached per normalized filter set and cleared on job writes
+count_cache = cache.TTLCache(
+    "job_search_counts",
+    ttl=float(os.getenv("JOB_COUNT_CACHE_TTL_SECONDS", "30")),
+    maxsize=int(os.getenv("JOB_COUNT_CACHE_SIZE", "1024")),
+)
+cache.invalidate_on_commit(count_cache, models.Job, models.JobSkill)
+
+facet_cache = cache.TTLCache(
+    "job_search_facets",
+    ttl=float(os.getenv("JOB_FACET_CACHE_TTL_SECONDS", "60")),
+    maxsize=int(os.getenv("JOB_COUNT_CACHE_SIZE", "1024")),
+)
+cache.invalidate_on_commit(facet_cache, models.Job, models.JobSkill)
+
+# (band, lower bound inclusive, upper bound exclusive) on the top of the annual INR salary range
+SALARY_BANDS = [
+    ("under_5l", 0, 500000),
+    ("5l_10l", 500000, 1000000),
+    ("10l_20l", 1000000, 2000000),
+    ("20l_plus", 2000000, None),
+]
+
+# Columns behind a job board card. jd_text and roadmap_json are not loaded:
+# description holds the first 500 characters of jd_text for the excerpt.
+LIST_FIELDS = (
+    "id", "job_title", "company_name", "location_city", "location_country", "location",
+    "location_city_id", "location_country_code", "is_remote", "work_type", "job_type",
+    "experience_level", "min_salary", "max_salary", "salary_currency", "salary_pay_period",
+    "is_salary_visible", "salary", "industry", "skills_required", "description", "status",
+    "created_at",
+)
+
+# Columns of schemas.JobResponse (/api/jobs, /api/recruiter/jobs)
+LEGACY_LIST_FIELDS = (
+    "id", "recruiter_id", "title", "description", "skills_required", "location",
+    "salary", "industry", "status", "created_at",
+)
+
+# Columns read by ml_service.match_jobs_from_database
+MATCH_FIELDS = (
+    "id", "job_title", "company_name", "jd_text", "skills_required", "nice_to_have_skills",
+    "industry", "location_city", "location_country", "is_remote", "work_type", "job_type",
+    "experience_level", "min_salary", "max_salary", "salary_currency", "salary",
+)
+
+# Any column can be asked for with fields=
+JOB_FIELDS = tuple(column.key for column in models.Job.__table__.columns)
+
+# count_mode=approx stops counting here and reports "at least" this many
+APPROX_COUNT_LIMIT = int(os.getenv("JOB_APPROX_COUNT_LIMIT", "1000"))
+
+_fts_dialect = None
+
+
+class InvalidCursor(ValueError):
+    """Raised for a malformed cursor or one issued for a different sort order"""
+
+
+class InvalidFields(ValueError):
+    """Raised for a fields= parameter naming unknown job fields"""
+
+
+def create_full_text_index(conn):
+    """Create the full-text index if the database supports it (run by the schema migrations)"""
+    if conn.dialect.name == "sqlite":
+        _setup_sqlite_fts(conn)
+    elif conn.dialect.name == "postgresql":
+        _setup_postgres_fts(conn)
+
+
+def detect_full_text_search(engine):
+    """Use the full-text index for keyword search if the migrations have created it"""
+    global _fts_dialect
+    try:
+        with engine.connect() as conn:
+            if engine.dialect.name == "sqlite":
+                found = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+                )).first()
+            elif engine.dialect.name == "postgresql":
+                found = conn.execute(text(
+                    "SELECT 1 FROM information_schema.columns "
+                    "WHERE table_name = 'jobs' AND column_name = 'search_vector'"
+                )).first()
+            else:
+                found = None
+    except Exception as e:
+        print(f"Warning: Could not check for the full-text index: {e}")
+        found = None
+    _fts_dialect = engine.dialect.name if found else None
+    if not found:
+        print("Warning: Full-text search unavailable, falling back to ILIKE")
+
+
+def _setup_sqlite_fts(conn):
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+    )).first()
+
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+        f"{columns}, content='jobs', content_rowid='id', "
+        f"tokenize='porter unicode61', prefix='2 3')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN "
+        f"INSERT INTO jobs_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN "
+        f"INSERT INTO jobs_fts(jobs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF {columns} ON jobs BEGIN "
+        f"INSERT INTO jobs_fts(jobs_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO jobs_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+
+    if not exists:
+        # Index the jobs that existed before the table was created
+        conn.execute(text("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')"))
+        print("✓ Created jobs_fts full-text index")
+
+
+def _setup_postgres_fts(conn):
+    conn.execute(text(
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(job_title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(company_name, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(industry, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(jd_text, '')), 'C')"
+        ") STORED"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN (search_vector)"
+    ))
+
+
+def active_jobs_filter():
+    """
+    Condition for jobs listed on the job board.
+
+    The statuses are rendered as literals rather than bound parameters so
+    SQLite can match the partial indexes declared on Job (WHERE status IN
+    ('active', 'open')).
+    """
+    return models.Job.status.in_(
+        bindparam("active_statuses", ACTIVE_STATUSES, expanding=True, literal_execute=True)
+    )
+
+
+def matchable_jobs_filter():
+    """Condition for jobs offered by job matching: the job board's plus the catalogue (job corpus)"""
+    return models.Job.status.in_(
+        bindparam("matchable_statuses", MATCHABLE_STATUSES, expanding=True, literal_execute=True)
+    )
+
+
+def keyword_terms(keyword):
+    """Split a keyword string into search terms"""
+    return re.findall(r"\w+", (keyword or "").lower())
+
+
+def _apply_keyword(query, keyword):
+    """Filter by keyword. Returns (query, rank, descending) where rank orders matches by relevance, or None."""
+    terms = keyword_terms(keyword)
+
+    if _fts_dialect == "sqlite" and terms:
+        match = " ".join(f'"{term}"*' for term in terms)
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        matches = (
+            text(f"SELECT rowid AS job_id, bm25(jobs_fts, {weights}) AS rank FROM jobs_fts WHERE jobs_fts MATCH :fts_match")
+            .bindparams(fts_match=match)
+            .columns(job_id=Integer, rank=Float)
+            .subquery("fts")
+        )
+        query = query.join(matches, matches.c.job_id == models.Job.id)
+        # bm25() is lower for better matches
+        return query, matches.c.rank, False
+
+    if _fts_dialect == "postgresql" and terms:
+        ts_query = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        search_vector = literal_column("jobs.search_vector")
+        query = query.filter(search_vector.op("@@")(ts_query))
+        return query, func.ts_rank_cd(search_vector, ts_query), True
+
+    query = query.filter(or_(
+        models.Job.job_title.ilike(f"%{keyword}%"),
+        models.Job.company_name.ilike(f"%{keyword}%"),
+        models.Job.jd_text.ilike(f"%{keyword}%"),
+        models.Job.industry.ilike(f"%{keyword}%")
+    ))
+    return query, None, False
+
+
+def _split(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def build_search_query(
+    db,
+    keyword=None,
+    location_city=None,
+    location_country=None,
+    remote_only=None,
+    experience_level=None,
+    job_type=None,
+    work_type=None,
+    min_salary=None,
+    max_salary=None,
+    industry=None,
+    skills_required=None,
+    skills_match="all",
+    posted_within="any",
+    sort_by="newest",
+):
+    """
+    Build the filtered job query for the search parameters.
+
+    Returns (query, sort_keys): the query is already ordered by sort_keys, a
+    list of (expression, descending) ending with Job.id so every sort order
+    is total and can be paginated with a cursor.
+    """
+    # Include both "active" and "open" status for backward compatibility
+    query = db.query(models.Job).filter(active_jobs_filter())
+
+    rank, rank_descending = None, False
+    if keyword:
+        query, rank, rank_descending = _apply_keyword(query, keyword)
+
+    if location_city or location_country:
+        # Matched the same way jobs are normalized on write (see app/locations.py)
+        place = locations.normalize_location(location_city, location_country)
+        if place.city_id:
+            query = query.filter(models.Job.location_city_id == place.city_id)
+        if place.country_code and (location_country or not place.city_id):
+            # A gazetteer city id already implies its country
+            query = query.filter(models.Job.location_country_code == place.country_code)
+        elif location_country and not place.country_code:
+            # Not in the gazetteer: the posted country name, ignoring case
+            query = query.filter(
+                models.Job.location_country_code.is_(None),
+                func.lower(models.Job.location_country) == location_country.strip().lower(),
+            )
+    if remote_only:
+        query = query.filter(models.Job.is_remote == True)
+
+    if experience_level:
+        query = query.filter(models.Job.experience_level.in_(_split(experience_level)))
+    if job_type:
+        query = query.filter(models.Job.job_type.in_(_split(job_type)))
+    if work_type:
+        query = query.filter(models.Job.work_type.in_(_split(work_type)))
+
+    # Salary filters are annual INR, compared with each job's normalized range
+    if min_salary:
+        # The top of the range reaches min_salary
+        query = query.filter(SALARY_SORT_KEY >= min_salary)
+    if max_salary:
+        # The bottom of the range is within max_salary
+        query = query.filter(models.Job.salary_annual_min_normalized <= max_salary)
+
+    if industry:
+        query = query.filter(models.Job.industry.in_(_split(industry)))
+
+    if skills_required:
+        skills = _split(skills_required)
+        if skills:
+            query = query.filter(job_skills.skills_filter(skills, skills_match))
+
+    if posted_within and posted_within != "any":
+        cutoff_date = datetime.utcnow() - timedelta(days=int(posted_within))
+        query = query.filter(models.Job.created_at >= cutoff_date)
+
+    if sort_by == "salary_high":
+        sort_keys = [(SALARY_SORT_KEY, True)]
+    elif sort_by == "relevance" and rank is not None:
+        sort_keys = [(rank, rank_descending), (models.Job.created_at, True)]
+    else:
+        sort_keys = [(models.Job.created_at, True)]
+    sort_keys.append((models.Job.id, True))
+
+    return query.order_by(*[e.desc() if d else e.asc() for e, d in sort_keys]), sort_keys
+
+
+def _keyset_condition(sort_keys, values):
+    """Rows strictly after values in the sort_keys ordering"""
+    first, descending = sort_keys[0]
+    # Bounding the leading key on its own lets the database seek into the index
+    # (SQLite does not seek on row values over expression indexes)
+    leading = first <= values[0] if descending else first >= values[0]
+
+    if len({d for _, d in sort_keys}) == 1:
+        columns = tuple_(*[expression for expression, _ in sort_keys])
+        bound = tuple_(*[literal(v, type_=e.type) for (e, _), v in zip(sort_keys, values)])
+        return and_(leading, columns < bound if descending else columns > bound)
+    return and_(leading, _after(sort_keys, values))
+
+
+def _after(sort_keys, values):
+    (expression, descending), rest = sort_keys[0], sort_keys[1:]
+    beyond = expression < values[0] if descending else expression > values[0]
+    if not rest:
+        return beyond
+    return or_(beyond, and_(expression == values[0], _after(rest, values[1:])))
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort_by, values):
+    """Opaque cursor for the row with the given sort key values"""
+    payload = json.dumps({"s": sort_by, "v": [_encode_value(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_by, key_count):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["v"]]
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if payload.get("s") != sort_by or len(values) != key_count:
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    return values
+
+
+def fetch_page(query, sort_keys, sort_by, limit, skip=0, cursor=None, with_total=False):
+    """
+    Fetch one page of an ordered job query.
+
+    With a cursor the page starts right after the cursor's row (keyset
+    pagination, skip is ignored); otherwise skip rows are skipped. Returns
+    (jobs, next_cursor, has_more, total); next_cursor is None on the last page.
+    With with_total the total number of matches is computed by a window
+    function in the same query; total is None otherwise, or when the page
+    is empty.
+    """
+    if cursor:
+        query = query.filter(_keyset_condition(sort_keys, decode_cursor(cursor, sort_by, len(sort_keys))))
+        skip = 0
+
+    # Fetch the sort key values with each row so the cursor needs no extra query
+    extra = [expression.label(f"sort_key_{i}") for i, (expression, _) in enumerate(sort_keys[:-1])]
+    if with_total:
+        extra.append(func.count().over().label("total_count"))
+    rows = query.add_columns(*extra).offset(skip).limit(limit + 1).all()
+
+    total = rows[0][-1] if with_total and rows else None
+    key_count = len(sort_keys) - 1
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    jobs = [row[0] for row in rows]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = encode_cursor(sort_by, list(last[1:1 + key_count]) + [last[0].id])
+    return jobs, next_cursor, has_more, total
+
+
+def filter_cache_key(filters):
+    """Normalized filter set: equivalent searches share one cached count"""
+    key = []
+    for name, value in sorted(filters.items()):
+        if name == "sort_by" or value is None or value == "" or (name == "posted_within" and value == "any"):
+            continue
+        if name == "skills_match" and not filters.get("skills_required"):
+            continue
+        if isinstance(value, str):
+            value = value.lower() if name != "posted_within" else value
+            if name in LIST_FILTERS:
+                value = ",".join(sorted(set(_split(value))))
+            else:
+                value = " ".join(value.split())
+        key.append((name, value))
+    return tuple(key)
+
+
+def parse_fields(fields, default=LIST_FIELDS):
+    """Job columns for a comma-separated fields= parameter (id is always included)"""
+    if not fields:
+        return default
+    names = _split(fields)
+    unknown = [name for name in names if name not in JOB_FIELDS]
+    if unknown:
+        raise InvalidFields(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(dict.fromkeys(["id"] + names))
+
+
+def load_fields(fields):
+    """Loader option that only loads fields; touching any other column raises instead of lazy loading"""
+    return load_only(*[getattr(models.Job, name) for name in fields], raiseload=True)
+
+
+def job_to_dict(job, fields):
+    return {name: getattr(job, name) for name in fields}
+
+
+def _approximate_count(query):
+    """Count matches up to APPROX_COUNT_LIMIT. Returns (count, exact)."""
+    capped = query.with_entities(models.Job.id).order_by(None).limit(APPROX_COUNT_LIMIT + 1).subquery()
+    count = query.session.query(func.count()).select_from(capped).scalar()
+    if count > APPROX_COUNT_LIMIT:
+        return APPROX_COUNT_LIMIT, False
+    return count, True
+
+
+def search_jobs(db, skip=0, limit=20, cursor=None, count_mode="exact", include_skill_facets=False,
+                fields=LIST_FIELDS, **filters):
+    """
+    Run a job search.
+
+    Returns {"jobs", "total", "total_relation", "next_cursor", "has_more"},
+    plus "skill_facets" (most common required skills among all matches)
+    when include_skill_facets is set. Jobs are dicts of the given fields;
+    only those columns are read. Raises InvalidCursor for a bad cursor.
+
+    count_mode:
+        "exact"  - exact total ("total_relation": "eq"), cached per filter set
+                   and computed in the page query when not cached
+        "approx" - counts at most APPROX_COUNT_LIMIT matches; beyond that the
+                   total is reported as "at least" ("total_relation": "gte")
+        "none"   - no count ("total": None); use has_more / next_cursor
+    """
+    sort_by = filters.get("sort_by") or "newest"
+    query, sort_keys = build_search_query(db, **filters)
+
+    cache_key = filter_cache_key(filters)
+    generation = count_cache.generation
+    total = count_cache.get(cache_key) if count_mode != "none" else None
+    relation = "eq" if total is not None else None
+
+    jobs, next_cursor, has_more, window_total = fetch_page(
+        query.options(load_fields(fields)), sort_keys, sort_by, limit, skip=skip, cursor=cursor,
+        with_total=count_mode == "exact" and total is None and not cursor
+    )
+
+    if total is None and count_mode == "exact":
+        total = window_total if window_total is not None else query.count()
+        relation = "eq"
+        if not database.served_by_replica(db):
+            count_cache.set(cache_key, total, generation)
+    elif total is None and count_mode == "approx":
+        total, exact = _approximate_count(query)
+        relation = "eq" if exact else "gte"
+        if exact and not database.served_by_replica(db):
+            count_cache.set(cache_key, total, generation)
+
+    result = {
+        "total": total,
+        "total_relation": relation,
+        "jobs": [job_to_dict(job, fields) for job in jobs],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+    if include_skill_facets:
+        result["skill_facets"] = job_skills.skill_facets(db, query)
+    return result
+
+
+def _salary_band_expression():
+    salary = models.Job.salary_annual_max_normalized
+    whens = []
+    for band, low, high in SALARY_BANDS:
+        condition = salary >= low if high is None else and_(salary >= low, salary < high)
+        whens.append((condition, band))
+    return case(*whens, else_="not_disclosed")
+
+
+def facet_counts(db, **filters):
+    """
+    Job counts per facet value for the jobs matching filters:
+        {"experience_level": {"fresher": 3, ...}, "job_type": {...}, "work_type": {...},
+         "industry": {...}, "is_remote": {"true": 1, "false": 2}, "salary_band": {...},
+         "skills": [{"skill", "count"}, ...], "total": N}
+
+    All scalar facets come from one GROUP BY over their combinations.
+    Results are cached per filter set and cleared on job writes (only when
+    read from the primary, see database.served_by_replica).
+    """
+    filters.pop("sort_by", None)
+    cache_key = filter_cache_key(filters)
+    generation = facet_cache.generation
+    cached = facet_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query, _ = build_search_query(db, **filters)
+    dimensions = {
+        "experience_level": models.Job.experience_level,
+        "job_type": models.Job.job_type,
+        "work_type": models.Job.work_type,
+        "industry": models.Job.industry,
+        "is_remote": models.Job.is_remote,
+        "salary_band": _salary_band_expression(),
+    }
+    labeled = [expression.label(name) for name, expression in dimensions.items()]
+    rows = (
+        query.order_by(None)
+        .with_entities(*labeled, func.count().label("count"))
+        .group_by(*labeled)
+        .all()
+    )
+
+    facets = {name: {} for name in dimensions}
+    total = 0
+    for row in rows:
+        count = row[-1]
+        total += count
+        for name, value in zip(dimensions, row[:-1]):
+            if name == "is_remote":
+                value = "true" if value else "false"
+            elif value is None or value == "":
+                value = "unspecified"
+            facets[name][value] = facets[name].get(value, 0) + count
+
+    for name in dimensions:
+        facets[name] = dict(sorted(facets[name].items(), key=lambda item: (-item[1], item[0])))
+    facets["skills"] = job_skills.skill_facets(db, query)
+    facets["total"] = total
+
+    if not database.served_by_replica(db):
+        facet_cache.set(cache_key, facets, generation)
+        count_cache.set(cache_key, total, generation)
+    return facets
@@ -0,0 +1,149 @@
+"""
+Job skill index
+Keeps the normalized skills / job_skills tables in step with
+Job.skills_required so skill filters are indexed joins on skill id
+instead of LIKE scans over the JSON text, and exact ("java" no longer
+matches "javascript").
+
+Call sync_job_skills(db, job) wherever skills_required is written;
+backfill_job_skills() indexes existing jobs (run by the schema migrations).
+"""
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+
+from app import models
+
+
+def normalize_skill(name):
+    return " ".join(str(name).split()).lower()
+
+
+def _required_skills(job):
+    """Normalized name -> display name for a job's required skills"""
+    return _skill_names(job.skills_required)
+
+
+def _skill_names(skills):
+    skills = skills or []
+    if isinstance(skills, str):
+        # Very old rows stored a comma-separated string
+        skills = skills.split(",")
+    names = {}
+    for skill in skills:
+        normalized = normalize_skill(skill)
+        if normalized and normalized not in names:
+            names[normalized] = " ".join(str(skill).split())
+    return names
+
+
+def get_or_create_skills(db, names):
+    """Return {normalized name: skill id} for names ({normalized: display}), creating missing skills"""
+    if not names:
+        return {}
+    ids = dict(
+        db.query(models.Skill.name, models.Skill.id)
+        .filter(models.Skill.name.in_(list(names)))
+        .all()
+    )
+    for name, display_name in names.items():
+        if name in ids:
+            continue
+        try:
+            with db.begin_nested():
+                skill = models.Skill(name=name, display_name=display_name)
+                db.add(skill)
+            ids[name] = skill.id
+        except IntegrityError:
+            # Created concurrently by another request
+            ids[name] = db.query(models.Skill.id).filter(models.Skill.name == name).scalar()
+    return ids
+
+
+def sync_job_skills(db, job):
+    """Make job_skills match job.skills_required. The job must have been flushed (has an id)."""
+    wanted = set(get_or_create_skills(db, _required_skills(job)).values())
+    current = {
+        skill_id for (skill_id,) in
+        db.query(models.JobSkill.skill_id).filter(models.JobSkill.job_id == job.id).all()
+    }
+
+    removed = current - wanted
+    if removed:
+        db.query(models.JobSkill).filter(
+            models.JobSkill.job_id == job.id,
+            models.JobSkill.skill_id.in_(removed)
+        ).delete(synchronize_session=False)
+    for skill_id in wanted - current:
+        db.add(models.JobSkill(job_id=job.id, skill_id=skill_id))
+
+
+def add_job_skills(db, jobs):
+    """Index the skills of newly inserted jobs in bulk; jobs is [(job id, skills_required)]"""
+    names_by_job = [(job_id, _skill_names(skills)) for job_id, skills in jobs]
+    names = {}
+    for _, job_names in names_by_job:
+        for name, display_name in job_names.items():
+            names.setdefault(name, display_name)
+    ids = get_or_create_skills(db, names)
+    rows = [{"job_id": job_id, "skill_id": ids[name]} for job_id, job_names in names_by_job for name in job_names]
+    if rows:
+        db.execute(insert(models.JobSkill), rows)
+
+
+def backfill_job_skills(db, batch_size=500):
+    """Index the skills of every job, committing in batches. Returns the number of jobs processed."""
+    processed = 0
+    last_id = 0
+    while True:
+        jobs = (
+            db.query(models.Job)
+            # Only the columns used here: this also runs from migration 3, before later columns exist
+            .options(load_only(models.Job.id, models.Job.skills_required))
+            .filter(models.Job.id > last_id)
+            .order_by(models.Job.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not jobs:
+            break
+        last_id = jobs[-1].id
+        for job in jobs:
+            sync_job_skills(db, job)
+        db.commit()
+        processed += len(jobs)
+    return processed
+
+
+def skills_filter(skills, match="all"):
+    """
+    SQL condition on Job.id for jobs requiring the given skills.
+
+    match="all" requires every skill, match="any" at least one.
+    """
+    names = list({normalize_skill(s) for s in skills if normalize_skill(s)})
+    job_ids = (
+        select(models.JobSkill.job_id)
+        .join(models.Skill, models.Skill.id == models.JobSkill.skill_id)
+        .where(models.Skill.name.in_(names))
+    )
+    if match == "all" and len(names) > 1:
+        job_ids = job_ids.group_by(models.JobSkill.job_id).having(
+            func.count(models.JobSkill.skill_id) == len(names)
+        )
+    return models.Job.id.in_(job_ids)
+
+
+def skill_facets(db, job_query, limit=20):
+    """Most common required skills among the jobs matched by job_query: [{"skill", "count"}, ...]"""
+    job_ids = job_query.with_entities(models.Job.id).order_by(None).subquery()
+    rows = (
+        db.query(models.Skill.display_name, func.count(models.JobSkill.job_id).label("count"))
+        .join(models.JobSkill, models.JobSkill.skill_id == models.Skill.id)
+        .join(job_ids, job_ids.c.id == models.JobSkill.job_id)
+        .group_by(models.Skill.id, models.Skill.display_name)
+        .order_by(func.count(models.JobSkill.job_id).desc(), models.Skill.display_name)
+        .limit(limit)
+        .all()
+    )
+    return [{"skill": name, "count": count} for name, count in rows]
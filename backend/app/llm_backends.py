@@ -0,0 +1,393 @@
+"""
+Pluggable LLM backends
+The AI services talk to whatever backend is installed here instead of
+configuring Gemini at import time:
+
+- GeminiBackend: the real Gemini API (optionally pointed at a stand-in
+  server through GEMINI_API_ENDPOINT)
+- FakeBackend: in-process canned responses with configurable latency,
+  error rate and streaming, for offline load and timeout testing
+
+The backend is chosen with LLM_BACKEND=gemini|fake and can be swapped at
+runtime with set_backend().
+"""
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+class LLMResponse:
+    """Text returned by a backend (a whole response or one streamed chunk)"""
+
+    def __init__(self, text, prompt_tokens=None, response_tokens=None):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.response_tokens = response_tokens
+
+
+class LLMBackend:
+    """Interface every backend implements"""
+
+    name = "base"
+
+    @property
+    def available(self):
+        return True
+
+    def generate(self, prompt, temperature, timeout, stream=False, on_retry=None):
+        """
+        Return an LLMResponse, or an iterator of LLMResponse chunks when stream=True.
+        on_retry(exception) is called before each retry the backend makes.
+        """
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the google-generativeai SDK, configured on first use"""
+
+    name = "gemini"
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL, api_endpoint=None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.api_endpoint = api_endpoint
+        self._model = None
+        self._init_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return bool(self.api_key) and self._get_model() is not None
+
+    def _get_model(self):
+        if self._model is not None or self._init_error is not None:
+            return self._model
+        with self._lock:
+            if self._model is None and self._init_error is None:
+                try:
+                    import google.generativeai as genai
+
+                    options = {"api_key": self.api_key}
+                    if self.api_endpoint:
+                        # Stand-in servers speak the REST protocol
+                        options["transport"] = "rest"
+                        options["client_options"] = {"api_endpoint": self.api_endpoint}
+                    genai.configure(**options)
+                    self._model = genai.GenerativeModel(self.model_name)
+                    print(f"Gemini API initialized successfully ({self.api_endpoint or 'default endpoint'})")
+                except Exception as e:
+                    print(f"Warning: Failed to initialize Gemini API: {e}")
+                    self._init_error = e
+        return self._model
+
+    def _request_options(self, timeout, on_retry=None):
+        from google.api_core import exceptions as core_exceptions
+        from google.api_core import retry as retries
+
+        # Retry transient 503s only, and never beyond the call's own deadline
+        retry = retries.Retry(
+            predicate=retries.if_exception_type(core_exceptions.ServiceUnavailable),
+            initial=0.5,
+            maximum=2.0,
+            multiplier=2.0,
+            timeout=timeout,
+            on_error=on_retry,
+        )
+        return {"timeout": timeout, "retry": retry}
+
+    def generate(self, prompt, temperature, timeout, stream=False, on_retry=None):
+        import google.generativeai as genai
+
+        model = self._get_model() if self.api_key else None
+        if model is None:
+            raise RuntimeError("Gemini API not configured. Please set GEMINI_API_KEY.")
+
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(temperature=temperature),
+            request_options=self._request_options(timeout, on_retry),
+            stream=stream
+        )
+        if stream:
+            return (self._to_llm_response(chunk) for chunk in response)
+        return self._to_llm_response(response)
+
+    @staticmethod
+    def _to_llm_response(response):
+        try:
+            text = response.text
+        except ValueError:
+            # Responses without text parts (blocked, or the final finish_reason chunk)
+            text = ""
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            text,
+            prompt_tokens=getattr(usage, "prompt_token_count", None) if usage else None,
+            response_tokens=getattr(usage, "candidates_token_count", None) if usage else None,
+        )
+
+
+class FakeBackendError(Exception):
+    """Simulated upstream failure raised by FakeBackend"""
+    code = 503
+
+
+def parse_latency(spec):
+    """
+    Parse a latency distribution spec into a sampler returning seconds.
+
+    Supported specs:
+        "fixed:0.5"          always 0.5s
+        "uniform:0.2,1.5"    uniform between 0.2s and 1.5s
+        "normal:1.0,0.3"     normal(mean, stddev), clipped at 0
+        "lognormal:0.0,0.5"  lognormal(mu, sigma) of the underlying normal
+        "exp:0.8"            exponential with the given mean
+    """
+    kind, _, args = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        low, high = values[0], values[1] if len(values) > 1 else values[0]
+        return lambda rng: rng.uniform(low, high)
+    if kind == "normal":
+        mean, std = values[0], values[1] if len(values) > 1 else 0.0
+        return lambda rng: max(0.0, rng.gauss(mean, std))
+    if kind == "lognormal":
+        mu, sigma = values[0], values[1] if len(values) > 1 else 0.0
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == "exp":
+        mean = values[0]
+        return lambda rng: rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class FakeBackend(LLMBackend):
+    """
+    Offline stand-in returning schema-valid canned answers.
+
+    The kind of answer (skills, skill gap, strengths/weaknesses, roadmap or
+    chat) is picked from the prompt. Latency is sampled per call from a
+    distribution; with stream=True the text is split into chunks and the
+    latency spread across them. If the sampled latency exceeds the call's
+    timeout, the call waits for the timeout and fails like a deadline would.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency="fixed:0", error_rate=0.0, stream_chunks=8, seed=None):
+        self.latency_spec = latency
+        self._sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def sample_latency(self):
+        with self._rng_lock:
+            return self._sample_latency(self._rng)
+
+    def should_fail(self):
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
+    def generate(self, prompt, temperature, timeout, stream=False, on_retry=None):
+        latency = self.sample_latency()
+        fail = self.should_fail()
+        text = canned_response(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+
+        if not stream:
+            self._wait(latency, timeout)
+            if fail:
+                raise FakeBackendError("503 Service Unavailable (simulated by FakeBackend)")
+            return LLMResponse(text, prompt_tokens=prompt_tokens, response_tokens=estimate_tokens(text))
+
+        return self._stream(text, latency, timeout, fail, prompt_tokens)
+
+    def _stream(self, text, latency, timeout, fail, prompt_tokens):
+        chunks = split_chunks(text, self.stream_chunks)
+        per_chunk = latency / len(chunks)
+        started = time.monotonic()
+        for i, chunk in enumerate(chunks):
+            self._wait(per_chunk, timeout - (time.monotonic() - started))
+            # Failures surface mid-stream, after part of the answer was sent
+            if fail and i == len(chunks) // 2:
+                raise FakeBackendError("503 Service Unavailable (simulated mid-stream by FakeBackend)")
+            last = i == len(chunks) - 1
+            yield LLMResponse(
+                chunk,
+                prompt_tokens=prompt_tokens if last else None,
+                response_tokens=estimate_tokens(text) if last else None,
+            )
+
+    @staticmethod
+    def _wait(seconds, timeout):
+        if timeout is not None and seconds > timeout:
+            time.sleep(max(0.0, timeout))
+            raise TimeoutError("504 Deadline Exceeded (simulated by FakeBackend)")
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token)"""
+    return max(1, math.ceil(len(text or "") / 4))
+
+
+def split_chunks(text, count):
+    size = max(1, math.ceil(len(text) / count))
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+def _prompt_field(prompt, label):
+    match = re.search(rf"{re.escape(label)}:\s*(.*)", prompt)
+    return match.group(1).strip() if match else ""
+
+
+def _prompt_list(prompt, label):
+    value = _prompt_field(prompt, label)
+    if not value or value in ("None", "Not explicitly listed"):
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def canned_response(prompt):
+    """Pick a schema-valid canned answer matching the prompt's expected output"""
+    if '"role_summary"' in prompt:
+        return "```json\n" + json.dumps(_canned_roadmap(prompt), indent=2) + "\n```"
+    if '"technical_skills"' in prompt:
+        return json.dumps({
+            "technical_skills": ["Python", "SQL", "Machine Learning", "Docker", "React"],
+            "soft_skills": ["Communication", "Problem Solving", "Teamwork"]
+        })
+    if '"transferable_skills"' in prompt:
+        current = _prompt_list(prompt, "CURRENT SKILLS")
+        required = _prompt_list(prompt, "REQUIRED SKILLS")
+        current_lower = {skill.lower() for skill in current}
+        return json.dumps({
+            "transferable_skills": [s for s in required if s.lower() in current_lower],
+            "missing_skills": [
+                {"skill": s, "priority": "High", "learning_time_weeks": 4, "difficulty": "Intermediate",
+                 "reason": f"{s} is required for the target career."}
+                for s in required if s.lower() not in current_lower
+            ],
+            "learning_path_summary": "Build on your existing skills and close the missing ones in order of priority."
+        })
+    if '"strengths"' in prompt:
+        return json.dumps({
+            "strengths": ["Consistent academic record", "Hands-on programming skills"],
+            "weaknesses": ["Limited industry experience"],
+            "recommendations": ["Build two portfolio projects", "Earn a cloud certification"],
+            "summary": "Solid foundation with room to grow through practical experience."
+        })
+    return (
+        "Focus on one target role, list the skills it requires, and close the gaps with small "
+        "projects you can show in your portfolio. Review job descriptions weekly to stay aligned."
+    )
+
+
+def _canned_roadmap(prompt):
+    title = _prompt_field(prompt, "- Job Title") or "Software Engineer"
+    required = _prompt_list(prompt, "- Core required skills") or ["Python", "SQL", "Git"]
+    known = {skill.lower() for skill in _prompt_list(prompt, "- Technical skills")}
+    missing = [skill for skill in required if skill.lower() not in known] or required[:1]
+
+    phases = []
+    for phase_id, skill in enumerate(missing[:6], start=1):
+        phases.append({
+            "phase_id": phase_id,
+            "phase_name": f"{skill} for {title}",
+            "goal": f"Reach job-ready {skill} skills",
+            "estimated_duration_weeks": 4,
+            "tasks": [
+                {
+                    "task_id": f"task_{phase_id}_{n}",
+                    "title": f"{skill}: {step}",
+                    "jd_alignment": [f"{skill} is listed in the job requirements"],
+                    "description": f"{step} with a focus on how {skill} is used in this role.",
+                    "status_options": ["start", "already_know", "need_easier", "skip", "finished"],
+                    "subtasks": [f"Read the {skill} documentation", "Complete exercises", "Write notes"],
+                    "recommended_courses": [f"{skill} on Coursera"],
+                    "recommended_projects": [f"Small {skill} project"],
+                    "skills_gained": [skill]
+                }
+                for n, step in enumerate(["Fundamentals", "Applied project"], start=1)
+            ]
+        })
+
+    return {
+        "role_summary": {
+            "title": title,
+            "what_you_do": [f"Build and maintain features as a {title}", "Collaborate with the team"],
+            "required_stack": {"core": required, "nice_to_have": _prompt_list(prompt, "- Nice to have")}
+        },
+        "gap_analysis": {
+            "current_skills": sorted(known),
+            "transferable_skills": [skill for skill in required if skill.lower() in known],
+            "missing_skills": [
+                {"skill": skill, "priority": "high", "reason": f"{skill} is a core requirement."}
+                for skill in missing
+            ],
+            "missing_certifications": [],
+            "missing_experience": ["Production deployment experience"],
+            "summary": f"You need {len(missing)} more core skill(s) for this {title} role."
+        },
+        "roadmap": {"phases": phases}
+    }
+
+
+def backend_from_env():
+    """Build the backend selected by LLM_BACKEND"""
+    kind = os.getenv("LLM_BACKEND", "gemini").lower()
+    if kind == "fake":
+        return FakeBackend(
+            latency=os.getenv("FAKE_LLM_LATENCY", "fixed:0"),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            stream_chunks=int(os.getenv("FAKE_LLM_STREAM_CHUNKS", "8")),
+            seed=int(os.environ["FAKE_LLM_SEED"]) if os.getenv("FAKE_LLM_SEED") else None,
+        )
+    if kind != "gemini":
+        raise ValueError(f"Unknown LLM_BACKEND: {kind}")
+    # The key comes from the environment only; without one the backend is unavailable
+    api_key = os.getenv("GEMINI_API_KEY") or None
+    if not api_key:
+        print("Warning: GEMINI_API_KEY is not set; AI endpoints will serve local degraded results and chat is disabled")
+    return GeminiBackend(
+        api_key=api_key,
+        model_name=os.getenv("GEMINI_MODEL", DEFAULT_MODEL),
+        api_endpoint=os.getenv("GEMINI_API_ENDPOINT") or None,
+    )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the installed backend, creating it from the environment on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = backend_from_env()
+                print(f"LLM backend: {_backend.name}")
+    return _backend
+
+
+def set_backend(backend):
+    """Install a backend (e.g. a FakeBackend in load tests); returns the previous one"""
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
@@ -0,0 +1,271 @@
+"""
+Shared LLM call path
+Every LLM request goes through here so that all AI endpoints share one
+circuit breaker and get a bounded per-call deadline instead of the SDK
+default (600s timeout with retries). The backend doing the actual work
+(Gemini or a fake) comes from app.llm_backends.
+
+Each call is tagged with a call site (e.g. "extract_skills") and records
+latency, prompt/response tokens, estimated cost, retries, cache hits and
+parse failures in app.metrics, so the most expensive prompts show up at
+/api/metrics/llm and in the periodic summary log.
+"""
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from app import metrics
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.llm_backends import estimate_tokens, get_backend
+
+load_dotenv()
+
+# Per-call deadlines in seconds
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "20"))
+GEMINI_ROADMAP_TIMEOUT_SECONDS = float(os.getenv("GEMINI_ROADMAP_TIMEOUT_SECONDS", "60"))
+
+# USD per 1M tokens, used for cost estimates only
+LLM_INPUT_COST_PER_1M = float(os.getenv("LLM_INPUT_COST_PER_1M", "0.30"))
+LLM_OUTPUT_COST_PER_1M = float(os.getenv("LLM_OUTPUT_COST_PER_1M", "2.50"))
+
+# Seconds between summary log lines (0 disables)
+LLM_SUMMARY_INTERVAL_SECONDS = float(os.getenv("LLM_SUMMARY_INTERVAL_SECONDS", "300"))
+
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+# HTTP statuses that mean the upstream is unhealthy rather than the request being bad
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+try:
+    from requests import exceptions as requests_exceptions
+except ImportError:
+    requests_exceptions = None
+
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30")),
+)
+
+
+def is_transient_error(exc):
+    """
+    Whether exc is an upstream failure that should count against the breaker:
+    a timeout, a connection error, throttling (429) or a 5xx. Bad requests,
+    blocked prompts and configuration errors are not.
+    """
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if requests_exceptions is not None and isinstance(exc, (requests_exceptions.Timeout, requests_exceptions.ConnectionError)):
+        return True
+    # google.api_core errors carry the HTTP status as .code; RetryError wraps the last one as .cause
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return code in TRANSIENT_STATUS_CODES
+    cause = getattr(exc, "cause", None)
+    return isinstance(cause, Exception) and cause is not exc and is_transient_error(cause)
+
+
+def _record_error(exc):
+    if is_transient_error(exc):
+        gemini_breaker.record_failure()
+    else:
+        gemini_breaker.release()
+
+
+def is_available():
+    """Whether the configured backend can serve requests (e.g. Gemini has an API key)"""
+    return get_backend().available
+
+
+def generate_content(prompt, temperature, timeout=None, stream=False, call_site="unknown"):
+    """
+    Generate text with the configured backend through the shared circuit breaker.
+
+    Raises CircuitOpenError without calling the backend while the circuit is
+    open. Returns an LLMResponse, or with stream=True an iterator of
+    LLMResponse chunks; a failure while iterating counts against the breaker
+    as well. Only transient upstream errors (is_transient_error) count as
+    failures; other errors are re-raised without tripping the breaker.
+    call_site labels the telemetry for this call.
+    """
+    timeout = timeout or GEMINI_TIMEOUT_SECONDS
+    try:
+        gemini_breaker.before_call()
+    except CircuitOpenError:
+        metrics.inc("llm_calls", call_site=call_site, outcome="rejected")
+        raise
+
+    started = time.perf_counter()
+    try:
+        response = get_backend().generate(
+            prompt, temperature, timeout, stream=stream,
+            on_retry=lambda exc: metrics.inc("llm_retries", call_site=call_site)
+        )
+    except Exception as e:
+        _record_error(e)
+        _record_call(call_site, started, prompt, None, None, "error")
+        raise
+
+    if not stream:
+        gemini_breaker.record_success()
+        _record_call(call_site, started, prompt, response.text, response, "success")
+        return response
+
+    return _guarded_stream(response, call_site, started, prompt)
+
+
+def _guarded_stream(response, call_site, started, prompt):
+    text = []
+    usage = None
+    first_chunk = True
+    try:
+        for chunk in response:
+            if first_chunk:
+                metrics.observe("llm_first_chunk_seconds", time.perf_counter() - started, call_site=call_site)
+                first_chunk = False
+            text.append(chunk.text)
+            if chunk.prompt_tokens is not None or chunk.response_tokens is not None:
+                usage = chunk
+            yield chunk
+    except GeneratorExit:
+        # Consumer stopped early (e.g. the root object already closed)
+        gemini_breaker.record_success()
+        _record_call(call_site, started, prompt, "".join(text), usage, "success")
+        raise
+    except Exception as e:
+        _record_error(e)
+        _record_call(call_site, started, prompt, "".join(text), usage, "error")
+        raise
+    gemini_breaker.record_success()
+    _record_call(call_site, started, prompt, "".join(text), usage, "success")
+
+
+def _record_call(call_site, started, prompt, text, usage, outcome):
+    """Record latency, token counts and cost for one finished call"""
+    metrics.inc("llm_calls", call_site=call_site, outcome=outcome)
+    metrics.observe("llm_latency_seconds", time.perf_counter() - started, call_site=call_site)
+
+    # Prefer the provider's usage counts and fall back to a length estimate
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    response_tokens = getattr(usage, "response_tokens", None)
+    if prompt_tokens is None or response_tokens is None:
+        metrics.inc("llm_estimated_token_calls", call_site=call_site)
+    if prompt_tokens is None:
+        prompt_tokens = estimate_tokens(prompt)
+    if response_tokens is None:
+        response_tokens = estimate_tokens(text) if text else 0
+
+    metrics.inc("llm_prompt_tokens", prompt_tokens, call_site=call_site)
+    metrics.inc("llm_response_tokens", response_tokens, call_site=call_site)
+    metrics.observe("llm_prompt_tokens_per_call", prompt_tokens, buckets=TOKEN_BUCKETS, call_site=call_site)
+    metrics.observe("llm_response_tokens_per_call", response_tokens, buckets=TOKEN_BUCKETS, call_site=call_site)
+    cost = (prompt_tokens * LLM_INPUT_COST_PER_1M + response_tokens * LLM_OUTPUT_COST_PER_1M) / 1_000_000
+    metrics.inc("llm_cost_usd", cost, call_site=call_site)
+
+
+def record_cache_hit(call_site):
+    """Count an answer served from a cache instead of an LLM call"""
+    metrics.inc("llm_cache_hits", call_site=call_site)
+
+
+def record_parse_failure(call_site):
+    """Count an LLM response that could not be parsed into the expected structure"""
+    metrics.inc("llm_parse_failures", call_site=call_site)
+
+
+def usage_summary():
+    """
+    Per call site totals, most expensive first:
+        [{"call_site", "calls", "errors", "rejected", "retries", "cache_hits", "parse_failures",
+          "prompt_tokens", "response_tokens", "cost_usd", "avg_latency_seconds", "p95_latency_seconds"}, ...]
+    """
+    data = metrics.snapshot()
+    sites = {}
+
+    def site(name):
+        return sites.setdefault(name, {
+            "call_site": name, "calls": 0, "errors": 0, "rejected": 0, "retries": 0, "cache_hits": 0,
+            "parse_failures": 0, "prompt_tokens": 0, "response_tokens": 0, "cost_usd": 0.0,
+            "avg_latency_seconds": None, "p95_latency_seconds": None,
+        })
+
+    fields = {
+        "llm_retries": "retries",
+        "llm_cache_hits": "cache_hits",
+        "llm_parse_failures": "parse_failures",
+        "llm_prompt_tokens": "prompt_tokens",
+        "llm_response_tokens": "response_tokens",
+        "llm_cost_usd": "cost_usd",
+    }
+    for counter in data["counters"]:
+        call_site = counter["labels"].get("call_site")
+        if call_site is None:
+            continue
+        if counter["name"] == "llm_calls":
+            entry = site(call_site)
+            outcome = counter["labels"].get("outcome")
+            if outcome == "rejected":
+                entry["rejected"] += int(counter["value"])
+            else:
+                entry["calls"] += int(counter["value"])
+                if outcome == "error":
+                    entry["errors"] += int(counter["value"])
+        elif counter["name"] in fields:
+            site(call_site)[fields[counter["name"]]] += counter["value"]
+
+    for hist in data["histograms"]:
+        if hist["name"] == "llm_latency_seconds" and "call_site" in hist["labels"]:
+            entry = site(hist["labels"]["call_site"])
+            entry["avg_latency_seconds"] = hist["avg"]
+            entry["p95_latency_seconds"] = hist["p95"]
+
+    for entry in sites.values():
+        entry["prompt_tokens"] = int(entry["prompt_tokens"])
+        entry["response_tokens"] = int(entry["response_tokens"])
+        entry["cost_usd"] = round(entry["cost_usd"], 6)
+    return sorted(sites.values(), key=lambda e: e["cost_usd"], reverse=True)
+
+
+def log_usage_summary():
+    summary = usage_summary()
+    if not summary:
+        return
+    print("LLM usage summary:")
+    for entry in summary:
+        avg = entry["avg_latency_seconds"]
+        print(
+            f"  {entry['call_site']}: calls={entry['calls']} errors={entry['errors']} "
+            f"rejected={entry['rejected']} retries={int(entry['retries'])} "
+            f"cache_hits={int(entry['cache_hits'])} parse_failures={int(entry['parse_failures'])} "
+            f"tokens={entry['prompt_tokens']}+{entry['response_tokens']} cost=${entry['cost_usd']:.4f} "
+            f"avg={avg if avg is None else f'{avg:.2f}s'} p95={entry['p95_latency_seconds']}s"
+        )
+
+
+_summary_thread = None
+_summary_stop = threading.Event()
+
+
+def start_summary_logger(interval=None):
+    """Log usage_summary() every interval seconds in a daemon thread"""
+    global _summary_thread
+    interval = LLM_SUMMARY_INTERVAL_SECONDS if interval is None else interval
+    if interval <= 0 or (_summary_thread is not None and _summary_thread.is_alive()):
+        return
+
+    def run():
+        while not _summary_stop.wait(interval):
+            try:
+                log_usage_summary()
+            except Exception as e:
+                print(f"Warning: LLM usage summary failed: {e}")
+
+    _summary_stop.clear()
+    _summary_thread = threading.Thread(target=run, name="llm-usage-summary", daemon=True)
+    _summary_thread.start()
+
+
+def stop_summary_logger():
+    _summary_stop.set()
@@ -0,0 +1,409 @@
+"""
+Location normalization
+Jobs are posted with free-text city and country names ("Bangalore",
+"bengaluru", "Bengaluru, Karnataka"). On every write the job is matched
+against the local gazetteer below and stores canonical ids next to the text:
+
+- location_city_id: the gazetteer id ("bengaluru"), or for a place that is
+  not in the gazetteer the slug of its name, so exact-name filters still work
+- location_country_code: ISO 3166 alpha-2 code ("IN"), or None if unknown
+
+Location filters compare these ids (indexed equality instead of ILIKE), and
+the legacy location column is derived from the canonical names. autocomplete()
+serves location suggestions from an in-memory prefix index.
+"""
+import bisect
+import re
+import unicodedata
+from collections import namedtuple
+
+City = namedtuple("City", "id name country_code population")
+Country = namedtuple("Country", "code name population")
+NormalizedLocation = namedtuple("NormalizedLocation", "city_id city country_code country label")
+
+# (ISO code, name, population in thousands, other spellings)
+_COUNTRIES = [
+    ("IN", "India", 1430000, ["bharat", "ind"]),
+    ("US", "United States", 335000, ["usa", "united states of america", "america", "u s", "u s a"]),
+    ("GB", "United Kingdom", 68000, ["uk", "u k", "great britain", "britain", "england", "scotland", "wales", "gbr"]),
+    ("CA", "Canada", 40000, ["can"]),
+    ("AU", "Australia", 26500, ["aus"]),
+    ("DE", "Germany", 84000, ["deutschland", "deu"]),
+    ("FR", "France", 68000, []),
+    ("NL", "Netherlands", 17800, ["the netherlands", "holland"]),
+    ("IE", "Ireland", 5200, []),
+    ("SG", "Singapore", 5900, ["sgp"]),
+    ("AE", "United Arab Emirates", 9500, ["uae", "u a e", "emirates"]),
+    ("SA", "Saudi Arabia", 36000, ["ksa"]),
+    ("QA", "Qatar", 2700, []),
+    ("JP", "Japan", 124000, []),
+    ("CN", "China", 1410000, ["prc"]),
+    ("KR", "South Korea", 51700, ["korea", "republic of korea"]),
+    ("HK", "Hong Kong", 7500, []),
+    ("TW", "Taiwan", 23400, []),
+    ("MY", "Malaysia", 34000, []),
+    ("ID", "Indonesia", 277000, []),
+    ("TH", "Thailand", 71800, []),
+    ("VN", "Vietnam", 99000, ["viet nam"]),
+    ("PH", "Philippines", 117000, []),
+    ("PK", "Pakistan", 240000, []),
+    ("BD", "Bangladesh", 173000, []),
+    ("LK", "Sri Lanka", 22000, []),
+    ("NP", "Nepal", 30500, []),
+    ("NZ", "New Zealand", 5200, []),
+    ("ZA", "South Africa", 62000, []),
+    ("NG", "Nigeria", 224000, []),
+    ("KE", "Kenya", 55000, []),
+    ("EG", "Egypt", 112000, []),
+    ("IL", "Israel", 9800, []),
+    ("TR", "Turkey", 85000, ["turkiye"]),
+    ("ES", "Spain", 48000, ["espana"]),
+    ("IT", "Italy", 59000, ["italia"]),
+    ("PT", "Portugal", 10400, []),
+    ("CH", "Switzerland", 8800, []),
+    ("AT", "Austria", 9100, []),
+    ("BE", "Belgium", 11800, []),
+    ("SE", "Sweden", 10500, []),
+    ("NO", "Norway", 5500, []),
+    ("DK", "Denmark", 5900, []),
+    ("FI", "Finland", 5600, []),
+    ("PL", "Poland", 37600, []),
+    ("CZ", "Czechia", 10900, ["czech republic"]),
+    ("RO", "Romania", 19000, []),
+    ("HU", "Hungary", 9600, []),
+    ("GR", "Greece", 10400, []),
+    ("UA", "Ukraine", 37000, []),
+    ("RU", "Russia", 144000, ["russian federation"]),
+    ("BR", "Brazil", 216000, ["brasil"]),
+    ("MX", "Mexico", 128000, []),
+    ("AR", "Argentina", 46000, []),
+    ("CL", "Chile", 19600, []),
+    ("CO", "Colombia", 52000, []),
+    ("EE", "Estonia", 1370, []),
+    ("LU", "Luxembourg", 660, []),
+]
+
+# (id, name, country code, population in thousands, other spellings)
+_CITIES = [
+    ("bengaluru", "Bengaluru", "IN", 13600, ["bangalore", "bengalooru", "blr"]),
+    ("mumbai", "Mumbai", "IN", 21300, ["bombay"]),
+    ("delhi", "Delhi", "IN", 32900, ["new delhi", "delhi ncr", "ncr"]),
+    ("hyderabad", "Hyderabad", "IN", 10800, ["secunderabad", "cyberabad"]),
+    ("chennai", "Chennai", "IN", 11800, ["madras"]),
+    ("pune", "Pune", "IN", 7100, ["poona"]),
+    ("kolkata", "Kolkata", "IN", 15300, ["calcutta"]),
+    ("ahmedabad", "Ahmedabad", "IN", 8600, ["amdavad"]),
+    ("gurugram", "Gurugram", "IN", 1500, ["gurgaon"]),
+    ("noida", "Noida", "IN", 700, ["greater noida"]),
+    ("navi-mumbai", "Navi Mumbai", "IN", 1200, []),
+    ("thane", "Thane", "IN", 2500, []),
+    ("jaipur", "Jaipur", "IN", 4100, []),
+    ("kochi", "Kochi", "IN", 2200, ["cochin", "ernakulam"]),
+    ("thiruvananthapuram", "Thiruvananthapuram", "IN", 1100, ["trivandrum"]),
+    ("coimbatore", "Coimbatore", "IN", 2900, []),
+    ("indore", "Indore", "IN", 3300, []),
+    ("chandigarh", "Chandigarh", "IN", 1200, ["mohali"]),
+    ("lucknow", "Lucknow", "IN", 3900, []),
+    ("nagpur", "Nagpur", "IN", 3000, []),
+    ("bhubaneswar", "Bhubaneswar", "IN", 1200, []),
+    ("visakhapatnam", "Visakhapatnam", "IN", 2300, ["vizag"]),
+    ("vadodara", "Vadodara", "IN", 2200, ["baroda"]),
+    ("surat", "Surat", "IN", 8000, []),
+    ("mysuru", "Mysuru", "IN", 1100, ["mysore"]),
+    ("mangaluru", "Mangaluru", "IN", 700, ["mangalore"]),
+    ("madurai", "Madurai", "IN", 1600, []),
+    ("bhopal", "Bhopal", "IN", 2500, []),
+    ("patna", "Patna", "IN", 2500, []),
+    ("kanpur", "Kanpur", "IN", 3200, []),
+    ("nashik", "Nashik", "IN", 2100, ["nasik"]),
+    ("vijayawada", "Vijayawada", "IN", 1800, []),
+    ("panaji", "Panaji", "IN", 120, ["goa", "panjim"]),
+    ("dehradun", "Dehradun", "IN", 800, []),
+    ("ranchi", "Ranchi", "IN", 1500, []),
+    ("guwahati", "Guwahati", "IN", 1200, []),
+    ("raipur", "Raipur", "IN", 1300, []),
+    ("ludhiana", "Ludhiana", "IN", 1800, []),
+    ("agra", "Agra", "IN", 2200, []),
+    ("varanasi", "Varanasi", "IN", 1600, ["benares", "banaras"]),
+    ("faridabad", "Faridabad", "IN", 1400, []),
+    ("ghaziabad", "Ghaziabad", "IN", 2400, []),
+    ("new-york", "New York", "US", 18900, ["new york city", "nyc", "manhattan", "brooklyn"]),
+    ("san-francisco", "San Francisco", "US", 3300, ["sf", "san francisco bay area", "bay area"]),
+    ("san-jose", "San Jose", "US", 2000, []),
+    ("seattle", "Seattle", "US", 4000, []),
+    ("los-angeles", "Los Angeles", "US", 12500, []),
+    ("austin", "Austin", "US", 2300, []),
+    ("boston", "Boston", "US", 4900, []),
+    ("chicago", "Chicago", "US", 8900, []),
+    ("washington", "Washington", "US", 5400, ["washington dc", "washington d c", "dc"]),
+    ("atlanta", "Atlanta", "US", 5100, []),
+    ("dallas", "Dallas", "US", 6300, []),
+    ("houston", "Houston", "US", 6400, []),
+    ("denver", "Denver", "US", 2900, []),
+    ("mountain-view", "Mountain View", "US", 80, []),
+    ("palo-alto", "Palo Alto", "US", 70, []),
+    ("redmond", "Redmond", "US", 75, []),
+    ("sunnyvale", "Sunnyvale", "US", 155, []),
+    ("menlo-park", "Menlo Park", "US", 33, []),
+    ("cupertino", "Cupertino", "US", 60, []),
+    ("san-diego", "San Diego", "US", 3300, []),
+    ("miami", "Miami", "US", 6100, []),
+    ("philadelphia", "Philadelphia", "US", 5700, []),
+    ("pittsburgh", "Pittsburgh", "US", 1700, []),
+    ("raleigh", "Raleigh", "US", 1400, []),
+    ("portland", "Portland", "US", 2500, []),
+    ("salt-lake-city", "Salt Lake City", "US", 1200, []),
+    ("phoenix", "Phoenix", "US", 4900, []),
+    ("minneapolis", "Minneapolis", "US", 3700, []),
+    ("detroit", "Detroit", "US", 4300, []),
+    ("london", "London", "GB", 9600, ["greater london"]),
+    ("manchester", "Manchester", "GB", 2800, []),
+    ("edinburgh", "Edinburgh", "GB", 540, []),
+    ("cambridge", "Cambridge", "GB", 145, []),
+    ("oxford", "Oxford", "GB", 160, []),
+    ("birmingham", "Birmingham", "GB", 2600, []),
+    ("bristol", "Bristol", "GB", 700, []),
+    ("glasgow", "Glasgow", "GB", 1700, []),
+    ("leeds", "Leeds", "GB", 1900, []),
+    ("belfast", "Belfast", "GB", 630, []),
+    ("toronto", "Toronto", "CA", 6200, ["gta"]),
+    ("vancouver", "Vancouver", "CA", 2600, []),
+    ("montreal", "Montreal", "CA", 4300, []),
+    ("ottawa", "Ottawa", "CA", 1400, []),
+    ("calgary", "Calgary", "CA", 1500, []),
+    ("waterloo", "Waterloo", "CA", 120, ["kitchener", "kitchener waterloo"]),
+    ("sydney", "Sydney", "AU", 5300, []),
+    ("melbourne", "Melbourne", "AU", 5100, []),
+    ("brisbane", "Brisbane", "AU", 2600, []),
+    ("perth", "Perth", "AU", 2200, []),
+    ("canberra", "Canberra", "AU", 460, []),
+    ("adelaide", "Adelaide", "AU", 1400, []),
+    ("berlin", "Berlin", "DE", 3700, []),
+    ("munich", "Munich", "DE", 1500, ["munchen", "muenchen"]),
+    ("hamburg", "Hamburg", "DE", 1900, []),
+    ("frankfurt", "Frankfurt", "DE", 760, ["frankfurt am main"]),
+    ("cologne", "Cologne", "DE", 1080, ["koln", "koeln"]),
+    ("stuttgart", "Stuttgart", "DE", 630, []),
+    ("paris", "Paris", "FR", 11100, []),
+    ("lyon", "Lyon", "FR", 1700, []),
+    ("toulouse", "Toulouse", "FR", 1000, []),
+    ("amsterdam", "Amsterdam", "NL", 1200, []),
+    ("rotterdam", "Rotterdam", "NL", 650, []),
+    ("eindhoven", "Eindhoven", "NL", 240, []),
+    ("the-hague", "The Hague", "NL", 550, ["den haag", "hague"]),
+    ("dublin", "Dublin", "IE", 1400, []),
+    ("cork", "Cork", "IE", 220, []),
+    ("singapore", "Singapore", "SG", 5900, []),
+    ("dubai", "Dubai", "AE", 3600, []),
+    ("abu-dhabi", "Abu Dhabi", "AE", 1500, []),
+    ("sharjah", "Sharjah", "AE", 1800, []),
+    ("riyadh", "Riyadh", "SA", 7700, []),
+    ("jeddah", "Jeddah", "SA", 4700, []),
+    ("doha", "Doha", "QA", 1200, []),
+    ("tokyo", "Tokyo", "JP", 37000, []),
+    ("osaka", "Osaka", "JP", 19000, []),
+    ("beijing", "Beijing", "CN", 21500, ["peking"]),
+    ("shanghai", "Shanghai", "CN", 28500, []),
+    ("shenzhen", "Shenzhen", "CN", 17600, []),
+    ("guangzhou", "Guangzhou", "CN", 18700, ["canton"]),
+    ("hangzhou", "Hangzhou", "CN", 12200, []),
+    ("seoul", "Seoul", "KR", 9900, []),
+    ("hong-kong", "Hong Kong", "HK", 7500, []),
+    ("taipei", "Taipei", "TW", 2600, []),
+    ("kuala-lumpur", "Kuala Lumpur", "MY", 8400, ["kl"]),
+    ("jakarta", "Jakarta", "ID", 11000, []),
+    ("bangkok", "Bangkok", "TH", 11000, []),
+    ("ho-chi-minh-city", "Ho Chi Minh City", "VN", 9300, ["saigon", "hcmc"]),
+    ("hanoi", "Hanoi", "VN", 8400, ["ha noi"]),
+    ("manila", "Manila", "PH", 14000, ["metro manila"]),
+    ("karachi", "Karachi", "PK", 17000, []),
+    ("lahore", "Lahore", "PK", 13500, []),
+    ("islamabad", "Islamabad", "PK", 1200, []),
+    ("hyderabad-pk", "Hyderabad", "PK", 1900, []),
+    ("dhaka", "Dhaka", "BD", 23000, ["dacca"]),
+    ("colombo", "Colombo", "LK", 750, []),
+    ("kathmandu", "Kathmandu", "NP", 1500, []),
+    ("auckland", "Auckland", "NZ", 1700, []),
+    ("wellington", "Wellington", "NZ", 420, []),
+    ("johannesburg", "Johannesburg", "ZA", 6000, ["joburg"]),
+    ("cape-town", "Cape Town", "ZA", 4800, []),
+    ("lagos", "Lagos", "NG", 15900, []),
+    ("nairobi", "Nairobi", "KE", 5100, []),
+    ("cairo", "Cairo", "EG", 22000, []),
+    ("tel-aviv", "Tel Aviv", "IL", 4300, ["tel aviv yafo"]),
+    ("istanbul", "Istanbul", "TR", 15800, []),
+    ("madrid", "Madrid", "ES", 6700, []),
+    ("barcelona", "Barcelona", "ES", 5600, []),
+    ("milan", "Milan", "IT", 3200, ["milano"]),
+    ("rome", "Rome", "IT", 4300, ["roma"]),
+    ("lisbon", "Lisbon", "PT", 3000, ["lisboa"]),
+    ("porto", "Porto", "PT", 1300, ["oporto"]),
+    ("zurich", "Zurich", "CH", 1400, ["zuerich"]),
+    ("geneva", "Geneva", "CH", 620, ["geneve"]),
+    ("vienna", "Vienna", "AT", 2000, ["wien"]),
+    ("brussels", "Brussels", "BE", 2100, ["bruxelles", "brussel"]),
+    ("stockholm", "Stockholm", "SE", 1700, []),
+    ("oslo", "Oslo", "NO", 1100, []),
+    ("copenhagen", "Copenhagen", "DK", 1400, ["kobenhavn"]),
+    ("helsinki", "Helsinki", "FI", 1300, []),
+    ("warsaw", "Warsaw", "PL", 1800, ["warszawa"]),
+    ("krakow", "Krakow", "PL", 780, ["cracow"]),
+    ("prague", "Prague", "CZ", 1300, ["praha"]),
+    ("bucharest", "Bucharest", "RO", 1800, ["bucuresti"]),
+    ("budapest", "Budapest", "HU", 1750, []),
+    ("athens", "Athens", "GR", 3100, ["athina"]),
+    ("kyiv", "Kyiv", "UA", 3000, ["kiev"]),
+    ("moscow", "Moscow", "RU", 12600, ["moskva"]),
+    ("sao-paulo", "São Paulo", "BR", 22600, []),
+    ("rio-de-janeiro", "Rio de Janeiro", "BR", 13600, []),
+    ("mexico-city", "Mexico City", "MX", 22000, ["ciudad de mexico", "cdmx"]),
+    ("buenos-aires", "Buenos Aires", "AR", 15500, []),
+    ("santiago", "Santiago", "CL", 6900, []),
+    ("bogota", "Bogotá", "CO", 11000, []),
+    ("tallinn", "Tallinn", "EE", 450, []),
+    ("luxembourg", "Luxembourg", "LU", 130, ["luxembourg city"]),
+]
+
+
+def normalize_key(value):
+    """Lookup key for a place name: lowercase ASCII words ("São  Paulo!" -> "sao paulo")"""
+    value = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip()
+
+
+def _slug(value):
+    return normalize_key(value).replace(" ", "-")
+
+
+COUNTRIES = {code: Country(code, name, population) for code, name, population, _ in _COUNTRIES}
+CITIES = {city_id: City(city_id, name, code, population) for city_id, name, code, population, _ in _CITIES}
+
+_country_by_key = {}
+for code, name, _, aliases in _COUNTRIES:
+    for spelling in [code, name, *aliases]:
+        _country_by_key[normalize_key(spelling)] = code
+
+# Several cities can share a name; most populous first
+_cities_by_key = {}
+for city_id, name, _, _, aliases in sorted(_CITIES, key=lambda c: -c[3]):
+    for spelling in [name, *aliases]:
+        _cities_by_key.setdefault(normalize_key(spelling), []).append(CITIES[city_id])
+
+
+def resolve_country(value):
+    """ISO code for a country name, code or common spelling; None if unknown"""
+    return _country_by_key.get(normalize_key(value))
+
+
+def resolve_city(value, country_code=None):
+    """Gazetteer City for a city name (in country_code if given); None if unknown"""
+    candidates = _cities_by_key.get(normalize_key(value), [])
+    if country_code:
+        candidates = [c for c in candidates if c.country_code == country_code]
+    return candidates[0] if candidates else None
+
+
+def normalize_location(city, country):
+    """
+    Canonical NormalizedLocation for a posted city / country. Extra parts of
+    the city ("Bengaluru, Karnataka") are ignored, and a country given as the
+    city ("India") is taken as the country.
+    """
+    city_parts = [part for part in (city or "").split(",") if normalize_key(part)]
+    country_code = resolve_country(country)
+    for part in city_parts[1:]:
+        country_code = country_code or resolve_country(part)
+
+    gazetteer_city = None
+    city_id = None
+    if city_parts:
+        gazetteer_city = resolve_city(city_parts[0], country_code)
+        if gazetteer_city:
+            city_id = gazetteer_city.id
+            country_code = country_code or gazetteer_city.country_code
+        elif len(city_parts) == 1 and resolve_country(city_parts[0]):
+            country_code = country_code or resolve_country(city_parts[0])
+        else:
+            city_id = _slug(city_parts[0])
+
+    city_name = gazetteer_city.name if gazetteer_city else (city_parts[0].strip() if city_id else None)
+    if country_code:
+        country_name = COUNTRIES[country_code].name
+    else:
+        country_name = (country or "").strip() or None
+    label = ", ".join(part for part in (city_name, country_name) if part) or None
+    return NormalizedLocation(city_id, city_name, country_code, country_name, label)
+
+
+def set_job_location(job):
+    """Set the job's canonical location columns and the legacy location from its city / country"""
+    place = normalize_location(job.location_city, job.location_country)
+    job.location_city_id = place.city_id
+    job.location_country_code = place.country_code
+    if place.country_code and not (job.location_country or "").strip():
+        job.location_country = place.country
+    job.location = place.label
+
+
+class PrefixIndex:
+    """
+    Sorted (key, rank, entry) list searched with bisect. Every entry is
+    indexed under each of its spellings and under each word of them, so
+    "york" finds New York; whole-spelling matches rank before word matches.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._items = []
+
+    def build(self, entries):
+        """entries: (spellings, weight, entry) with entry a dict that has an "id" """
+        rows = []
+        for spellings, weight, entry in entries:
+            for spelling in spellings:
+                key = normalize_key(spelling)
+                words = key.split(" ")
+                rows.append((key, (0, -weight), entry))
+                for i in range(1, len(words)):
+                    rows.append((" ".join(words[i:]), (1, -weight), entry))
+        rows.sort(key=lambda row: row[0])
+        self._keys = [row[0] for row in rows]
+        self._items = rows
+        return self
+
+    def search(self, prefix, limit=10):
+        prefix = normalize_key(prefix)
+        if not prefix:
+            return []
+        best = {}
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            _, rank, entry = self._items[i]
+            if entry["id"] not in best or rank < best[entry["id"]][0]:
+                best[entry["id"]] = (rank, entry)
+            i += 1
+        return [entry for _, entry in sorted(best.values(), key=lambda item: item[0])[:limit]]
+
+
+def _autocomplete_entries():
+    for code, name, population, aliases in _COUNTRIES:
+        entry = {"type": "country", "id": code, "name": name, "country_code": code, "country": name, "label": name}
+        yield [name, *aliases], population, entry
+    for city_id, name, code, population, aliases in _CITIES:
+        country = COUNTRIES[code].name
+        entry = {
+            "type": "city", "id": city_id, "name": name, "country_code": code,
+            "country": country, "label": f"{name}, {country}",
+        }
+        yield [name, *aliases], population, entry
+
+
+_autocomplete_index = None
+
+
+def autocomplete(prefix, limit=10):
+    """City and country suggestions for a typed prefix, largest places first"""
+    global _autocomplete_index
+    if _autocomplete_index is None:
+        _autocomplete_index = PrefixIndex().build(_autocomplete_entries())
+    return _autocomplete_index.search(prefix, limit)
@@ -1,20 +1,43 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Query, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func, case, String
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import or_, and_, func, case, String, select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, timedelta, date
+from contextlib import asynccontextmanager
+import hmac
 import uvicorn
 
-from app import models, schemas, auth, database, ml_service, gemini_service
-from app.database import engine, get_db
+from app import models, schemas, auth, database, ml_service, gemini_service, metrics, skill_gap_engine, llm_client, job_search, job_skills, job_embeddings, job_import, exports, roadmap_storage, migrations
+from app.database import engine, get_db, get_async_db, get_read_db
 from app.job_routes import router as job_router
 from app.job_roadmap_service import generate_job_roadmap
 
-models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="PathFinder AI API")
+@asynccontextmanager
+async def lifespan(app):
+    if migrations.MIGRATE_ON_STARTUP:
+        models.Base.metadata.create_all(bind=engine)
+        migrations.upgrade(engine)
+    else:
+        migrations.verify_schema(engine)
+    job_search.detect_full_text_search(engine)
+    llm_client.start_summary_logger()
+    database.replicas.start_health_checks()
+    job_embeddings.start_worker()
+    yield
+    job_embeddings.stop_worker()
+    database.replicas.stop_health_checks()
+    llm_client.stop_summary_logger()
+    llm_client.log_usage_summary()
+    await database.async_engine.dispose()
+    await database.replicas.dispose()
+
+
+app = FastAPI(title="PathFinder AI API", lifespan=lifespan)
 
 # Include enhanced job routes
 app.include_router(job_router)
@@ -25,17 +48,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+@app.middleware("http")
+async def read_your_writes(request, call_next):
+    # After a successful write, the client's reads go to the primary for a while
+    response = await call_next(request)
+    if request.method not in database.READ_METHODS and response.status_code < 400:
+        database.record_write(request, response)
+    return response
+
+
 @app.post("/api/auth/register-user", response_model=schemas.UserResponse)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.execute(select(models.User.id).where(models.User.email == user.email))).first()
+    if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     try:
-        hashed_password = auth.get_password_hash(user.password)
+        hashed_password = await auth.get_password_hash(user.password)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     db_user = models.User(
@@ -44,19 +77,19 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         full_name=user.full_name
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @app.post("/api/auth/register-recruiter", response_model=schemas.RecruiterResponse)
-def register_recruiter(recruiter: schemas.RecruiterCreate, db: Session = Depends(get_db)):
-    db_recruiter = db.query(models.Recruiter).filter(models.Recruiter.email == recruiter.email).first()
-    if db_recruiter:
+async def register_recruiter(recruiter: schemas.RecruiterCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = (await db.execute(select(models.Recruiter.id).where(models.Recruiter.email == recruiter.email))).first()
+    if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     try:
-        hashed_password = auth.get_password_hash(recruiter.password)
+        hashed_password = await auth.get_password_hash(recruiter.password)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     db_recruiter = models.Recruiter(
@@ -65,36 +98,39 @@ def register_recruiter(recruiter: schemas.RecruiterCreate, db: Session = Depends
         company_name=recruiter.company_name
     )
     db.add(db_recruiter)
-    db.commit()
-    db.refresh(db_recruiter)
+    await db.commit()
+    await db.refresh(db_recruiter)
     return db_recruiter
 
 
 @app.post("/api/auth/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if user and auth.verify_password(form_data.password, user.hashed_password):
-        access_token = auth.create_access_token(data={"sub": user.email, "type": "user"})
-        return {"access_token": access_token, "token_type": "bearer", "user_type": "user", "user_id": user.id}
-    
-    recruiter = db.query(models.Recruiter).filter(models.Recruiter.email == form_data.username).first()
-    if recruiter and auth.verify_password(form_data.password, recruiter.hashed_password):
-        access_token = auth.create_access_token(data={"sub": recruiter.email, "type": "recruiter"})
-        return {"access_token": access_token, "token_type": "bearer", "user_type": "recruiter", "recruiter_id": recruiter.id}
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    # Password checks run on the hash pool; this handler only waits for them
+    accounts = (await db.execute(auth.login_accounts_query(form_data.username))).all()
+    for account in accounts:
+        matches, new_hash = await auth.verify_password(form_data.password, account.hashed_password)
+        if not matches:
+            continue
+        if new_hash:
+            await auth.upgrade_password_hash(db, account, new_hash)
+        access_token = auth.create_access_token(data={"sub": account.email, "type": account.user_type, "uid": account.id})
+        return {"access_token": access_token, "token_type": "bearer", "user_type": account.user_type, f"{account.user_type}_id": account.id}
     
     raise HTTPException(status_code=401, detail="Incorrect email or password")
 
 
 @app.get("/api/user/profile", response_model=schemas.UserProfileResponse)
-def get_user_profile(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
+async def get_user_profile(current_user: auth.Principal = Depends(auth.get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    profile = (await db.execute(
+        select(models.UserProfile).where(models.UserProfile.user_id == current_user.id)
+    )).scalars().first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
 
 
 @app.post("/api/user/profile", response_model=schemas.UserProfileResponse)
-def create_user_profile(profile: schemas.UserProfileCreate, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def create_user_profile(profile: schemas.UserProfileCreate, current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     existing = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
     if existing:
         raise HTTPException(status_code=400, detail="Profile already exists. Use PUT to update.")
@@ -107,7 +143,7 @@ def create_user_profile(profile: schemas.UserProfileCreate, current_user: models
 
 
 @app.put("/api/user/profile", response_model=schemas.UserProfileResponse)
-def update_user_profile(profile: schemas.UserProfileUpdate, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def update_user_profile(profile: schemas.UserProfileUpdate, current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     db_profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
     if not db_profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -121,7 +157,7 @@ def update_user_profile(profile: schemas.UserProfileUpdate, current_user: models
 
 
 @app.post("/api/user/upload-resume")
-async def upload_resume(file: UploadFile = File(...), current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+async def upload_resume(file: UploadFile = File(...), current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     if not file.filename.endswith(('.pdf', '.doc', '.docx')):
         raise HTTPException(status_code=400, detail="Only PDF and DOC files allowed")
     
@@ -170,22 +206,38 @@ async def upload_resume(file: UploadFile = File(...), current_user: models.User
 
 
 @app.post("/api/recruiter/jobs", response_model=schemas.JobResponse)
-def create_job(job: schemas.JobCreate, current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
-    db_job = models.Job(recruiter_id=current_recruiter.id, **job.dict())
+def create_job(job: schemas.JobCreate, current_recruiter: auth.Principal = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
+    # Legacy payload: fill in the job board columns too, so every job can be read the same way
+    db_job = models.Job(
+        recruiter_id=current_recruiter.id,
+        job_title=job.title,
+        company_name=current_recruiter.company_name or "Company Not Specified",
+        jd_text=job.description,
+        location_city=job.location,
+        **job.dict()
+    )
     db.add(db_job)
+    db.flush()
+    job_skills.sync_job_skills(db, db_job)
     db.commit()
     db.refresh(db_job)
+    job_embeddings.enqueue([db_job.id])
     return db_job
 
 
 @app.get("/api/recruiter/jobs", response_model=List[schemas.JobResponse])
-def get_recruiter_jobs(current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
-    jobs = db.query(models.Job).filter(models.Job.recruiter_id == current_recruiter.id).all()
+def get_recruiter_jobs(current_recruiter: auth.Principal = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
+    jobs = (
+        db.query(models.Job)
+        .options(job_search.load_fields(job_search.LEGACY_LIST_FIELDS))
+        .filter(models.Job.recruiter_id == current_recruiter.id)
+        .all()
+    )
     return jobs
 
 
 @app.put("/api/recruiter/jobs/{job_id}", response_model=schemas.JobResponseEnhanced)
-def update_job(job_id: int, job: schemas.JobUpdateEnhanced, current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
+def update_job(job_id: int, job: schemas.JobUpdateEnhanced, current_recruiter: auth.Principal = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
     db_job = db.query(models.Job).filter(models.Job.id == job_id, models.Job.recruiter_id == current_recruiter.id).first()
     if not db_job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -204,21 +256,19 @@ def update_job(job_id: int, job: schemas.JobUpdateEnhanced, current_recruiter: m
         db_job.title = update_data['job_title']
     if 'jd_text' in update_data:
         db_job.description = update_data['jd_text'][:500] if len(update_data['jd_text']) > 500 else update_data['jd_text']
-    if 'location_city' in update_data or 'location_country' in update_data:
-        location_parts = []
-        if db_job.location_city:
-            location_parts.append(db_job.location_city)
-        if db_job.location_country:
-            location_parts.append(db_job.location_country)
-        db_job.location = ', '.join(location_parts) if location_parts else None
+    # location is derived from location_city / location_country on write (see app/locations.py)
+    if 'skills_required' in update_data:
+        job_skills.sync_job_skills(db, db_job)
     
     db.commit()
     db.refresh(db_job)
+    if set(update_data) & set(job_embeddings.EMBED_FIELDS):
+        job_embeddings.enqueue([db_job.id])
     return db_job
 
 
 @app.delete("/api/recruiter/jobs/{job_id}")
-def close_job(job_id: int, current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
+def close_job(job_id: int, current_recruiter: auth.Principal = Depends(auth.get_current_recruiter), db: Session = Depends(get_db)):
     db_job = db.query(models.Job).filter(models.Job.id == job_id, models.Job.recruiter_id == current_recruiter.id).first()
     if not db_job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -229,9 +279,16 @@ def close_job(job_id: int, current_recruiter: models.Recruiter = Depends(auth.ge
 
 
 @app.get("/api/jobs", response_model=List[schemas.JobResponse])
-def get_all_jobs(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    # Include both "active" and "open" status for backward compatibility
-    jobs = db.query(models.Job).filter(models.Job.status.in_(["active", "open"])).offset(skip).limit(limit).all()
+def get_all_jobs(response: Response, skip: int = 0, limit: int = 50, cursor: Optional[str] = None, db: Session = Depends(get_read_db)):
+    # Active jobs, newest first; the cursor for the next page is returned in X-Next-Cursor
+    query, sort_keys = job_search.build_search_query(db)
+    query = query.options(job_search.load_fields(job_search.LEGACY_LIST_FIELDS))
+    try:
+        jobs, next_cursor, _, _ = job_search.fetch_page(query, sort_keys, "newest", limit, skip=skip, cursor=cursor)
+    except job_search.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return jobs
 
 
@@ -239,196 +296,25 @@ def get_all_jobs(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
 @app.post("/api/jobs", response_model=schemas.JobResponseEnhanced)
 def create_job_enhanced(
     job: schemas.JobCreateEnhanced,
-    current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter),
+    current_recruiter: auth.Principal = Depends(auth.get_current_recruiter),
     db: Session = Depends(get_db)
 ):
     """Create a new job posting with enhanced fields"""
-    # Use company_name from recruiter if not provided
-    company_name = job.company_name or current_recruiter.company_name
-    
-    db_job = models.Job(
-        recruiter_id=current_recruiter.id,
-        job_title=job.job_title,
-        company_name=company_name,
-        location_city=job.location_city,
-        location_country=job.location_country,
-        is_remote=job.is_remote,
-        work_type=job.work_type,
-        job_type=job.job_type,
-        experience_level=job.experience_level,
-        min_experience_years=job.min_experience_years,
-        max_experience_years=job.max_experience_years,
-        min_salary=job.min_salary,
-        max_salary=job.max_salary,
-        salary_currency=job.salary_currency,
-        salary_pay_period=job.salary_pay_period,
-        is_salary_visible=job.is_salary_visible,
-        industry=job.industry,
-        jd_text=job.jd_text,
-        skills_required=job.skills_required or [],
-        nice_to_have_skills=job.nice_to_have_skills or [],
-        employment_level=job.employment_level,
-        application_url=job.application_url,
-        application_email=job.application_email,
-        application_deadline=job.application_deadline,
-        status="active",
-        # Legacy fields for backward compatibility
-        title=job.job_title,
-        description=job.jd_text[:500] if len(job.jd_text) > 500 else job.jd_text,
-        location=f"{job.location_city or ''}, {job.location_country or ''}".strip(", "),
-    )
+    db_job = models.Job(**job_import.job_values(job, current_recruiter))
     
     db.add(db_job)
+    db.flush()
+    job_skills.sync_job_skills(db, db_job)
     db.commit()
     db.refresh(db_job)
+    job_embeddings.enqueue([db_job.id])
     return db_job
 
 
-@app.get("/api/jobs/search", response_model=dict)
-def search_jobs(
-    keyword: Optional[str] = Query(None),
-    location_city: Optional[str] = Query(None),
-    location_country: Optional[str] = Query(None),
-    remote_only: Optional[bool] = Query(None),
-    experience_level: Optional[str] = Query(None),  # Comma-separated
-    job_type: Optional[str] = Query(None),  # Comma-separated
-    work_type: Optional[str] = Query(None),  # Comma-separated
-    min_salary: Optional[int] = Query(None),
-    max_salary: Optional[int] = Query(None),
-    industry: Optional[str] = Query(None),  # Comma-separated
-    skills_required: Optional[str] = Query(None),  # Comma-separated
-    posted_within: Optional[str] = Query("any"),  # "1", "7", "30", "any"
-    sort_by: Optional[str] = Query("newest"),  # "newest", "salary_high", "relevance"
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
-):
-    """Search and filter jobs with pagination"""
-    # Include both "active" and "open" status for backward compatibility
-    query = db.query(models.Job).filter(models.Job.status.in_(["active", "open"]))
-    
-    # Keyword search
-    if keyword:
-        keyword_filter = or_(
-            models.Job.job_title.ilike(f"%{keyword}%"),
-            models.Job.company_name.ilike(f"%{keyword}%"),
-            models.Job.jd_text.ilike(f"%{keyword}%"),
-            models.Job.industry.ilike(f"%{keyword}%")
-        )
-        query = query.filter(keyword_filter)
-    
-    # Location filters
-    if location_city:
-        query = query.filter(models.Job.location_city.ilike(f"%{location_city}%"))
-    if location_country:
-        query = query.filter(models.Job.location_country.ilike(f"%{location_country}%"))
-    if remote_only:
-        query = query.filter(models.Job.is_remote == True)
-    
-    # Experience level filter
-    if experience_level:
-        levels = [l.strip() for l in experience_level.split(",")]
-        query = query.filter(models.Job.experience_level.in_(levels))
-    
-    # Job type filter
-    if job_type:
-        types = [t.strip() for t in job_type.split(",")]
-        query = query.filter(models.Job.job_type.in_(types))
-    
-    # Work type filter
-    if work_type:
-        types = [t.strip() for t in work_type.split(",")]
-        query = query.filter(models.Job.work_type.in_(types))
-    
-    # Salary filters
-    if min_salary:
-        query = query.filter(
-            or_(
-                models.Job.max_salary >= min_salary,
-                models.Job.min_salary >= min_salary
-            )
-        )
-    if max_salary:
-        query = query.filter(
-            or_(
-                models.Job.min_salary <= max_salary,
-                models.Job.max_salary <= max_salary
-            )
-        )
-    
-    # Industry filter
-    if industry:
-        industries = [i.strip() for i in industry.split(",")]
-        query = query.filter(models.Job.industry.in_(industries))
-    
-    # Skills filter - simplified for SQLite
-    if skills_required:
-        skills = [s.strip().lower() for s in skills_required.split(",")]
-        # For SQLite, we'll do a simple text search in the JSON array
-        # This is a simplified approach - for production, consider full-text search
-        for skill in skills:
-            query = query.filter(
-                func.lower(func.cast(models.Job.skills_required, String)).contains(skill)
-            )
-    
-    # Posted within filter
-    if posted_within and posted_within != "any":
-        days = int(posted_within)
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(models.Job.created_at >= cutoff_date)
-    
-    # Sorting
-    if sort_by == "salary_high":
-        query = query.order_by(models.Job.max_salary.desc().nulls_last())
-    elif sort_by == "relevance":
-        query = query.order_by(models.Job.created_at.desc())
-    else:  # newest (default)
-        query = query.order_by(models.Job.created_at.desc())
-    
-    # Get total count before pagination
-    total = query.count()
-    
-    # Pagination
-    jobs = query.offset(skip).limit(limit).all()
-    
-    # Ensure old jobs have required fields populated for display
-    for job in jobs:
-        if not job.job_title and job.title:
-            job.job_title = job.title
-        if not job.jd_text and job.description:
-            job.jd_text = job.description
-        if not job.company_name:
-            job.company_name = "Company Not Specified"
-        # Set defaults for new fields if missing
-        if not job.work_type:
-            job.work_type = "onsite"
-        if not job.job_type:
-            job.job_type = "full_time"
-        if job.experience_level is None:
-            job.experience_level = "fresher"
-    
-    return {
-        "jobs": jobs,
-        "total": total,
-        "skip": skip,
-        "limit": limit,
-        "has_more": (skip + limit) < total
-    }
-
-
-@app.get("/api/jobs/{job_id}", response_model=schemas.JobResponseEnhanced)
-def get_job_by_id(job_id: int, db: Session = Depends(get_db)):
-    """Get a single job by ID"""
-    job = db.query(models.Job).filter(models.Job.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
-    return job
-
-
 @app.post("/api/jobs/{job_id}/generate-roadmap")
 def generate_job_roadmap_endpoint(
     job_id: int,
-    current_recruiter: models.Recruiter = Depends(auth.get_current_recruiter),
+    current_recruiter: auth.Principal = Depends(auth.get_current_recruiter),
     db: Session = Depends(get_db)
 ):
     """Generate AI roadmap for a job (recruiter can generate template roadmap)"""
@@ -449,15 +335,15 @@ def generate_job_roadmap_endpoint(
         "soft_skills": [],
         "certifications": [],
         "achievements": [],
-        "target_career": job.job_title or job.title
+        "target_career": job.job_title
     }
     
     # Convert job to dict format
     job_dict = {
         "id": job.id,
-        "job_title": job.job_title or job.title,
+        "job_title": job.job_title,
         "company_name": job.company_name,
-        "jd_text": job.jd_text or job.description or "",
+        "jd_text": job.jd_text,
         "location_city": job.location_city,
         "location_country": job.location_country,
         "work_type": job.work_type,
@@ -489,7 +375,7 @@ def generate_job_roadmap_endpoint(
 @app.post("/api/jobs/{job_id}/generate-roadmap-for-user")
 def generate_job_roadmap_for_user(
     job_id: int,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """Generate personalized AI roadmap for a specific job and user"""
@@ -520,15 +406,15 @@ def generate_job_roadmap_for_user(
         "soft_skills": soft_skills,
         "certifications": profile.certifications or [],
         "achievements": profile.achievements or [],
-        "target_career": job.job_title or job.title or "Software Engineer"
+        "target_career": job.job_title
     }
     
     # Convert job to dict format
     job_dict = {
         "id": job.id,
-        "job_title": job.job_title or job.title,
+        "job_title": job.job_title,
         "company_name": job.company_name,
-        "jd_text": job.jd_text or job.description or "",
+        "jd_text": job.jd_text,
         "location_city": job.location_city,
         "location_country": job.location_country,
         "work_type": job.work_type,
@@ -549,14 +435,14 @@ def generate_job_roadmap_for_user(
     
     return {
         "job_id": job_id,
-        "job_title": job.job_title or job.title,
+        "job_title": job.job_title,
         "roadmap": result.get("roadmap"),
         "message": "Personalized roadmap generated successfully"
     }
 
 
 @app.post("/api/ai/recommend-careers")
-def recommend_careers(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def recommend_careers(current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -575,16 +461,19 @@ def recommend_careers(current_user: models.User = Depends(auth.get_current_user)
 
 
 @app.post("/api/ai/match-jobs")
-def match_jobs(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def match_jobs(current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     """Match jobs from database using user profile and resume"""
     profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found. Please complete your profile first.")
     
-    # Get all active jobs from database
-    jobs_from_db = db.query(models.Job).filter(
-        models.Job.status.in_(["active", "open"])
-    ).all()
+    # Get all active and catalogue jobs from database
+    jobs_from_db = (
+        db.query(models.Job)
+        .options(job_search.load_fields(job_search.MATCH_FIELDS))
+        .filter(job_search.matchable_jobs_filter())
+        .all()
+    )
     
     if not jobs_from_db:
         return {"jobs": [], "message": "No jobs available in the database"}
@@ -639,8 +528,10 @@ def match_jobs(current_user: models.User = Depends(auth.get_current_user), db: S
             detail="Insufficient profile information. Please add skills, upload a resume, or complete your profile."
         )
     
-    # Match jobs from database
-    matched_jobs = ml_service.match_jobs_from_database(combined_text, jobs_from_db, top_k=20)
+    # Match jobs from database, with the stored job vectors; jobs without one are queued for embedding
+    stored_vectors = job_embeddings.stored_vectors(db, [job.id for job in jobs_from_db])
+    job_embeddings.enqueue([job.id for job in jobs_from_db if job.id not in stored_vectors])
+    matched_jobs = ml_service.match_jobs_from_database(combined_text, jobs_from_db, top_k=20, job_vectors=stored_vectors)
     
     if not matched_jobs:
         # Fallback: return jobs sorted by creation date if ML matching fails
@@ -658,7 +549,7 @@ def match_jobs(current_user: models.User = Depends(auth.get_current_user), db: S
 
 
 @app.post("/api/ai/generate-roadmap")
-def generate_roadmap(request: schemas.RoadmapRequest, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def generate_roadmap(request: schemas.RoadmapRequest, current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     """DEPRECATED: This endpoint is deprecated. Use job-based roadmap generation instead."""
     raise HTTPException(
         status_code=410, 
@@ -666,21 +557,17 @@ def generate_roadmap(request: schemas.RoadmapRequest, current_user: models.User
     )
 
 
+MAX_SAVED_ROADMAPS = 3
+
+
 @app.post("/api/roadmaps/save", response_model=schemas.RoadmapResponse)
-def save_roadmap(request: schemas.RoadmapSaveRequest, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    """Save a roadmap. Users can have maximum 3 saved roadmaps. If limit reached, oldest is deleted."""
-    # Get current roadmaps count
-    existing_roadmaps = db.query(models.Roadmap).filter(
-        models.Roadmap.user_id == current_user.id
-    ).order_by(models.Roadmap.created_at.asc()).all()
+def save_roadmap(request: schemas.RoadmapSaveRequest, current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+    """Save a roadmap. Users can have maximum 3 saved roadmaps. If limit reached, the oldest are deleted."""
+    # Saves of the same user run one at a time: on PostgreSQL behind a lock on
+    # the user row; SQLite takes its write lock at the INSERT, before anything is read
+    if db.get_bind().dialect.name != "sqlite":
+        db.execute(select(models.User.id).where(models.User.id == current_user.id).with_for_update())
     
-    # If user has 3 or more roadmaps, delete the oldest one
-    if len(existing_roadmaps) >= 3:
-        oldest_roadmap = existing_roadmaps[0]
-        db.delete(oldest_roadmap)
-        db.commit()
-    
-    # Create new roadmap
     db_roadmap = models.Roadmap(
         user_id=current_user.id,
         title=request.title,
@@ -690,24 +577,68 @@ def save_roadmap(request: schemas.RoadmapSaveRequest, current_user: models.User
         target_career=request.target_career
     )
     db.add(db_roadmap)
+    db.flush()
+    
+    # Keep the newest MAX_SAVED_ROADMAPS, in the same transaction as the insert
+    older = (
+        select(models.Roadmap.id)
+        .where(models.Roadmap.user_id == current_user.id)
+        .order_by(models.Roadmap.created_at.desc(), models.Roadmap.id.desc())
+        .offset(MAX_SAVED_ROADMAPS)
+    )
+    db.execute(
+        delete(models.Roadmap).where(models.Roadmap.id.in_(older)),
+        execution_options={"synchronize_session": False},
+    )
+    saved = schemas.RoadmapResponse.model_validate(db_roadmap)
     db.commit()
-    db.refresh(db_roadmap)
     
-    return db_roadmap
+    return saved
 
 
-@app.get("/api/roadmaps", response_model=List[schemas.RoadmapResponse])
-def get_saved_roadmaps(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
-    """Get all saved roadmaps for the current user (max 3)."""
-    roadmaps = db.query(models.Roadmap).filter(
-        models.Roadmap.user_id == current_user.id
-    ).order_by(models.Roadmap.created_at.desc()).limit(3).all()
+@app.get("/api/roadmaps", response_model=List[schemas.RoadmapSummaryResponse])
+async def get_saved_roadmaps(current_user: auth.Principal = Depends(auth.get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Get summaries of the current user's saved roadmaps (max 3); the documents are not read."""
+    roadmaps = (await db.execute(
+        select(models.Roadmap)
+        .options(defer(models.Roadmap.roadmap_data, raiseload=True))
+        .where(models.Roadmap.user_id == current_user.id)
+        .order_by(models.Roadmap.created_at.desc(), models.Roadmap.id.desc())
+        .limit(MAX_SAVED_ROADMAPS)
+    )).scalars().all()
     
     return roadmaps
 
 
+async def _saved_roadmap(db, roadmap_id, user_id):
+    roadmap = (await db.execute(
+        select(models.Roadmap).where(models.Roadmap.id == roadmap_id, models.Roadmap.user_id == user_id)
+    )).scalars().first()
+    if not roadmap:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+    return roadmap
+
+
+@app.get("/api/roadmaps/{roadmap_id}", response_model=schemas.RoadmapDetailResponse)
+async def get_saved_roadmap(roadmap_id: int, current_user: auth.Principal = Depends(auth.get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """A saved roadmap's summary, role summary and gap analysis, without the phases' tasks."""
+    roadmap = await _saved_roadmap(db, roadmap_id, current_user.id)
+    detail = schemas.RoadmapDetailResponse.model_validate(roadmap)
+    return detail.model_copy(update=roadmap_storage.overview(roadmap.roadmap_data))
+
+
+@app.get("/api/roadmaps/{roadmap_id}/phases/{phase_index}")
+async def get_saved_roadmap_phase(roadmap_id: int, phase_index: int, current_user: auth.Principal = Depends(auth.get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """One phase (0-based index, as in the summary's outline) of a saved roadmap, with its tasks."""
+    roadmap = await _saved_roadmap(db, roadmap_id, current_user.id)
+    phase = roadmap_storage.phase(roadmap.roadmap_data, phase_index)
+    if phase is None:
+        raise HTTPException(status_code=404, detail="Phase not found")
+    return {"roadmap_id": roadmap_id, "index": phase_index, "phase": phase}
+
+
 @app.delete("/api/roadmaps/{roadmap_id}")
-def delete_roadmap(roadmap_id: int, current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def delete_roadmap(roadmap_id: int, current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     """Delete a saved roadmap."""
     roadmap = db.query(models.Roadmap).filter(
         models.Roadmap.id == roadmap_id,
@@ -724,26 +655,34 @@ def delete_roadmap(roadmap_id: int, current_user: models.User = Depends(auth.get
 
 
 @app.post("/api/ai/skill-gap-analysis")
-def skill_gap_analysis(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def skill_gap_analysis(
+    narrative: bool = Query(False, description="Ask Gemini to write the learning path summary"),
+    current_user: auth.Principal = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
     profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
-    
+
     user_skills = (profile.skills or []) + (profile.extracted_skills or [])
     career_recommendations = ml_service.recommend_careers_knn(user_skills, top_k=1)
+    career = career_recommendations[0]['career'] if career_recommendations else None
     required_skills = career_recommendations[0]['required_skills'] if career_recommendations else []
-    
-    gap_analysis = gemini_service.analyze_skill_gap(user_skills, required_skills)
-    
-    # Check for errors
-    if gap_analysis.get("error"):
-        raise HTTPException(status_code=503, detail=gap_analysis["error"])
-    
+
+    # Transferable/missing skills, priorities and learning time are computed locally
+    gap_analysis = skill_gap_engine.analyze_skill_gap(user_skills, required_skills, career)
+
+    # Gemini only writes the narrative; keep the template summary if it fails
+    if narrative and gap_analysis["missing_skills"]:
+        summary = gemini_service.write_skill_gap_summary(career, gap_analysis)
+        if not summary.get("error"):
+            gap_analysis["learning_path_summary"] = summary["summary"]
+
     return gap_analysis
 
 
 @app.post("/api/ai/strengths-weaknesses")
-def strengths_weaknesses(current_user: models.User = Depends(auth.get_current_user), db: Session = Depends(get_db)):
+def strengths_weaknesses(current_user: auth.Principal = Depends(auth.get_current_user), db: Session = Depends(get_db)):
     profile = db.query(models.UserProfile).filter(models.UserProfile.user_id == current_user.id).first()
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -758,16 +697,66 @@ def strengths_weaknesses(current_user: models.User = Depends(auth.get_current_us
 
 
 @app.post("/api/ai/chat")
-def chat(request: schemas.ChatRequest, current_user: models.User = Depends(auth.get_current_user)):
+def chat(request: schemas.ChatRequest, current_user: auth.Principal = Depends(auth.get_current_user)):
     chat_result = gemini_service.chat_with_context(request.message, {"name": current_user.full_name})
     
     # Check for errors
     if chat_result.get("error"):
-        raise HTTPException(status_code=503, detail=chat_result["error"])
+        headers = {"Retry-After": str(chat_result["retry_after"])} if chat_result.get("retry_after") is not None else None
+        raise HTTPException(status_code=503, detail=chat_result["error"], headers=headers)
     
     return {"response": chat_result.get("response", "")}
 
 
+def require_metrics_key(x_metrics_key: Optional[str] = Header(None)):
+    """Only let callers with the X-Metrics-Key header matching METRICS_API_KEY read metrics"""
+    if not metrics.METRICS_API_KEY:
+        raise HTTPException(status_code=403, detail="Metrics are disabled")
+    if not x_metrics_key or not hmac.compare_digest(x_metrics_key, metrics.METRICS_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid metrics key")
+
+
+@app.get("/api/metrics", dependencies=[Depends(require_metrics_key)])
+def get_metrics(format: str = Query("json", pattern="^(json|prometheus)$")):
+    """In-process service metrics (circuit breakers, latencies, ...). Needs the X-Metrics-Key header."""
+    if format == "prometheus":
+        return PlainTextResponse(metrics.render_prometheus())
+    return metrics.snapshot()
+
+
+@app.get("/api/metrics/llm", dependencies=[Depends(require_metrics_key)])
+def get_llm_metrics():
+    """LLM calls, tokens, estimated cost, retries, cache hits and parse failures per call site. Needs the X-Metrics-Key header."""
+    return {"call_sites": llm_client.usage_summary()}
+
+
+@app.get("/api/exports/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    since: Optional[datetime] = None,
+    x_export_key: Optional[str] = Header(None),
+):
+    """
+    Stream a whole table (jobs, roadmaps, profiles) as NDJSON or CSV for
+    analytics, optionally gzipped and limited to rows created since a date.
+    Needs the X-Export-Key header to match EXPORT_API_KEY.
+    """
+    if not exports.EXPORT_API_KEY:
+        raise HTTPException(status_code=403, detail="Exports are disabled")
+    if not x_export_key or not hmac.compare_digest(x_export_key, exports.EXPORT_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid export key")
+    if dataset not in exports.DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset; one of {', '.join(exports.DATASETS)}")
+    
+    return StreamingResponse(
+        exports.stream_export(database.ReadSessionLocal, dataset, format, gzip, since),
+        media_type=exports.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{exports.filename(dataset, format, gzip)}"'},
+    )
+
+
 @app.get("/")
 def root():
     return {"message": "PathFinder AI API", "status": "running"}
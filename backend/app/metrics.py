@@ -0,0 +1,135 @@
+"""
+In-process metrics registry
+Counters, gauges and histograms kept in memory and exposed at /api/metrics
+"""
+import os
+import threading
+from collections import defaultdict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Key required by the HTTP metrics endpoints (unset: the endpoints are disabled)
+METRICS_API_KEY = os.getenv("METRICS_API_KEY", "")
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_histograms = {}
+_collectors = []
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+
+def inc(name, value=1, **labels):
+    """Increment a counter"""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name, value, **labels):
+    """Set a gauge to an absolute value"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels):
+    """Record an observation in a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = {"buckets": buckets, "counts": [0] * len(buckets), "count": 0, "sum": 0.0, "max": 0.0}
+            _histograms[key] = hist
+        for i, bound in enumerate(hist["buckets"]):
+            if value <= bound:
+                hist["counts"][i] += 1
+                break
+        hist["count"] += 1
+        hist["sum"] += value
+        hist["max"] = max(hist["max"], value)
+
+
+def register_collector(fn):
+    """Register a callable that refreshes gauges right before a snapshot is taken"""
+    _collectors.append(fn)
+    return fn
+
+
+def _quantile(hist, q):
+    """Estimate a quantile as the upper bound of the bucket containing it"""
+    if not hist["count"]:
+        return None
+    target = q * hist["count"]
+    seen = 0
+    for bound, count in zip(hist["buckets"], hist["counts"]):
+        seen += count
+        if seen >= target:
+            return bound
+    return hist["max"]
+
+
+def snapshot():
+    """Return all metrics as a JSON-serializable dict"""
+    for collector in list(_collectors):
+        try:
+            collector()
+        except Exception as e:
+            print(f"Warning: metrics collector failed: {e}")
+
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        gauges = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_gauges.items())
+        ]
+        histograms = []
+        for (name, labels), hist in sorted(_histograms.items()):
+            histograms.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": hist["count"],
+                "sum": round(hist["sum"], 6),
+                "avg": round(hist["sum"] / hist["count"], 6) if hist["count"] else None,
+                "p50": _quantile(hist, 0.5),
+                "p95": _quantile(hist, 0.95),
+                "p99": _quantile(hist, 0.99),
+                "max": round(hist["max"], 6),
+                "buckets": dict(zip([str(b) for b in hist["buckets"]], hist["counts"])),
+            })
+
+    return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    """Render the current snapshot in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = []
+    for counter in data["counters"]:
+        lines.append(f"{counter['name']}_total{_format_labels(counter['labels'])} {counter['value']}")
+    for gauge in data["gauges"]:
+        lines.append(f"{gauge['name']}{_format_labels(gauge['labels'])} {gauge['value']}")
+    for hist in data["histograms"]:
+        cumulative = 0
+        for bound, count in hist["buckets"].items():
+            cumulative += count
+            lines.append(f"{hist['name']}_bucket{_format_labels(hist['labels'], {'le': bound})} {cumulative}")
+        lines.append(f"{hist['name']}_bucket{_format_labels(hist['labels'], {'le': '+Inf'})} {hist['count']}")
+        lines.append(f"{hist['name']}_sum{_format_labels(hist['labels'])} {hist['sum']}")
+        lines.append(f"{hist['name']}_count{_format_labels(hist['labels'])} {hist['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,332 @@
+"""
+Schema migrations
+create_all() only creates missing tables, so new columns, indexes and other
+changes to existing tables are made by the numbered migrations below. Each
+one runs once per database and is recorded in the schema_migrations table.
+Pending migrations are applied by `python migrate.py`, which must run before
+the API is started; on startup the API only checks that the schema is up to
+date (set MIGRATE_ON_STARTUP=true to apply them there instead, for a single
+local process only).
+
+A migration must work both on a database that predates it and on one that
+create_all() has just built from the current models (where it usually finds
+its work already done), so every step checks before it changes anything.
+
+Indexes are built online: CREATE INDEX CONCURRENTLY on PostgreSQL; on
+SQLite each index is built in its own short transaction, so readers are not
+blocked and writers only wait for that one index.
+"""
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, LargeBinary, inspect, literal, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from app import models, job_search, job_skills, job_backfill, job_import, roadmap_storage
+
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# (version, name, transactional, function(connection)) in version order
+MIGRATIONS = []
+
+
+class MigrationSkipped(Exception):
+    """Raised by a migration that cannot run yet; it is not recorded and is retried on the next upgrade"""
+
+
+def migration(version, name, transactional=True):
+    """
+    Register a migration. Non-transactional migrations run in autocommit mode
+    (needed for CREATE INDEX CONCURRENTLY) and must be safe to re-run.
+    """
+    def register(fn):
+        MIGRATIONS.append((version, name, transactional, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+# --- Helpers for migrations ---
+
+def existing_columns(conn, table):
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def add_columns(conn, table, names):
+    """
+    Add the named model columns that the table is missing. Columns are added
+    as nullable (SQLite cannot add a NOT NULL column without a default),
+    with the model's scalar default if it has one.
+    """
+    model_table = models.Base.metadata.tables[table]
+    existing = existing_columns(conn, table)
+    for name in names:
+        if name in existing:
+            continue
+        column = model_table.c[name]
+        ddl = f"ALTER TABLE {table} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"
+        if column.default is not None and column.default.is_scalar:
+            default = literal(column.default.arg).compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+            ddl += f" DEFAULT {default}"
+        conn.execute(text(ddl))
+        print(f"✓ Added column: {table}.{name}")
+
+
+def create_index(conn, table, name):
+    """Create the model's index if it does not exist yet"""
+    index = next(i for i in models.Base.metadata.tables[table].indexes if i.name == name)
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    if conn.dialect.name == "postgresql":
+        ddl = ddl.replace(" INDEX", " INDEX CONCURRENTLY", 1)
+    conn.execute(text(ddl))
+    print(f"✓ Index ready: {name}")
+
+
+def drop_index(conn, name):
+    concurrently = " CONCURRENTLY" if conn.dialect.name == "postgresql" else ""
+    conn.execute(text(f"DROP INDEX{concurrently} IF EXISTS {name}"))
+
+
+# --- Migrations ---
+
+@migration(1, "jobs: job board columns")
+def _job_board_columns(conn):
+    """Formerly migrate_job_table.py"""
+    add_columns(conn, "jobs", [
+        "job_title", "company_name", "location_city", "location_country", "is_remote",
+        "work_type", "job_type", "experience_level", "min_experience_years", "max_experience_years",
+        "min_salary", "max_salary", "salary_currency", "salary_pay_period", "is_salary_visible",
+        "jd_text", "nice_to_have_skills", "employment_level", "application_url", "application_email",
+        "application_deadline", "roadmap_json", "updated_at",
+    ])
+    # Carry legacy rows over to the new columns
+    result = conn.execute(text(
+        "UPDATE jobs SET "
+        "job_title = title, "
+        "jd_text = COALESCE(jd_text, description), "
+        "location_city = COALESCE(location_city, location), "
+        "company_name = COALESCE(company_name, "
+        "(SELECT company_name FROM recruiters WHERE recruiters.id = jobs.recruiter_id)) "
+        "WHERE job_title IS NULL AND title IS NOT NULL"
+    ))
+    if result.rowcount:
+        print(f"✓ Migrated {result.rowcount} legacy job(s)")
+
+
+@migration(2, "roadmaps: job roadmap columns")
+def _roadmap_job_columns(conn):
+    """Formerly migrate_roadmap_table.py"""
+    add_columns(conn, "roadmaps", ["job_id", "roadmap_type", "title"])
+    conn.execute(text("UPDATE roadmaps SET roadmap_type = 'career' WHERE roadmap_type IS NULL"))
+
+
+@migration(3, "job skill index")
+def _job_skill_index(conn):
+    models.Base.metadata.create_all(bind=conn, tables=[models.Skill.__table__, models.JobSkill.__table__])
+    db = Session(bind=conn)
+    try:
+        if db.query(models.JobSkill.job_id).first() is None:
+            processed = job_skills.backfill_job_skills(db)
+            if processed:
+                print(f"✓ Indexed skills for {processed} existing job(s)")
+    finally:
+        db.close()
+
+
+@migration(4, "job full-text index")
+def _job_full_text_index(conn):
+    try:
+        with conn.begin_nested():
+            job_search.create_full_text_index(conn)
+    except Exception as e:
+        # e.g. SQLite built without FTS5; keyword search falls back to ILIKE
+        print(f"Warning: Could not create the full-text index: {e}")
+
+
+@migration(5, "jobs: search and recruiter indexes", transactional=False)
+def _job_search_indexes(conn):
+    create_index(conn, "jobs", "idx_jobs_active_created_at")
+    # (idx_jobs_active_salary, created here at first, was replaced by migration 8)
+    create_index(conn, "jobs", "idx_jobs_recruiter_status")
+    # Superseded by the partial indexes above
+    drop_index(conn, "idx_jobs_created_at_id")
+    drop_index(conn, "idx_jobs_salary_sort")
+
+
+@migration(6, "jobs: normalize legacy rows", transactional=False)
+def _normalize_legacy_jobs(conn):
+    # On a large live database run backfill_legacy_jobs.py (throttled) before deploying
+    job_backfill.normalize_legacy_jobs(conn.engine, pause=0)
+
+
+@migration(7, "jobs: require job board columns")
+def _require_job_board_columns(conn):
+    missing = job_backfill.count_missing_required(conn)
+    if missing:
+        raise MigrationSkipped(f"{missing} job(s) have an empty required column; run backfill_legacy_jobs.py")
+
+    columns = job_backfill.REQUIRED_COLUMNS
+    if conn.dialect.name == "postgresql":
+        for column in columns:
+            conn.execute(text(f"ALTER TABLE jobs ALTER COLUMN {column} SET NOT NULL"))
+    elif conn.dialect.name == "sqlite":
+        # SQLite cannot add NOT NULL to an existing column; reject the writes instead
+        missing = " OR ".join(f"NEW.{column} IS NULL" for column in columns)
+        message = f"NOT NULL constraint failed: jobs ({', '.join(columns)})"
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS jobs_require_columns_bi BEFORE INSERT ON jobs "
+            f"WHEN {missing} BEGIN SELECT RAISE(ABORT, '{message}'); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS jobs_require_columns_bu BEFORE UPDATE OF {', '.join(columns)} ON jobs "
+            f"WHEN {missing} BEGIN SELECT RAISE(ABORT, '{message}'); END"
+        ))
+
+
+@migration(8, "jobs: normalized annual salary", transactional=False)
+def _normalized_annual_salary(conn):
+    add_columns(conn, "jobs", ["salary_annual_min_normalized", "salary_annual_max_normalized"])
+    job_backfill.normalize_salaries(conn.engine, pause=0)
+    create_index(conn, "jobs", "idx_jobs_active_salary_annual")
+    create_index(conn, "jobs", "idx_jobs_active_salary_annual_min")
+    drop_index(conn, "idx_jobs_active_salary")
+
+
+@migration(9, "jobs: canonical location ids", transactional=False)
+def _canonical_location_ids(conn):
+    add_columns(conn, "jobs", ["location_city_id", "location_country_code"])
+    job_backfill.normalize_locations(conn.engine, pause=0)
+    create_index(conn, "jobs", "idx_jobs_active_city")
+    create_index(conn, "jobs", "idx_jobs_active_country")
+
+
+@migration(10, "job embeddings table")
+def _job_embeddings_table(conn):
+    # Filled in the background (app/job_embeddings.py), not here
+    models.Base.metadata.create_all(bind=conn, tables=[models.JobEmbedding.__table__])
+
+
+@migration(11, "jobs: dataset source columns", transactional=False)
+def _job_source_columns(conn):
+    add_columns(conn, "jobs", ["source", "source_id"])
+    create_index(conn, "jobs", "idx_jobs_source")
+
+
+@migration(12, "roadmaps: compressed documents and summaries", transactional=False)
+def _compressed_roadmaps(conn):
+    add_columns(conn, "roadmaps", ["summary"])
+    documents = (("roadmaps", "roadmap_data", "summary"), ("jobs", "roadmap_json", None))
+    if conn.dialect.name == "postgresql":
+        # json -> bytea (the JSON text as bytes), then compressed below; rewrites the tables
+        for table, column, _ in documents:
+            current = next(c for c in inspect(conn).get_columns(table) if c["name"] == column)
+            if not isinstance(current["type"], LargeBinary):
+                conn.execute(text(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BYTEA USING convert_to({column}::text, 'UTF8')"
+                ))
+    # SQLite keeps the declared column type and stores the compressed values as blobs
+    for table, column, summary_column in documents:
+        roadmap_storage.compress_stored_roadmaps(conn, table, column, summary_column)
+
+
+@migration(13, "roadmaps: user index", transactional=False)
+def _roadmap_user_index(conn):
+    create_index(conn, "roadmaps", "idx_roadmaps_user_created_at")
+
+
+@migration(14, "jobs: corpus jobs off the job board")
+def _catalogue_corpus_jobs(conn):
+    conn.execute(
+        text("UPDATE jobs SET status = :catalogue WHERE source = :source AND status IN ('active', 'open')"),
+        {"catalogue": models.CATALOGUE_JOB_STATUS, "source": job_import.CORPUS_SOURCE},
+    )
+
+
+# --- Runner ---
+
+def applied_versions(engine):
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        return {row.version: row for row in conn.execute(select(schema_migrations))}
+
+
+def status(engine):
+    """[(version, name, applied_at or None), ...] for every known migration"""
+    applied = applied_versions(engine)
+    return [
+        (version, name, applied[version].applied_at if version in applied else None)
+        for version, name, _, _ in MIGRATIONS
+    ]
+
+
+def verify_schema(engine):
+    """
+    Check, without changing anything, that the database has been migrated.
+    Raises RuntimeError if it never was; warns about pending migrations.
+    """
+    if not inspect(engine).has_table(schema_migrations.name):
+        raise RuntimeError(
+            "Database schema is not initialised; run `python migrate.py` (or set MIGRATE_ON_STARTUP=true)"
+        )
+    with engine.connect() as conn:
+        applied = set(conn.scalars(select(schema_migrations.c.version)))
+    pending = [version for version, _, _, _ in MIGRATIONS if version not in applied]
+    if pending:
+        print(f"Warning: {len(pending)} schema migration(s) pending: {', '.join(f'{v:04d}' for v in pending)}. "
+              f"Run `python migrate.py`.")
+    else:
+        print(f"✓ Database schema is up to date (migration {MIGRATIONS[-1][0]:04d})")
+    return pending
+
+
+def upgrade(engine, target=None):
+    """
+    Apply pending migrations in order, up to target if given. Returns the
+    versions applied; skipped ones (MigrationSkipped) stay pending.
+    """
+    applied = applied_versions(engine)
+    done = []
+    for version, name, transactional, fn in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        started = time.perf_counter()
+        try:
+            if transactional:
+                with engine.begin() as conn:
+                    fn(conn)
+                    _record(conn, version, name)
+            else:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    fn(conn)
+                with engine.begin() as conn:
+                    _record(conn, version, name)
+        except MigrationSkipped as e:
+            print(f"Warning: Skipped migration {version:04d} ({name}): {e}. It will be retried on the next run.")
+            continue
+        except IntegrityError:
+            if version in applied_versions(engine):
+                # Another process applied it first
+                continue
+            raise
+        except Exception as e:
+            print(f"✗ Migration {version:04d} ({name}) failed: {e}")
+            raise
+        print(f"✓ Applied migration {version:04d}: {name} ({time.perf_counter() - started:.2f}s)")
+        done.append(version)
+    return done
+
+
+def _record(conn, version, name):
+    conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
@@ -63,39 +63,38 @@ def recommend_careers_knn(user_skills, top_k=5):
         return []
 
 
-def match_jobs_doc2vec(resume_text, top_k=10):
-    """Match jobs using Doc2Vec (legacy - uses pre-trained job vectors)"""
-    if not DOC2VEC_MODEL:
-        return []
+def job_document(job):
+    """Text of a job that its Doc2Vec vector is inferred from"""
+    job_text_parts = []
     
-    try:
-        resume_tokens = simple_preprocess(resume_text, deacc=True, min_len=2, max_len=15)
-        resume_vector = DOC2VEC_MODEL.infer_vector(resume_tokens, epochs=20)
-        resume_vector = resume_vector.reshape(1, -1)
-        
-        similarities = cosine_similarity(resume_vector, JOB_VECTORS)[0]
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
-        results = []
-        for idx in top_indices:
-            job = JOB_METADATA.iloc[idx]
-            results.append({
-                'job_id': int(job['ID_num']),
-                'job_title': job['job_title'],
-                'description': job['Short_description'],
-                'skills_required': job['Skills_required'],
-                'industry': job['Industry'],
-                'pay_grade': job['Pay_grade'],
-                'match_score': round(float(similarities[idx]) * 100, 2)
-            })
-        
-        return results
-    except Exception as e:
-        print(f"Error in Doc2Vec matching: {e}")
-        return []
+    job_text_parts.append(job.job_title)
+    job_text_parts.append(job.jd_text)
+    if job.skills_required:
+        if isinstance(job.skills_required, list):
+            job_text_parts.append(" ".join(job.skills_required))
+        else:
+            job_text_parts.append(str(job.skills_required))
+    if job.nice_to_have_skills:
+        if isinstance(job.nice_to_have_skills, list):
+            job_text_parts.append(" ".join(job.nice_to_have_skills))
+    if job.industry:
+        job_text_parts.append(job.industry)
+    if job.experience_level:
+        job_text_parts.append(job.experience_level)
+    
+    return " ".join(part for part in job_text_parts if part)
 
 
-def match_jobs_from_database(resume_text, jobs_from_db, top_k=10):
+def embed_documents(texts):
+    """Doc2Vec vectors of texts as a float32 array (len(texts) x vector size)"""
+    vectors = np.zeros((len(texts), DOC2VEC_MODEL.vector_size), dtype=np.float32)
+    for i, text in enumerate(texts):
+        tokens = simple_preprocess(text, deacc=True, min_len=2, max_len=15)
+        vectors[i] = DOC2VEC_MODEL.infer_vector(tokens, epochs=20)
+    return vectors
+
+
+def match_jobs_from_database(resume_text, jobs_from_db, top_k=10, job_vectors=None):
     """
     Match jobs from database using Doc2Vec
     
@@ -103,6 +102,8 @@ def match_jobs_from_database(resume_text, jobs_from_db, top_k=10):
         resume_text: Combined text from user profile and resume
         jobs_from_db: List of Job model objects from database
         top_k: Number of top matches to return
+        job_vectors: Stored vectors by job id (see job_embeddings.py); the
+            vectors of other jobs are inferred here
     
     Returns:
         List of matched jobs with match scores
@@ -120,34 +121,10 @@ def match_jobs_from_database(resume_text, jobs_from_db, top_k=10):
         resume_vector = DOC2VEC_MODEL.infer_vector(resume_tokens, epochs=20)
         resume_vector = resume_vector.reshape(1, -1)
         
-        # Create embeddings for all jobs in database
         job_texts = []
         job_objects = []
-        
         for job in jobs_from_db:
-            # Combine job information into a single text
-            job_text_parts = []
-            
-            if job.job_title:
-                job_text_parts.append(job.job_title)
-            if job.jd_text:
-                job_text_parts.append(job.jd_text)
-            elif job.description:
-                job_text_parts.append(job.description)
-            if job.skills_required:
-                if isinstance(job.skills_required, list):
-                    job_text_parts.append(" ".join(job.skills_required))
-                else:
-                    job_text_parts.append(str(job.skills_required))
-            if job.nice_to_have_skills:
-                if isinstance(job.nice_to_have_skills, list):
-                    job_text_parts.append(" ".join(job.nice_to_have_skills))
-            if job.industry:
-                job_text_parts.append(job.industry)
-            if job.experience_level:
-                job_text_parts.append(job.experience_level)
-            
-            job_text = " ".join(job_text_parts)
+            job_text = job_document(job)
             if job_text.strip():
                 job_texts.append(job_text)
                 job_objects.append(job)
@@ -155,14 +132,14 @@ def match_jobs_from_database(resume_text, jobs_from_db, top_k=10):
         if not job_texts:
             return []
         
-        # Create embeddings for all jobs
-        job_vectors = []
-        for job_text in job_texts:
-            job_tokens = simple_preprocess(job_text, deacc=True, min_len=2, max_len=15)
-            job_vector = DOC2VEC_MODEL.infer_vector(job_tokens, epochs=20)
-            job_vectors.append(job_vector)
-        
-        job_vectors = np.array(job_vectors)
+        # Embeddings for all jobs: stored where available, inferred for the rest
+        stored = job_vectors or {}
+        missing = [i for i, job in enumerate(job_objects) if job.id not in stored]
+        inferred = dict(zip(missing, embed_documents([job_texts[i] for i in missing])))
+        job_vectors = np.array([
+            stored[job.id] if job.id in stored else inferred[i]
+            for i, job in enumerate(job_objects)
+        ])
         
         # Calculate similarity scores
         similarities = cosine_similarity(resume_vector, job_vectors)[0]
@@ -194,16 +171,16 @@ def match_jobs_from_database(resume_text, jobs_from_db, top_k=10):
             
             results.append({
                 'job_id': job.id,
-                'job_title': job.job_title or job.title or 'Untitled Job',
-                'company_name': job.company_name or 'Company Not Specified',
-                'description': (job.jd_text or job.description or '')[:200] + '...' if (job.jd_text or job.description) else '',
-                'jd_text': job.jd_text or job.description or '',
+                'job_title': job.job_title,
+                'company_name': job.company_name,
+                'description': job.jd_text[:200] + '...' if job.jd_text else '',
+                'jd_text': job.jd_text,
                 'skills_required': job.skills_required if isinstance(job.skills_required, list) else ([] if not job.skills_required else [str(job.skills_required)]),
                 'nice_to_have_skills': job.nice_to_have_skills if isinstance(job.nice_to_have_skills, list) else [],
                 'industry': job.industry,
                 'location_city': job.location_city,
                 'location_country': job.location_country,
-                'is_remote': job.is_remote or False,
+                'is_remote': job.is_remote,
                 'work_type': job.work_type,
                 'job_type': job.job_type,
                 'experience_level': job.experience_level,
@@ -217,8 +194,8 @@ def match_jobs_from_database(resume_text, jobs_from_db, top_k=10):
                 # Legacy fields for backward compatibility
                 'location': f"{job.location_city or ''}, {job.location_country or ''}".strip(", ") or None,
                 'salary': job.salary if hasattr(job, 'salary') else None,
-                'title': job.job_title or job.title,
-                'Short_description': (job.jd_text or job.description or '')[:200],  # For legacy compatibility
+                'title': job.job_title,
+                'Short_description': job.jd_text[:200],  # For legacy compatibility
                 'Skills_required': job.skills_required if isinstance(job.skills_required, list) else ([] if not job.skills_required else [str(job.skills_required)]),
                 'Industry': job.industry,
                 'Pay_grade': None  # Not available in new schema
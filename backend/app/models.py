@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, Text, DateTime, ForeignKey, Boolean, Date
+from sqlalchemy import Column, Integer, String, Float, JSON, Text, DateTime, ForeignKey, Boolean, Date, Index, LargeBinary, func, literal_column, text, event
 from sqlalchemy.orm import relationship
+from sqlalchemy import inspect as inspect_state
 from datetime import datetime
 from app.database import Base
+from app import salary, locations
+from app.roadmap_storage import CompressedJSON, summarize
 
 
 class User(Base):
@@ -56,6 +59,13 @@ class Recruiter(Base):
     jobs = relationship("Job", back_populates="recruiter")
 
 
+# Jobs listed on the job board ("open" is the legacy spelling of "active")
+ACTIVE_JOB_STATUSES = ("active", "open")
+ACTIVE_JOBS_WHERE = text("status IN ('active', 'open')")
+# Job corpus entries (see job_import.import_corpus): matched against profiles, never listed
+CATALOGUE_JOB_STATUS = "catalogue"
+
+
 class Job(Base):
     __tablename__ = "jobs"
     
@@ -69,12 +79,15 @@ class Job(Base):
     # Location
     location_city = Column(String, nullable=True)
     location_country = Column(String, nullable=True)
+    # Canonical ids of the city / country, set on every write (see app/locations.py)
+    location_city_id = Column(String, nullable=True)
+    location_country_code = Column(String, nullable=True)
     is_remote = Column(Boolean, default=False)
-    work_type = Column(String, default="onsite")  # onsite, remote, hybrid
+    work_type = Column(String, default="onsite", nullable=False)  # onsite, remote, hybrid
     
     # Job Type & Experience
-    job_type = Column(String, default="full_time")  # full_time, part_time, internship, contract, freelance
-    experience_level = Column(String, default="fresher")  # fresher, junior, mid, senior, lead
+    job_type = Column(String, default="full_time", nullable=False)  # full_time, part_time, internship, contract, freelance
+    experience_level = Column(String, default="fresher", nullable=False)  # fresher, junior, mid, senior, lead
     min_experience_years = Column(Integer, nullable=True)
     max_experience_years = Column(Integer, nullable=True)
     employment_level = Column(String, nullable=True)  # entry_level, mid_level, senior_level
@@ -85,6 +98,9 @@ class Job(Base):
     salary_currency = Column(String, default="INR")
     salary_pay_period = Column(String, default="year")  # year, month, hour, fixed
     is_salary_visible = Column(Boolean, default=True)
+    # Annual INR equivalents of min/max_salary, set on every write (see app/salary.py)
+    salary_annual_min_normalized = Column(Integer, nullable=True)
+    salary_annual_max_normalized = Column(Integer, nullable=True)
     
     # Job Details
     industry = Column(String, nullable=True)
@@ -99,7 +115,7 @@ class Job(Base):
     
     # Status & Metadata
     status = Column(String, default="active")  # active, closed, draft
-    roadmap_json = Column(JSON, nullable=True)  # For AI-generated roadmap
+    roadmap_json = Column(CompressedJSON, nullable=True)  # For AI-generated roadmap
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -109,7 +125,89 @@ class Job(Base):
     location = Column(String, nullable=True)  # Legacy location field
     salary = Column(String, nullable=True)  # Legacy salary field
     
+    # Jobs loaded from a dataset rather than posted by a recruiter (see job_import.import_corpus)
+    source = Column(String, nullable=True)
+    source_id = Column(String, nullable=True)
+    
     recruiter = relationship("Recruiter", back_populates="jobs")
+    
+    __table_args__ = (
+        # Job board listing / keyset pagination for the "newest" sort order.
+        # Partial: only listed jobs are indexed, so queries must filter on
+        # status with literal values (see job_search.active_jobs_filter).
+        Index(
+            "idx_jobs_active_created_at", "created_at", "id",
+            sqlite_where=ACTIVE_JOBS_WHERE, postgresql_where=ACTIVE_JOBS_WHERE
+        ),
+        # Location filters, newest first
+        Index(
+            "idx_jobs_active_city", "location_city_id", "created_at", "id",
+            sqlite_where=ACTIVE_JOBS_WHERE, postgresql_where=ACTIVE_JOBS_WHERE
+        ),
+        Index(
+            "idx_jobs_active_country", "location_country_code", "created_at", "id",
+            sqlite_where=ACTIVE_JOBS_WHERE, postgresql_where=ACTIVE_JOBS_WHERE
+        ),
+        # Recruiter dashboards
+        Index("idx_jobs_recruiter_status", "recruiter_id", "status"),
+        # Each dataset row is loaded once
+        Index("idx_jobs_source", "source", "source_id", unique=True),
+    )
+
+
+# Sort key for "salary_high" and the "at least" salary filter: jobs without a salary sort last
+SALARY_SORT_KEY = func.coalesce(Job.salary_annual_max_normalized, literal_column("-1"))
+Index(
+    "idx_jobs_active_salary_annual", SALARY_SORT_KEY, Job.id,
+    sqlite_where=ACTIVE_JOBS_WHERE, postgresql_where=ACTIVE_JOBS_WHERE
+)
+# "Up to" salary filter
+Index(
+    "idx_jobs_active_salary_annual_min", Job.salary_annual_min_normalized,
+    sqlite_where=ACTIVE_JOBS_WHERE, postgresql_where=ACTIVE_JOBS_WHERE
+)
+
+
+@event.listens_for(Job, "before_insert")
+@event.listens_for(Job, "before_update")
+def _normalize_salary(mapper, connection, job):
+    salary.set_normalized_salary(job)
+
+
+@event.listens_for(Job, "before_insert")
+@event.listens_for(Job, "before_update")
+def _normalize_location(mapper, connection, job):
+    locations.set_job_location(job)
+
+
+class Skill(Base):
+    __tablename__ = "skills"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)  # Normalized (lowercase) skill name
+    display_name = Column(String, nullable=False)  # Spelling as first posted
+
+
+class JobSkill(Base):
+    """Normalized job -> required skill association (mirrors Job.skills_required)"""
+    __tablename__ = "job_skills"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id"), primary_key=True)
+    
+    __table_args__ = (
+        Index("idx_job_skills_skill_id", "skill_id", "job_id"),
+    )
+
+
+class JobEmbedding(Base):
+    """Stored document vector of a job for job matching (see app/job_embeddings.py)"""
+    __tablename__ = "job_embeddings"
+    
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String, nullable=False)
+    vector = Column(LargeBinary, nullable=False)  # float32 array
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 
 class Roadmap(Base):
@@ -118,7 +216,9 @@ class Roadmap(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     target_career = Column(String, nullable=True)  # For career-based roadmaps
-    roadmap_data = Column(JSON)
+    roadmap_data = Column(CompressedJSON)
+    # Role title and phase outline of roadmap_data, set on every write (see app/roadmap_storage.py)
+    summary = Column(JSON, nullable=True)
     selected_variant = Column(Integer, nullable=True)
     feedback_rating = Column(Integer, nullable=True)
     # New fields for job-based roadmaps
@@ -127,4 +227,16 @@ class Roadmap(Base):
     title = Column(String, nullable=True)  # Display title for the roadmap
     created_at = Column(DateTime, default=datetime.utcnow)
     
-    user = relationship("User", back_populates="roadmaps")
\ No newline at end of file
+    user = relationship("User", back_populates="roadmaps")
+    
+    __table_args__ = (
+        # Saved roadmaps of a user, newest first (and trimming the oldest on save)
+        Index("idx_roadmaps_user_created_at", "user_id", "created_at"),
+    )
+
+
+@event.listens_for(Roadmap, "before_insert")
+@event.listens_for(Roadmap, "before_update")
+def _summarize_roadmap(mapper, connection, roadmap):
+    if inspect_state(roadmap).attrs.roadmap_data.history.has_changes():
+        roadmap.summary = summarize(roadmap.roadmap_data)
@@ -0,0 +1,135 @@
+"""
+Password hashing
+Passwords are hashed and verified on a small dedicated thread pool, so a
+burst of logins queues there instead of occupying the request threadpool.
+Hashes made with an older scheme (legacy salted SHA-256, bcrypt) are
+replaced with PASSWORD_HASH_SCHEME the next time their owner logs in.
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app import metrics
+
+# New hashes use this scheme (argon2 needs argon2-cffi); the others are still accepted and upgraded on login
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "pbkdf2_sha256")
+# Work factor of the scheme (0: the default below)
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "0"))
+DEFAULT_ROUNDS = {"pbkdf2_sha256": 600000, "bcrypt": 12}
+
+# Hashing is CPU-bound: a couple of workers, and a bounded queue in front of them
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+HASH_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LEGACY_SHA256_PREFIX = "sha256$"
+
+
+def _context():
+    schemes = [PASSWORD_HASH_SCHEME] + [s for s in ("pbkdf2_sha256", "bcrypt") if s != PASSWORD_HASH_SCHEME]
+    settings = {}
+    rounds = PASSWORD_HASH_ROUNDS or DEFAULT_ROUNDS.get(PASSWORD_HASH_SCHEME)
+    if rounds:
+        settings[f"{PASSWORD_HASH_SCHEME}__rounds"] = rounds
+    # "auto": every scheme but the first needs an update
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
+pwd_context = _context()
+
+
+def _verify_legacy_sha256(password, hashed):
+    parts = hashed.split("$")
+    if len(parts) != 3:
+        return False
+    _, salt, stored_hash = parts
+    computed_hash = hashlib.sha256((password + salt).encode()).hexdigest()
+    return hmac.compare_digest(computed_hash, stored_hash)
+
+
+def hash_password(password):
+    return pwd_context.hash(password)
+
+
+def verify_and_update(password, hashed):
+    """
+    (matches, new hash or None). The new hash is set when the password
+    matches but hashed uses an outdated scheme or work factor.
+    """
+    if not hashed:
+        return False, None
+    if hashed.startswith(LEGACY_SHA256_PREFIX):
+        if not _verify_legacy_sha256(password, hashed):
+            return False, None
+        return True, hash_password(password)
+
+    # bcrypt only looks at the first 72 bytes; longer passwords never matched here
+    if hashed.startswith("$2") and len(password.encode("utf-8")) > 72:
+        return False, None
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except ValueError:
+        # Not a hash this context knows
+        return False, None
+
+
+class HashPoolFull(Exception):
+    """Raised when too many hash operations are already queued"""
+
+
+class HashPool:
+    """Fixed-size thread pool with a bounded queue, timing each job's wait and run"""
+
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        metrics.register_collector(self._collect)
+
+    def submit(self, fn, *args):
+        """Queue fn(*args); returns a concurrent.futures.Future. Raises HashPoolFull when the queue is full."""
+        with self._lock:
+            if self._pending >= self.capacity:
+                metrics.inc("password_hash_rejected", op=fn.__name__)
+                raise HashPoolFull(f"{self._pending} password hash operations already queued")
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            metrics.observe("password_hash_queue_seconds", started - submitted, buckets=HASH_BUCKETS)
+            try:
+                return fn(*args)
+            finally:
+                metrics.observe("password_hash_seconds", time.perf_counter() - started, buckets=HASH_BUCKETS, op=fn.__name__)
+                with self._lock:
+                    self._pending -= 1
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            # Executor shut down
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    async def run(self, fn, *args):
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _collect(self):
+        with self._lock:
+            pending = self._pending
+        metrics.set_gauge("password_hash_running", min(pending, self.workers))
+        metrics.set_gauge("password_hash_queued", max(pending - self.workers, 0))
+
+
+pool = HashPool()
@@ -0,0 +1,186 @@
+"""
+Roadmap storage
+Generated roadmaps are multi-kilobyte JSON documents, saved by users
+(roadmaps.roadmap_data) and by recruiters as job templates
+(jobs.roadmap_json). CompressedJSON stores them compressed, behind a short
+header naming the format version:
+
+    b"PFZ" + version byte + payload
+    version 1: zlib (DEFLATE)
+    version 2: zstd (needs the zstandard package)
+
+New documents use ROADMAP_COMPRESSION ("zlib" or "zstd"). Values written
+before compression (JSON text, or bytes without the header) are still read,
+and compress_stored_roadmaps() rewrites them.
+
+summarize() keeps the part of a roadmap that lists and outlines need
+(roadmaps.summary), so the saved roadmaps list never reads the documents;
+phase() serves one phase of a document at a time.
+"""
+import json
+import os
+import zlib
+
+from sqlalchemy import JSON, LargeBinary, bindparam, text
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ROADMAP_COMPRESSION = os.getenv("ROADMAP_COMPRESSION", "zlib")
+
+MAGIC = b"PFZ"
+ZLIB_FORMAT = 1
+ZSTD_FORMAT = 2
+FORMATS = {"zlib": ZLIB_FORMAT, "zstd": ZSTD_FORMAT}
+
+
+def _write_format():
+    if ROADMAP_COMPRESSION == "zstd" and zstandard is None:
+        print("Warning: ROADMAP_COMPRESSION=zstd needs the zstandard package; using zlib")
+        return ZLIB_FORMAT
+    return FORMATS.get(ROADMAP_COMPRESSION, ZLIB_FORMAT)
+
+
+WRITE_FORMAT = _write_format()
+
+
+def encode(document):
+    """Compressed bytes of a JSON document"""
+    data = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    if WRITE_FORMAT == ZSTD_FORMAT:
+        payload = zstandard.ZstdCompressor(level=6).compress(data)
+    else:
+        payload = zlib.compress(data, 6)
+    return MAGIC + bytes([WRITE_FORMAT]) + payload
+
+
+def decode(value):
+    """JSON document from encode()'s bytes, or from uncompressed JSON (text or bytes)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return json.loads(value)
+    value = bytes(value)
+    if not value.startswith(MAGIC):
+        return json.loads(value)
+    version, payload = value[len(MAGIC)], value[len(MAGIC) + 1:]
+    if version == ZLIB_FORMAT:
+        data = zlib.decompress(payload)
+    elif version == ZSTD_FORMAT:
+        if zstandard is None:
+            raise ValueError("roadmap stored with zstd; install the zstandard package to read it")
+        data = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        raise ValueError(f"unknown roadmap storage format {version}")
+    return json.loads(data)
+
+
+def is_compressed(value):
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(MAGIC)]) == MAGIC
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON document stored compressed (see encode / decode)"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else encode(value)
+
+    def process_result_value(self, value, dialect):
+        return decode(value)
+
+
+# --- Summaries and phases ---
+
+def _phases(document):
+    roadmap = document.get("roadmap") if isinstance(document, dict) else None
+    phases = roadmap.get("phases") if isinstance(roadmap, dict) else None
+    return phases if isinstance(phases, list) else []
+
+
+def summarize(document):
+    """Role title and phase outline of a roadmap document (no tasks)"""
+    if not isinstance(document, dict):
+        return None
+    role_summary = document.get("role_summary") if isinstance(document.get("role_summary"), dict) else {}
+    outline = []
+    for index, phase in enumerate(_phases(document)):
+        if not isinstance(phase, dict):
+            continue
+        tasks = phase.get("tasks") if isinstance(phase.get("tasks"), list) else []
+        outline.append({
+            "index": index,
+            "phase_id": phase.get("phase_id", index + 1),
+            "phase_name": phase.get("phase_name"),
+            "goal": phase.get("goal"),
+            "estimated_duration_weeks": phase.get("estimated_duration_weeks"),
+            "task_count": len(tasks),
+        })
+    weeks = [p["estimated_duration_weeks"] for p in outline if isinstance(p["estimated_duration_weeks"], (int, float))]
+    return {
+        "role_title": role_summary.get("title"),
+        "phase_count": len(outline),
+        "task_count": sum(p["task_count"] for p in outline),
+        "total_weeks": sum(weeks) if weeks else None,
+        "phases": outline,
+    }
+
+
+def overview(document):
+    """Everything in a roadmap document except the phases' tasks"""
+    document = document if isinstance(document, dict) else {}
+    return {
+        "role_summary": document.get("role_summary"),
+        "gap_analysis": document.get("gap_analysis"),
+    }
+
+
+def phase(document, index):
+    """Phase index (0-based) of a roadmap document, or None"""
+    phases = _phases(document)
+    if 0 <= index < len(phases) and isinstance(phases[index], dict):
+        return phases[index]
+    return None
+
+
+# --- Backfill ---
+
+def compress_stored_roadmaps(conn, table, column, summary_column=None, batch_size=200):
+    """
+    Compress the uncompressed documents in table.column (and fill
+    summary_column), batch_size rows per statement. Returns the number of
+    rows rewritten. Used by the migrations, on an autocommit connection.
+    """
+    assignments = f"{column} = :document" + (f", {summary_column} = :summary" if summary_column else "")
+    update = text(f"UPDATE {table} SET {assignments} WHERE id = :row_id").bindparams(
+        bindparam("document", type_=CompressedJSON()),
+        *([bindparam("summary", type_=JSON())] if summary_column else []),
+    )
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            f"SELECT id, {column} AS document FROM {table} "
+            f"WHERE id > :last_id AND {column} IS NOT NULL ORDER BY id LIMIT :limit"
+        ), {"last_id": last_id, "limit": batch_size}).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        changes = []
+        for row in rows:
+            if is_compressed(row.document):
+                continue
+            document = decode(row.document)
+            change = {"row_id": row.id, "document": document}
+            if summary_column:
+                change["summary"] = summarize(document)
+            changes.append(change)
+        if changes:
+            conn.execute(update, changes)
+            rewritten += len(changes)
+            print(f"✓ Compressed {len(changes)} {table}.{column} value(s) up to id {last_id}")
+    return rewritten
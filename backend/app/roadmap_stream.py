@@ -0,0 +1,174 @@
+"""
+Incremental JSON parser for streamed roadmap responses.
+
+Consumes the Gemini token stream chunk by chunk and emits the roadmap
+sections (role_summary, gap_analysis, each roadmap phase) as soon as they
+are complete, so they can be forwarded to the client before the whole
+response has arrived. If the stream is truncated, the completed sections
+can still be salvaged into a partial roadmap.
+"""
+import json
+
+# Top-level sections emitted as soon as their object closes
+SECTION_PATHS = {
+    ("role_summary",): "role_summary",
+    ("gap_analysis",): "gap_analysis",
+}
+PHASES_PATH = ("roadmap", "phases")
+
+
+class RoadmapStreamParser:
+    """Character-level JSON scanner that tracks the path of every open container.
+
+    Text before the first '{' (e.g. a ```json fence) and after the root object
+    closes is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.role_summary = None
+        self.gap_analysis = None
+        self.phases = []
+        self.roadmap = None
+        self.done = False
+
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        # Each frame: {"kind", "path", "start", "key", "expect_key", "index"}
+        self._stack = []
+
+    def feed(self, chunk):
+        """Consume a chunk of text and return the list of events it completed.
+
+        Events are (name, value) tuples where name is "role_summary",
+        "gap_analysis", "phase" or "complete".
+        """
+        if self.done or not chunk:
+            return []
+
+        self.text += chunk
+        events = []
+        text = self.text
+
+        while self._pos < len(text):
+            ch = text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._close_string()
+            elif not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._open("object")
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch in "{[":
+                self._open("object" if ch == "{" else "array")
+            elif ch in "}]":
+                event = self._close()
+                if event:
+                    events.append(event)
+                if not self._stack:
+                    self.done = True
+                    self._pos += 1
+                    break
+            elif ch == ":":
+                if self._stack and self._stack[-1]["kind"] == "object":
+                    self._stack[-1]["expect_key"] = False
+            elif ch == ",":
+                if self._stack:
+                    frame = self._stack[-1]
+                    if frame["kind"] == "object":
+                        frame["expect_key"] = True
+                    else:
+                        frame["index"] += 1
+
+            self._pos += 1
+
+        return events
+
+    def result(self):
+        """Return (roadmap, truncated) once the stream has ended.
+
+        When the root object never closed (or failed to parse), a partial
+        roadmap is assembled from the sections completed so far. Returns
+        (None, True) if nothing could be salvaged.
+        """
+        if self.roadmap is not None:
+            return self.roadmap, False
+
+        if self.role_summary is None and self.gap_analysis is None and not self.phases:
+            return None, True
+
+        partial = {}
+        if self.role_summary is not None:
+            partial["role_summary"] = self.role_summary
+        if self.gap_analysis is not None:
+            partial["gap_analysis"] = self.gap_analysis
+        partial["roadmap"] = {"phases": list(self.phases)}
+        return partial, True
+
+    def _child_path(self):
+        if not self._stack:
+            return ()
+        parent = self._stack[-1]
+        if parent["kind"] == "object":
+            return parent["path"] + (parent["key"],)
+        return parent["path"] + (parent["index"],)
+
+    def _open(self, kind):
+        self._stack.append({
+            "kind": kind,
+            "path": self._child_path(),
+            "start": self._pos,
+            "key": None,
+            "expect_key": True,
+            "index": 0,
+        })
+
+    def _close_string(self):
+        frame = self._stack[-1] if self._stack else None
+        if frame and frame["kind"] == "object" and frame["expect_key"]:
+            try:
+                frame["key"] = json.loads(self.text[self._string_start:self._pos + 1])
+            except ValueError:
+                frame["key"] = None
+
+    def _close(self):
+        if not self._stack:
+            return None
+        frame = self._stack.pop()
+        path = frame["path"]
+
+        is_section = path in SECTION_PATHS
+        is_phase = len(path) == 3 and path[:2] == PHASES_PATH and frame["kind"] == "object"
+        is_root = not self._stack
+        if not (is_section or is_phase or is_root):
+            return None
+
+        try:
+            value = json.loads(self.text[frame["start"]:self._pos + 1])
+        except ValueError:
+            return None
+
+        if is_root:
+            if not isinstance(value, dict):
+                return None
+            self.roadmap = value
+            return ("complete", value)
+        if is_phase:
+            self.phases.append(value)
+            return ("phase", value)
+
+        name = SECTION_PATHS[path]
+        setattr(self, name, value)
+        return (name, value)
@@ -0,0 +1,61 @@
+"""
+Salary normalization
+Jobs post salaries in their own currency and pay period. To compare them,
+every job also stores its range as annual INR in
+salary_annual_min_normalized / salary_annual_max_normalized, which the
+search filters, the "highest salary" sort and the salary facets use.
+
+The conversion table is local and approximate; it only has to rank and
+filter jobs sensibly, not price them. Salaries in a currency missing from
+the table are left unnormalized (they don't match salary filters and sort
+last) rather than being compared as if they were INR.
+"""
+
+# INR per unit of currency (approximate)
+INR_PER_UNIT = {
+    "INR": 1.0,
+    "USD": 83.0,
+    "EUR": 90.0,
+    "GBP": 105.0,
+    "AED": 22.6,
+    "SGD": 62.0,
+    "CAD": 61.0,
+    "AUD": 55.0,
+}
+
+# Pay periods per year; "fixed" (a one-off contract amount) is taken as is
+PERIODS_PER_YEAR = {
+    "year": 1,
+    "month": 12,
+    "week": 52,
+    "day": 260,
+    "hour": 2080,
+    "fixed": 1,
+}
+
+
+def annualize(amount, currency="INR", pay_period="year"):
+    """amount per pay_period in currency, as annual INR; None if it cannot be converted"""
+    if amount is None:
+        return None
+    rate = INR_PER_UNIT.get((currency or "INR").strip().upper())
+    periods = PERIODS_PER_YEAR.get((pay_period or "year").strip().lower())
+    if rate is None or periods is None:
+        return None
+    return int(round(amount * rate * periods))
+
+
+def normalized_range(min_salary, max_salary, currency="INR", pay_period="year"):
+    """
+    (annual min, annual max) in INR. A one-sided range is used for both ends,
+    so "at least X" and "up to Y" filters work on either column alone.
+    """
+    low = min_salary if min_salary is not None else max_salary
+    high = max_salary if max_salary is not None else min_salary
+    return annualize(low, currency, pay_period), annualize(high, currency, pay_period)
+
+
+def set_normalized_salary(job):
+    job.salary_annual_min_normalized, job.salary_annual_max_normalized = normalized_range(
+        job.min_salary, job.max_salary, job.salary_currency, job.salary_pay_period
+    )
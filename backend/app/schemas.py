@@ -110,7 +110,7 @@ class JobUpdate(BaseModel):
 
 class JobResponse(BaseModel):
     id: int
-    recruiter_id: int
+    recruiter_id: Optional[int]  # None for catalogue jobs (see job_import.import_corpus)
     title: str
     description: str
     skills_required: List[str]
@@ -180,11 +180,13 @@ class JobUpdateEnhanced(BaseModel):
 
 class JobResponseEnhanced(BaseModel):
     id: int
-    recruiter_id: int
+    recruiter_id: Optional[int]  # None for catalogue jobs (see job_import.import_corpus)
     job_title: str
     company_name: str
     location_city: Optional[str]
     location_country: Optional[str]
+    location_city_id: Optional[str] = None
+    location_country_code: Optional[str] = None
     is_remote: bool
     work_type: str
     job_type: str
@@ -207,7 +209,7 @@ class JobResponseEnhanced(BaseModel):
     status: str
     roadmap_json: Optional[dict] = None
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None  # Not set on jobs that predate the column
     
     class Config:
         from_attributes = True
@@ -274,4 +276,25 @@ class RoadmapResponse(BaseModel):
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class RoadmapSummaryResponse(BaseModel):
+    """A saved roadmap without its document: summary holds the role title and phase outline"""
+    id: int
+    user_id: int
+    title: Optional[str]
+    target_career: Optional[str]
+    job_id: Optional[int]
+    roadmap_type: str
+    created_at: datetime
+    summary: Optional[dict] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class RoadmapDetailResponse(RoadmapSummaryResponse):
+    """Summary plus role summary and gap analysis; phases are fetched one at a time"""
+    role_summary: Optional[dict] = None
+    gap_analysis: Optional[dict] = None
@@ -0,0 +1,254 @@
+"""
+Local Skill Gap Engine
+Computes transferable/missing skills, priorities and learning time estimates
+from a precomputed skill metadata table instead of asking the LLM to diff
+two skill lists. Runs in milliseconds.
+
+The table is loaded from ml_models/skill_metadata.json (written by
+build_skill_metadata.py) and rebuilt in memory from the career reference
+and job corpus if the file is missing.
+"""
+import bisect
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+
+from app import ml_service
+
+# backend/ml_models, wherever the process was started from
+SKILL_METADATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ml_models", "skill_metadata.json")
+
+# (category, base learning weeks, difficulty, keywords matched as whole words in the skill name)
+# Order matters: the first matching category wins.
+CATEGORY_RULES = [
+    ("soft_skill", 3, "Beginner", ["communication", "leadership", "negotiation", "creativity", "storytelling",
+                                   "teamwork", "collaboration", "problem solving", "critical thinking",
+                                   "attention to detail", "time management", "logical reasoning", "adaptability"]),
+    ("ml_ai", 10, "Advanced", ["machine learning", "deep learning", "tensorflow", "pytorch", "nlp",
+                               "natural language processing", "ai", "data science", "computer vision"]),
+    ("security", 8, "Advanced", ["security", "cybersecurity"]),
+    ("engineering", 8, "Advanced", ["algorithms", "data structures", "system design", "software design",
+                                    "embedded systems", "iot"]),
+    ("cloud_devops", 6, "Intermediate", ["cloud", "cloud computing", "devops", "docker", "kubernetes", "aws",
+                                         "azure", "gcp", "linux", "microservices"]),
+    ("programming_language", 8, "Intermediate", ["python", "java", "c++", "c#", "javascript", "typescript",
+                                                 ".net", "go", "rust", "r"]),
+    ("framework", 4, "Intermediate", ["react", "node.js", "spring", "angular", "django", "flask", "android",
+                                      "html", "css"]),
+    ("design", 4, "Beginner", ["design", "ui", "ux", "ui/ux", "ux/ui", "adobe", "illustration", "prototyping",
+                               "photoshop", "illustrator"]),
+    ("marketing_content", 4, "Beginner", ["marketing", "seo", "content", "copywriting", "social media", "branding"]),
+    ("data", 6, "Intermediate", ["data", "sql", "etl", "statistics", "statistical", "analytics", "analysis",
+                                 "excel", "big data", "econometrics", "reporting"]),
+    ("business", 5, "Intermediate", ["business", "financial", "risk", "project management", "agile", "crm",
+                                     "research", "strategy"]),
+]
+DEFAULT_CATEGORY = ("general", 4, "Intermediate")
+
+_metadata = None
+_metadata_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _phrase_pattern(phrase):
+    # Compiled once: the skill vocabulary is larger than the re module's own cache
+    return re.compile(r"(?<![\w+#.])" + re.escape(phrase) + r"(?![\w+#])")
+
+
+def _contains_phrase(text, phrase):
+    return _phrase_pattern(phrase).search(text) is not None
+
+
+def categorize_skill(skill):
+    """Return (category, base_weeks, difficulty) for a skill name"""
+    name = skill.lower()
+    for category, weeks, difficulty, keywords in CATEGORY_RULES:
+        if any(_contains_phrase(name, keyword) for keyword in keywords):
+            return category, weeks, difficulty
+    return DEFAULT_CATEGORY
+
+
+def job_corpus_skills(skills_text, vocabulary):
+    """Skills listed for a corpus job ('; '-separated, or free text matched against the vocabulary)"""
+    if not isinstance(skills_text, str):
+        return set()
+    if ";" in skills_text:
+        return {s.strip() for s in skills_text.split(";") if s.strip()}
+    text = skills_text.lower()
+    return {skill for skill in vocabulary if _contains_phrase(text, skill.lower())}
+
+
+def build_skill_metadata():
+    """Build the skill metadata table from the career reference and the job corpus"""
+    career_ref = getattr(ml_service, "CAREER_REF", None)
+    job_metadata = getattr(ml_service, "JOB_METADATA", None)
+
+    career_counts = {}
+    total_careers = 0
+    if career_ref is not None:
+        total_careers = len(career_ref)
+        for career_skills in career_ref["Skills"]:
+            for skill in set(career_skills):
+                career_counts[skill] = career_counts.get(skill, 0) + 1
+
+    vocabulary = set(career_counts)
+    job_counts = {}
+    total_jobs = 0
+    if job_metadata is not None:
+        total_jobs = len(job_metadata)
+        for skills_text in job_metadata["Skills_required"]:
+            for skill in job_corpus_skills(skills_text, vocabulary):
+                job_counts[skill] = job_counts.get(skill, 0) + 1
+
+    # Merge case variants under the career reference spelling where available
+    canonical = {skill.lower(): skill for skill in job_counts}
+    canonical.update({skill.lower(): skill for skill in career_counts})
+    merged = {}
+    for source, counts in (("career_count", career_counts), ("job_count", job_counts)):
+        for skill, count in counts.items():
+            entry = merged.setdefault(canonical[skill.lower()], {"career_count": 0, "job_count": 0})
+            entry[source] += count
+
+    max_career = max((e["career_count"] for e in merged.values()), default=0) or 1
+    max_job = max((e["job_count"] for e in merged.values()), default=0) or 1
+
+    skills = {}
+    for skill, entry in merged.items():
+        category, weeks, difficulty = categorize_skill(skill)
+        skills[skill.lower()] = {
+            "skill": skill,
+            "career_count": entry["career_count"],
+            "job_count": entry["job_count"],
+            "score": round(0.5 * entry["career_count"] / max_career + 0.5 * entry["job_count"] / max_job, 4),
+            "category": category,
+            "learning_time_weeks": weeks,
+            "difficulty": difficulty,
+        }
+
+    # Percentile rank of each skill's demand score, used for priority: the share
+    # of skills with a strictly lower score, so equal scores get equal priority
+    scores = sorted(entry["score"] for entry in skills.values())
+    for entry in skills.values():
+        entry["percentile"] = round(bisect.bisect_left(scores, entry["score"]) / max(1, len(scores) - 1), 4)
+
+    return {"total_careers": total_careers, "total_jobs": total_jobs, "skills": skills}
+
+
+def get_skill_metadata():
+    """Return the skill metadata table, loading or building it once"""
+    global _metadata
+    if _metadata is None:
+        with _metadata_lock:
+            if _metadata is None:
+                try:
+                    with open(SKILL_METADATA_PATH) as f:
+                        _metadata = json.load(f)
+                except FileNotFoundError:
+                    print(f"Skill metadata table not found at {SKILL_METADATA_PATH}; building it in memory")
+                    _metadata = build_skill_metadata()
+                except Exception as e:
+                    print(f"Warning: Could not load skill metadata ({e}); building it in memory")
+                    _metadata = build_skill_metadata()
+    return _metadata
+
+
+def _priority(percentile):
+    if percentile >= 0.66:
+        return "High"
+    if percentile >= 0.33:
+        return "Medium"
+    return "Low"
+
+
+def analyze_skill_gap(user_skills, required_skills, career=None):
+    """
+    Compare the user's skills with the required skills.
+
+    Returns the same shape as gemini_service.analyze_skill_gap:
+        {
+            "transferable_skills": [...],
+            "missing_skills": [{"skill", "priority", "learning_time_weeks", "difficulty", "reason"}, ...],
+            "learning_path_summary": "...",
+            "error": None
+        }
+    Missing skills are ordered by priority (demand across careers and jobs).
+    """
+    metadata = get_skill_metadata()
+    table = metadata["skills"]
+    total_careers = metadata.get("total_careers") or 0
+    total_jobs = metadata.get("total_jobs") or 0
+
+    user_skills = [s for s in (user_skills or []) if isinstance(s, str)]
+    user_lower = {s.lower() for s in user_skills}
+    user_categories = {
+        (table.get(s.lower()) or {}).get("category") or categorize_skill(s)[0]
+        for s in user_skills
+    }
+
+    transferable = []
+    missing = []
+    seen = set()
+    for skill in required_skills or []:
+        key = skill.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        if key in user_lower:
+            transferable.append(skill)
+            continue
+
+        entry = table.get(key)
+        if entry is None:
+            category, weeks, difficulty = categorize_skill(skill)
+            entry = {"category": category, "learning_time_weeks": weeks, "difficulty": difficulty,
+                     "career_count": 0, "job_count": 0, "percentile": 0.5, "score": 0.0}
+
+        weeks = entry["learning_time_weeks"]
+        # Related skills in the same area shorten the ramp-up
+        if entry["category"] in user_categories:
+            weeks = max(1, round(weeks * 0.75))
+
+        reason_parts = []
+        if entry["career_count"] and total_careers:
+            reason_parts.append(f"required in {entry['career_count']} of {total_careers} career paths")
+        if entry["job_count"] and total_jobs:
+            reason_parts.append(f"listed in {entry['job_count']} of {total_jobs} job postings")
+        reason = ("In demand: " + " and ".join(reason_parts) + ".") if reason_parts else \
+            "Required for the recommended career path."
+
+        missing.append({
+            "skill": skill,
+            "priority": _priority(entry["percentile"]),
+            "learning_time_weeks": weeks,
+            "difficulty": entry["difficulty"],
+            "reason": reason,
+            "_score": entry["score"],
+        })
+
+    missing.sort(key=lambda m: m["_score"], reverse=True)
+    for item in missing:
+        del item["_score"]
+
+    return {
+        "transferable_skills": transferable,
+        "missing_skills": missing,
+        "learning_path_summary": summarize(career, transferable, missing, len(seen)),
+        "error": None
+    }
+
+
+def summarize(career, transferable, missing, required_count):
+    """Template summary used when no LLM narrative is requested or available"""
+    if not required_count:
+        return ""
+    target = f" for {career}" if career else ""
+    if not missing:
+        return f"You already have all {required_count} skills needed{target}. Focus on projects that show them off."
+    top = [m["skill"] for m in missing if m["priority"] == "High"][:3] or [m["skill"] for m in missing[:3]]
+    total_weeks = sum(m["learning_time_weeks"] for m in missing)
+    return (
+        f"You already have {len(transferable)} of {required_count} skills needed{target}. "
+        f"Start with {', '.join(top)}; closing the full gap takes about {total_weeks} weeks of focused study."
+    )
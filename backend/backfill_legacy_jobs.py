@@ -0,0 +1,52 @@
+"""
+Normalize legacy job rows in place (see app/job_backfill.py)
+
+Fills job_title / jd_text / company_name from the legacy columns and the
+recruiter, defaults work_type / job_type / experience_level, and recomputes
+the annual INR salary and canonical location columns (use --salaries-only or
+--locations-only after changing app/salary.py or the gazetteer in
+app/locations.py). Runs in small batches with a pause between them, so it is
+safe against the live database; stop it at any time and re-run (or pass
+--start-after with the last id it printed) to continue.
+
+Migration 7 requires these columns on every job; until this has run it is
+skipped (with a warning) and retried on the next migrate.py run.
+
+Usage: python backfill_legacy_jobs.py --batch-size 500 --pause 0.1
+"""
+import argparse
+
+from app import job_backfill
+from app.database import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Normalize legacy job rows")
+    parser.add_argument("--batch-size", type=int, default=500, help="job ids per transaction")
+    parser.add_argument("--pause", type=float, default=0.1, help="seconds to sleep between batches")
+    parser.add_argument("--start-after", type=int, default=0, help="resume after this job id")
+    parser.add_argument("--salaries-only", action="store_true", help="only recompute the annual salary columns")
+    parser.add_argument("--locations-only", action="store_true", help="only recompute the canonical location columns")
+    args = parser.parse_args()
+    batches = {"batch_size": args.batch_size, "pause": args.pause, "start_after": args.start_after}
+
+    if not (args.salaries_only or args.locations_only):
+        with engine.connect() as conn:
+            remaining = job_backfill.count_remaining(conn)
+        print(f"{remaining} job(s) need normalizing\n")
+        if remaining:
+            updated = job_backfill.normalize_legacy_jobs(engine, **batches)
+            with engine.connect() as conn:
+                remaining = job_backfill.count_remaining(conn)
+            print(f"\n✓ Normalized {updated} job(s); {remaining} remaining\n")
+
+    if not args.locations_only:
+        updated = job_backfill.normalize_salaries(engine, **batches)
+        print(f"✓ Recomputed the annual salary of {updated} job(s)")
+    if not args.salaries_only:
+        updated = job_backfill.normalize_locations(engine, **batches)
+        print(f"✓ Recomputed the location of {updated} job(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark offset vs cursor pagination for job search
+Builds a throwaway SQLite database with synthetic jobs, then times fetching
+page 1, 10, 100 and 1000 of each sort order with skip/limit and with
+next_cursor. Cursor pages are reached by walking the cursors; only the
+timed page fetch is measured.
+
+Usage: python benchmark_job_pagination.py --jobs 50000 --page-size 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app import models, job_search, migrations
+from app.database import create_db_engine
+
+TITLES = ["Software Engineer", "Data Analyst", "Frontend Developer", "Backend Engineer", "ML Engineer",
+          "Product Designer", "DevOps Engineer", "QA Engineer", "Marketing Analyst", "Data Scientist"]
+INDUSTRIES = ["Technology", "Finance", "Healthcare", "Education", "Retail"]
+
+
+def build_database(path, count):
+    engine = create_db_engine(f"sqlite:///{path}", name="benchmark")
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    job_search.detect_full_text_search(engine)
+
+    rng = random.Random(42)
+    started = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        title = rng.choice(TITLES)
+        max_salary = rng.choice([None, rng.randint(3, 40) * 100000])
+        rows.append({
+            "job_title": title,
+            "company_name": f"Company {rng.randint(1, 500)}",
+            "industry": rng.choice(INDUSTRIES),
+            "jd_text": f"We are hiring a {title} to build and ship products with a great team.",
+            "status": "active",
+            "max_salary": max_salary,
+            # Core inserts skip the model's write hooks, so fill the sort column here
+            "salary_annual_min_normalized": max_salary,
+            "salary_annual_max_normalized": max_salary,
+            # Many jobs share a timestamp so the id tie-breaker matters
+            "created_at": started + timedelta(minutes=rng.randint(0, count // 4)),
+            "skills_required": [],
+        })
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 5000):
+            conn.execute(models.Job.__table__.insert(), rows[start:start + 5000])
+    return engine
+
+
+def time_offset_page(db, filters, page, page_size):
+    query, sort_keys = job_search.build_search_query(db, **filters)
+    started = time.perf_counter()
+    job_search.fetch_page(query, sort_keys, filters["sort_by"], page_size, skip=(page - 1) * page_size)
+    return time.perf_counter() - started
+
+
+def time_cursor_pages(db, filters, pages, page_size):
+    timings = {}
+    cursor = None
+    for page in range(1, max(pages) + 1):
+        query, sort_keys = job_search.build_search_query(db, **filters)
+        started = time.perf_counter()
+        _, cursor, has_more, _ = job_search.fetch_page(query, sort_keys, filters["sort_by"], page_size, cursor=cursor)
+        if page in pages:
+            timings[page] = time.perf_counter() - started
+        if not has_more:
+            break
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offset vs cursor pagination benchmark")
+    parser.add_argument("--jobs", type=int, default=50000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", default="1,10,100,1000")
+    args = parser.parse_args()
+    pages = [int(p) for p in args.pages.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Building {args.jobs} synthetic jobs...")
+        engine = build_database(path, args.jobs)
+        db = sessionmaker(bind=engine)()
+
+        scenarios = [
+            ("newest", {"sort_by": "newest"}),
+            ("salary_high", {"sort_by": "salary_high"}),
+            ("relevance (keyword=engineer)", {"sort_by": "relevance", "keyword": "engineer"}),
+        ]
+        for name, filters in scenarios:
+            time_offset_page(db, filters, 1, args.page_size)  # warm up
+            cursor_timings = time_cursor_pages(db, filters, pages, args.page_size)
+            print(f"\n{name}")
+            print(f"  {'page':>6} {'offset':>10} {'cursor':>10}")
+            for page in pages:
+                if page not in cursor_timings:
+                    print(f"  {page:>6} {'(past the last page)':>21}")
+                    continue
+                offset_time = time_offset_page(db, filters, page, args.page_size)
+                print(f"  {page:>6} {offset_time * 1000:>8.1f}ms {cursor_timings[page] * 1000:>8.1f}ms")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Measure what the job list projections save
+Builds a throwaway SQLite database of synthetic jobs with realistic
+descriptions and saved roadmaps, then for each list query compares loading
+every column with the projection the endpoint uses: bytes read from the
+database, and time. Also compares response sizes of /api/jobs/search with
+the default fields against fields= set to every column.
+
+Usage: python benchmark_job_projections.py --jobs 2000 --page-size 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import models, job_search, migrations  # noqa: E402
+from app.database import engine, SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+WORDS = ("build scalable services with a small team ship features own reliability mentor engineers "
+         "design apis review code collaborate with product and design").split()
+SKILLS = ["Python", "React", "SQL", "AWS", "Docker", "Java", "Node.js", "Go", "Kubernetes", "Figma"]
+
+
+def build_jobs(count):
+    rng = random.Random(7)
+    rows = []
+    for i in range(count):
+        jd_text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(300, 700)))
+        rows.append({
+            "recruiter_id": 1 + i % 20,
+            "job_title": "Software Engineer",
+            "company_name": f"Company {i % 50}",
+            "jd_text": jd_text,
+            "title": "Software Engineer",
+            "description": jd_text[:500],
+            "skills_required": rng.sample(SKILLS, 4),
+            "nice_to_have_skills": rng.sample(SKILLS, 2),
+            "industry": "Technology",
+            "status": "active",
+            "work_type": "onsite",
+            "job_type": "full_time",
+            "experience_level": "junior",
+            # A saved roadmap is typically several KB of JSON
+            "roadmap_json": {"phases": [{"title": f"Phase {p}", "tasks": [" ".join(WORDS)] * 8} for p in range(6)]},
+        })
+    recruiters = [{"id": i, "email": f"recruiter{i}@example.com", "company_name": f"Company {i}"} for i in range(1, 21)]
+    with engine.begin() as conn:
+        conn.execute(models.Recruiter.__table__.insert(), recruiters)
+        conn.execute(models.Job.__table__.insert(), rows)
+
+
+def measure(query):
+    """(bytes read from the database, seconds) for running query"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    started = time.perf_counter()
+    try:
+        query.all()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    elapsed = time.perf_counter() - started
+
+    read = 0
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(statement, parameters):
+                read += sum(len(v) if isinstance(v, (str, bytes)) else 8 for v in row if v is not None)
+    return read, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job list projection benchmark")
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    print(f"Building {args.jobs} synthetic jobs...")
+    build_jobs(args.jobs)
+    db = SessionLocal()
+
+    def search_page(*options):
+        query, _ = job_search.build_search_query(db)
+        return query.options(*options).limit(args.page_size)
+
+    def recruiter_jobs(*options):
+        return db.query(models.Job).options(*options).filter(models.Job.recruiter_id == 1)
+
+    def match_fetch(*options):
+        return db.query(models.Job).options(*options).filter(job_search.active_jobs_filter())
+
+    scenarios = [
+        ("/api/jobs/search", search_page, job_search.LIST_FIELDS),
+        ("/api/jobs", search_page, job_search.LEGACY_LIST_FIELDS),
+        ("/api/recruiter/jobs", recruiter_jobs, job_search.LEGACY_LIST_FIELDS),
+        ("match-jobs fetch", match_fetch, job_search.MATCH_FIELDS),
+    ]
+    print(f"\n{'query':<22} {'all columns':>14} {'projection':>14} {'saved':>7}")
+    for name, build, fields in scenarios:
+        full_bytes, full_time = measure(build())
+        db.expunge_all()
+        slim_bytes, slim_time = measure(build(job_search.load_fields(fields)))
+        db.expunge_all()
+        saved = 100 * (1 - slim_bytes / full_bytes) if full_bytes else 0
+        print(f"{name:<22} {full_bytes / 1024:>10.0f} KB {slim_bytes / 1024:>10.0f} KB {saved:>6.0f}%")
+        print(f"{'':<22} {full_time * 1000:>11.1f} ms {slim_time * 1000:>11.1f} ms")
+    db.close()
+
+    client = TestClient(app)
+    every_field = ",".join(job_search.JOB_FIELDS)
+    default = client.get(f"/api/jobs/search?limit={args.page_size}&count_mode=none")
+    full = client.get(f"/api/jobs/search?limit={args.page_size}&count_mode=none&fields={every_field}")
+    print(f"\n/api/jobs/search response: {len(full.content) / 1024:.0f} KB with every field, "
+          f"{len(default.content) / 1024:.0f} KB with the default fields "
+          f"({100 * (1 - len(default.content) / len(full.content)):.0f}% smaller)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        engine.dispose()
+        _tmp.cleanup()
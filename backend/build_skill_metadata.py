@@ -0,0 +1,22 @@
+"""
+Build the skill metadata table used by the local skill gap engine
+Writes ml_models/skill_metadata.json from the career reference and job corpus.
+Re-run after regenerating the ML models.
+
+Usage: python build_skill_metadata.py
+"""
+import json
+
+from app.skill_gap_engine import SKILL_METADATA_PATH, build_skill_metadata
+
+
+def main():
+    metadata = build_skill_metadata()
+    with open(SKILL_METADATA_PATH, "w") as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    print(f"✓ Wrote {len(metadata['skills'])} skills "
+          f"({metadata['total_careers']} careers, {metadata['total_jobs']} jobs) to {SKILL_METADATA_PATH}")
+
+
+if __name__ == "__main__":
+    main()
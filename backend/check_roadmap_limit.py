@@ -0,0 +1,89 @@
+"""
+Check the saved roadmap limit under concurrent saves
+Registers a few users on a throwaway SQLite database (or --database-url),
+fires --saves parallel POST /api/roadmaps/save requests per user through the
+API in-process, then counts every user's roadmaps. Fails if any save failed
+or any user ended up with more than MAX_SAVED_ROADMAPS.
+
+Usage: python check_roadmap_limit.py --users 4 --saves 40 --concurrency 16
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the saved roadmap limit under concurrent saves")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--saves", type=int, default=40, help="saves per user")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--database-url", help="database to use instead of a throwaway SQLite file")
+    args = parser.parse_args()
+
+    # Set before the app is imported: the engine is created from DATABASE_URL at import time
+    workdir = tempfile.mkdtemp(prefix="pathfinder-roadmaps-")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'check.db')}"
+    try:
+        check(args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def check(args):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func
+
+    from app import models, migrations
+    from app.database import SessionLocal, engine
+    from app.main import app, MAX_SAVED_ROADMAPS
+
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+    client = TestClient(app)
+    headers = {}
+    for i in range(args.users):
+        email = f"roadmap-check-{os.getpid()}-{i}@example.com"
+        client.post("/api/auth/register-user", json={"email": email, "password": "check-password", "full_name": f"User {i}"})
+        login = client.post("/api/auth/login", data={"username": email, "password": "check-password"})
+        login.raise_for_status()
+        body = login.json()
+        headers[body["user_id"]] = {"Authorization": f"Bearer {body['access_token']}"}
+
+    document = {"role_summary": {"title": "Check"}, "roadmap": {"phases": [{"phase_name": "Phase 1", "tasks": []}]}}
+
+    def save(job):
+        user_id, n = job
+        response = client.post("/api/roadmaps/save", headers=headers[user_id],
+                               json={"title": f"Roadmap {n}", "roadmap_data": document})
+        return response.status_code
+
+    jobs = [(user_id, n) for n in range(args.saves) for user_id in headers]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = Counter(pool.map(save, jobs))
+
+    db = SessionLocal()
+    try:
+        counts = dict(
+            db.query(models.Roadmap.user_id, func.count())
+            .filter(models.Roadmap.user_id.in_(list(headers)))
+            .group_by(models.Roadmap.user_id)
+        )
+    finally:
+        db.close()
+
+    print(f"\n{len(jobs)} saves ({args.concurrency} concurrent): " + ", ".join(f"{n}x {code}" for code, n in sorted(statuses.items())))
+    over = {user_id: count for user_id, count in counts.items() if count > MAX_SAVED_ROADMAPS}
+    for user_id in headers:
+        print(f"  user {user_id}: {counts.get(user_id, 0)} roadmap(s)")
+    if over or set(statuses) != {200}:
+        print(f"✗ Limit of {MAX_SAVED_ROADMAPS} broken for {len(over)} user(s), {len(jobs) - statuses[200]} failed save(s)")
+        sys.exit(1)
+    print(f"✓ Every user has at most {MAX_SAVED_ROADMAPS} roadmaps")
+
+
+if __name__ == "__main__":
+    main()
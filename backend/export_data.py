@@ -0,0 +1,47 @@
+"""
+Export jobs, roadmaps or user profiles to NDJSON or CSV
+Streams the table from DATABASE_URL (see app/exports.py), so exporting a
+large table needs no more memory than a small one.
+
+Usage:
+    python export_data.py jobs
+    python export_data.py roadmaps --format csv --gzip -o roadmaps.csv.gz
+    python export_data.py profiles --since 2025-01-01 > profiles.ndjson
+"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+from app import exports
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a PathFinder AI table to NDJSON or CSV")
+    parser.add_argument("dataset", choices=list(exports.DATASETS))
+    parser.add_argument("--format", choices=list(exports.FORMATS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="gzip the output")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only rows created at or after this date")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        for chunk in exports.stream_export(SessionLocal, args.dataset, args.format, args.gzip, args.since):
+            out.write(chunk)
+            written += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+        else:
+            out.flush()
+
+    # stderr, so it doesn't end up in a piped export
+    print(f"✓ Exported {args.dataset} ({written / 1024:.1f} KB) in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Local Gemini stand-in server for load and latency testing
+Speaks the Gemini REST protocol (generateContent / streamGenerateContent)
+and answers with schema-valid canned responses, so the whole API can be
+benchmarked without using real quota.
+
+Usage:
+    python fake_gemini_server.py --port 8090 --latency lognormal:0.5,0.4 --error-rate 0.02
+
+Then start the API against it:
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8090 GEMINI_API_KEY=fake \
+        python -m uvicorn app.main:app --port 8001
+
+For in-process testing without a server, use LLM_BACKEND=fake instead.
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.llm_backends import FakeBackend, canned_response, estimate_tokens, split_chunks
+
+PATH_RE = re.compile(r"^/v1beta/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)")
+
+
+def _response_json(text, prompt_tokens=None, response_tokens=None, finished=True):
+    body = {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "index": 0,
+        }]
+    }
+    if finished:
+        body["candidates"][0]["finishReason"] = "STOP"
+        body["usageMetadata"] = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": response_tokens,
+            "totalTokenCount": (prompt_tokens or 0) + (response_tokens or 0),
+        }
+    return body
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    backend = FakeBackend()
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        match = PATH_RE.match(self.path)
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = "".join(
+            part.get("text", "")
+            for content in request.get("contents", [])
+            for part in content.get("parts", [])
+        )
+
+        latency = self.backend.sample_latency()
+        fail = self.backend.should_fail()
+        text = canned_response(prompt)
+        prompt_tokens = estimate_tokens(prompt)
+        response_tokens = estimate_tokens(text)
+
+        if match.group("method") == "generateContent":
+            time.sleep(latency)
+            if fail:
+                self._send_json(503, {"error": {"code": 503, "message": "Simulated overload", "status": "UNAVAILABLE"}})
+                return
+            self._send_json(200, _response_json(text, prompt_tokens, response_tokens))
+            return
+
+        # Streaming: a JSON array of GenerateContentResponse objects written as they are produced
+        if fail and self.backend.stream_chunks <= 1:
+            time.sleep(latency)
+            self._send_json(503, {"error": {"code": 503, "message": "Simulated overload", "status": "UNAVAILABLE"}})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        chunks = split_chunks(text, self.backend.stream_chunks)
+        per_chunk = latency / len(chunks)
+        self.wfile.write(b"[")
+        for i, chunk in enumerate(chunks):
+            time.sleep(per_chunk)
+            if fail and i == len(chunks) // 2:
+                # Drop the connection mid-stream to simulate a truncated response
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            last = i == len(chunks) - 1
+            body = _response_json(chunk, prompt_tokens, response_tokens, finished=last)
+            self.wfile.write((b"" if i == 0 else b",\r\n") + json.dumps(body).encode())
+            self.wfile.flush()
+        self.wfile.write(b"]")
+        self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="fixed:0.2",
+                        help="fixed:S | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA | exp:MEAN")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls that fail (0-1)")
+    parser.add_argument("--stream-chunks", type=int, default=8, help="Chunks per streamed response")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quiet", action="store_true", help="Do not log every request")
+    args = parser.parse_args()
+
+    FakeGeminiHandler.backend = FakeBackend(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        stream_chunks=args.stream_chunks,
+        seed=args.seed,
+    )
+    FakeGeminiHandler.quiet = args.quiet
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeGeminiHandler)
+    print(f"Fake Gemini server listening on http://{args.host}:{args.port} "
+          f"(latency={args.latency}, error_rate={args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
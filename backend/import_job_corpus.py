@@ -0,0 +1,50 @@
+"""
+Load the legacy Kaggle job corpus into the jobs table (see job_import.import_corpus)
+
+The corpus (ml_models/job_metadata.pkl) becomes catalogue jobs with no
+recruiter (status "catalogue": matched, but not listed on the job board or
+in search), and the Doc2Vec vectors it was trained with (job_vectors.pkl) are
+stored as their embeddings, so job matching serves it alongside recruiters'
+postings without inferring anything. Already-loaded rows are skipped, so it
+is safe to re-run.
+
+Usage: python import_job_corpus.py --batch-size 500
+"""
+import argparse
+import time
+
+from app import models, migrations, ml_service, job_import
+from app.database import engine, SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the Kaggle job corpus into the jobs table")
+    parser.add_argument("--batch-size", type=int, default=job_import.JOB_IMPORT_BATCH_SIZE, help="jobs per transaction")
+    args = parser.parse_args()
+
+    metadata = getattr(ml_service, "JOB_METADATA", None)
+    vectors = getattr(ml_service, "JOB_VECTORS", None)
+    if metadata is None or vectors is None:
+        raise SystemExit("✗ Job corpus not loaded (ml_models/job_metadata.pkl, job_vectors.pkl)")
+
+    models.Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = job_import.import_corpus(db, metadata, vectors, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"✓ Loaded {result['imported']} corpus job(s) with stored embeddings in {time.perf_counter() - started:.1f}s")
+    if result["skipped"]:
+        print(f"  {result['skipped']} already loaded")
+    if result["failed"]:
+        print(f"✗ {result['failed']} row(s) failed:")
+        for error in result["errors"]:
+            print(f"  ID_num {error['row']}: {'; '.join(error['errors'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Load test for the PathFinder AI API
+Fires concurrent requests at the API and reports throughput, latency
+percentiles and status codes per endpoint. Run the API against the fake
+LLM backend (LLM_BACKEND=fake) or fake_gemini_server.py to benchmark
+offline without using Gemini quota.
+
+Usage:
+    python load_test_api.py --endpoints skill-gap,chat,roadmap-stream --concurrency 32 --requests 500
+
+--background keeps requests to one endpoint in flight while the others are
+measured. Slow sync LLM calls fill the server's threadpool, which shows
+how the async read endpoints (search, job, profile, roadmaps) hold up next
+to a sync one (jobs) with the same number of server workers:
+    LLM_BACKEND=fake FAKE_LLM_LATENCY=fixed:2 uvicorn app.main:app --port 8001 --workers 1
+    python load_test_api.py --endpoints jobs,search,job,profile,roadmaps --background chat --background-concurrency 80
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ApiClient:
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, body=None, form=None, stream=False, headers=None):
+        """Return (status, elapsed_seconds, time_to_first_byte, payload_bytes)"""
+        headers = dict(headers or {})
+        data = None
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        elif form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        started = time.perf_counter()
+        first_byte = None
+        payload = b""
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                status = response.status
+                if stream:
+                    while True:
+                        line = response.readline()
+                        if not line:
+                            break
+                        if first_byte is None:
+                            first_byte = time.perf_counter() - started
+                        payload += line
+                else:
+                    payload = response.read()
+        except urllib.error.HTTPError as e:
+            status = e.code
+            payload = e.read()
+        except Exception:
+            status = "error"
+        elapsed = time.perf_counter() - started
+        return status, elapsed, first_byte if first_byte is not None else elapsed, payload
+
+
+def setup_user(client, email, password):
+    client.request("POST", "/api/auth/register-user", body={
+        "email": email, "password": password, "full_name": "Load Test User"
+    })
+    status, _, _, payload = client.request("POST", "/api/auth/login", form={"username": email, "password": password})
+    if status != 200:
+        raise SystemExit(f"Login failed ({status}): {payload[:200]!r}")
+    client.token = json.loads(payload)["access_token"]
+    client.request("POST", "/api/user/profile", body={
+        "degree": "B.Tech CSE",
+        "cgpa_10th": 8.5,
+        "cgpa_12th": 8.0,
+        "skills": ["Python", "SQL", "HTML", "CSS", "Communication"],
+        "certifications": ["Python Basics"],
+        "achievements": ["Hackathon participation"],
+    })
+
+
+def first_job_id(client):
+    status, _, _, payload = client.request("GET", "/api/jobs/search?limit=1")
+    if status == 200:
+        jobs = json.loads(payload).get("jobs") or []
+        if jobs:
+            return jobs[0]["id"]
+    return None
+
+
+def build_endpoints(job_id):
+    endpoints = {
+        "skill-gap": ("POST", "/api/ai/skill-gap-analysis", None, False),
+        "strengths": ("POST", "/api/ai/strengths-weaknesses", None, False),
+        "chat": ("POST", "/api/ai/chat", {"message": "How do I become a data scientist?"}, False),
+        "search": ("GET", "/api/jobs/search?keyword=developer&limit=20", None, False),
+        "profile": ("GET", "/api/user/profile", None, False),
+        "roadmaps": ("GET", "/api/roadmaps", None, False),
+        # Sync route, for comparison with the async reads above
+        "jobs": ("GET", "/api/jobs?limit=20", None, False),
+    }
+    if job_id is not None:
+        endpoints["job"] = ("GET", f"/api/jobs/{job_id}", None, False)
+        endpoints["roadmap"] = ("POST", f"/api/jobs/{job_id}/generate-roadmap-for-user", None, False)
+        endpoints["roadmap-stream"] = ("POST", f"/api/jobs/{job_id}/generate-roadmap-for-user/stream", None, True)
+    return endpoints
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(client, name, spec, concurrency, total):
+    method, path, body, stream = spec
+    results = []
+    lock = threading.Lock()
+
+    def one(_):
+        result = client.request(method, path, body=body, stream=stream)
+        with lock:
+            results.append(result)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(r[1] for r in results)
+    ttfb = sorted(r[2] for r in results)
+    statuses = Counter(r[0] for r in results)
+
+    print(f"\n{name}: {method} {path}")
+    print(f"  requests={total} concurrency={concurrency} wall={wall:.2f}s throughput={total / wall:.1f} req/s")
+    print(f"  latency  p50={percentile(latencies, 0.5) * 1000:.0f}ms p90={percentile(latencies, 0.9) * 1000:.0f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.0f}ms max={latencies[-1] * 1000:.0f}ms")
+    if stream:
+        print(f"  first event p50={percentile(ttfb, 0.5) * 1000:.0f}ms p90={percentile(ttfb, 0.9) * 1000:.0f}ms")
+    print(f"  status   {dict(statuses)}")
+
+
+def start_background(client, spec, concurrency):
+    """Keep concurrency requests to spec in flight until the returned event is set"""
+    method, path, body, stream = spec
+    stop = threading.Event()
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def loop():
+        while not stop.is_set():
+            status = client.request(method, path, body=body, stream=stream)[0]
+            with lock:
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=loop, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    return stop, threads, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PathFinder AI API load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--endpoints", default="skill-gap,strengths,chat,roadmap,roadmap-stream",
+                        help="Comma-separated: skill-gap,strengths,chat,roadmap,roadmap-stream,search,job,profile,roadmaps,jobs")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client-side timeout per request")
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="loadtest-password")
+    parser.add_argument("--metrics-key", default=os.getenv("METRICS_API_KEY"),
+                        help="X-Metrics-Key for reading the breaker state at the end (default: METRICS_API_KEY)")
+    parser.add_argument("--background", help="Endpoint to keep busy while the others are measured")
+    parser.add_argument("--background-concurrency", type=int, default=64)
+    parser.add_argument("--background-warmup", type=float, default=2.0,
+                        help="Seconds to let the background load build up before measuring")
+    args = parser.parse_args()
+
+    client = ApiClient(args.base_url, args.timeout)
+    setup_user(client, args.email, args.password)
+    endpoints = build_endpoints(first_job_id(client))
+
+    background = None
+    if args.background:
+        if args.background not in endpoints:
+            raise SystemExit(f"Unknown or unavailable background endpoint: {args.background}")
+        print(f"Background load: {args.background_concurrency} concurrent {args.background} requests")
+        background = start_background(client, endpoints[args.background], args.background_concurrency)
+        time.sleep(args.background_warmup)
+
+    for name in [n.strip() for n in args.endpoints.split(",") if n.strip()]:
+        if name not in endpoints:
+            print(f"\nSkipping unknown or unavailable endpoint: {name}")
+            continue
+        run(client, name, endpoints[name], args.concurrency, args.requests)
+
+    if background:
+        stop, threads, statuses = background
+        stop.set()
+        for thread in threads:
+            thread.join()
+        print(f"\nBackground {args.background}: {dict(statuses)}")
+
+    status, _, _, payload = client.request("GET", "/api/metrics", headers={"X-Metrics-Key": args.metrics_key or ""})
+    if status == 200:
+        gauges = json.loads(payload).get("gauges", [])
+        breaker = [g for g in gauges if g["name"] == "circuit_breaker_state"]
+        if breaker:
+            print(f"\nCircuit breaker state at end of run: {breaker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Apply schema migrations to the database in DATABASE_URL (default: pathfinder.db)
+
+Usage:
+    python migrate.py             apply all pending migrations
+    python migrate.py --to 3      apply pending migrations up to version 3
+    python migrate.py --status    list migrations and when they were applied
+    python migrate.py --check     show the query plan of each job search shape
+                                  and fail if any of them scans the whole jobs table
+
+Safe to run while the API is serving requests (see app/migrations.py).
+"""
+import argparse
+import re
+import sys
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app import models, migrations, job_search
+from app.database import engine, SessionLocal
+
+# (name, search filters, cursor sort key values or None for the first page)
+SEARCH_SHAPES = [
+    ("newest, first page", {"sort_by": "newest"}, None),
+    ("newest, next page", {"sort_by": "newest"}, [datetime(2100, 1, 1), 2 ** 31]),
+    ("salary_high, next page", {"sort_by": "salary_high"}, [0, 2 ** 31]),
+    ("salary range", {"sort_by": "newest", "min_salary": 1000000, "max_salary": 1500000}, None),
+    ("city", {"sort_by": "newest", "location_city": "Bangalore"}, None),
+    ("country", {"sort_by": "newest", "location_country": "India"}, None),
+    ("posted within 7 days", {"sort_by": "newest", "posted_within": "7"}, None),
+    ("experience level + job type", {"sort_by": "newest", "experience_level": "fresher", "job_type": "full_time"}, None),
+    ("keyword, relevance", {"sort_by": "relevance", "keyword": "engineer"}, None),
+    ("required skills", {"sort_by": "newest", "skills_required": "python,sql"}, None),
+]
+
+SQLITE_FULL_SCAN = re.compile(r"^SCAN jobs( |$)(?!.*USING)")
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on jobs\b")
+
+
+def _capture_statements(fn):
+    """Run fn and return the (statement, parameters) it executed"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+def _explain(statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+    if engine.dialect.name == "sqlite":
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+def _search_shape(db, filters, cursor_values):
+    def run():
+        query, sort_keys = job_search.build_search_query(db, **filters)
+        cursor = job_search.encode_cursor(filters["sort_by"], cursor_values) if cursor_values else None
+        job_search.fetch_page(query, sort_keys, filters["sort_by"], 20, cursor=cursor, with_total=cursor is None)
+    return run
+
+
+def check_query_plans():
+    """Print the plan of every search shape. Returns False if any does a full scan of jobs."""
+    job_search.detect_full_text_search(engine)
+    full_scan = SQLITE_FULL_SCAN if engine.dialect.name == "sqlite" else POSTGRES_FULL_SCAN
+    db = SessionLocal()
+    shapes = [(name, _search_shape(db, filters, cursor)) for name, filters, cursor in SEARCH_SHAPES]
+    shapes.append(("recruiter jobs", lambda: db.query(models.Job).filter(models.Job.recruiter_id == 1).all()))
+    shapes.append(("recruiter active jobs", lambda: db.query(models.Job).filter(
+        models.Job.recruiter_id == 1, job_search.active_jobs_filter()).all()))
+
+    all_ok = True
+    try:
+        for name, run in shapes:
+            plan = []
+            for statement, parameters in _capture_statements(run):
+                plan.extend(_explain(statement, parameters))
+            ok = not any(full_scan.search(line.strip()) for line in plan)
+            all_ok = all_ok and ok
+            print(f"{'OK  ' if ok else 'SCAN'} {name}")
+            for line in plan:
+                print(f"       {line}")
+    finally:
+        db.close()
+    return all_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--to", type=int, help="stop after this migration version")
+    parser.add_argument("--status", action="store_true", help="list migrations and exit")
+    parser.add_argument("--check", action="store_true", help="check that job searches use an index")
+    args = parser.parse_args()
+
+    if args.status:
+        for version, name, applied_at in migrations.status(engine):
+            state = f"applied {applied_at:%Y-%m-%d %H:%M}" if applied_at else "pending"
+            print(f"{version:04d}  {name:<40} {state}")
+        return
+
+    if args.check:
+        sys.exit(0 if check_query_plans() else 1)
+
+    print("Applying schema migrations...\n")
+    models.Base.metadata.create_all(bind=engine)
+    applied = migrations.upgrade(engine, target=args.to)
+    pending = [version for version, _, applied_at in migrations.status(engine)
+               if applied_at is None and (args.to is None or version <= args.to)]
+    if applied:
+        print(f"\n✓ {len(applied)} migration(s) applied")
+    if pending:
+        print(f"Warning: {len(pending)} migration(s) still pending: {', '.join(f'{v:04d}' for v in pending)}")
+    elif not applied:
+        print("✓ Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
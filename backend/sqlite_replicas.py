@@ -0,0 +1,70 @@
+"""
+Local read replicas for SQLite
+Copies the primary database (DATABASE_URL) to replica files next to it with
+the SQLite backup API, again every --interval seconds, so replica routing,
+replication lag and read-your-writes can be tried without a database
+server. Start the API with the DATABASE_REPLICA_URLS this prints.
+
+Usage:
+    python sqlite_replicas.py --replicas 2 --interval 2
+    python sqlite_replicas.py --replicas 2 --once
+"""
+import argparse
+import sqlite3
+import time
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+
+from app.database import DATABASE_URL, SQLITE_BUSY_TIMEOUT_MS
+
+
+def replica_paths(primary, count):
+    primary = Path(primary)
+    return [primary.with_name(f"{primary.stem}.replica{i}{primary.suffix}") for i in range(1, count + 1)]
+
+
+def copy_database(primary, replica):
+    source = sqlite3.connect(primary, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(replica, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep local SQLite read replicas up to date")
+    parser.add_argument("--replicas", type=int, default=2, help="number of replica files")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between copies (the replication lag)")
+    parser.add_argument("--once", action="store_true", help="copy once and exit")
+    args = parser.parse_args()
+
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise SystemExit("✗ DATABASE_URL must point at a SQLite database file")
+    replicas = replica_paths(url.database, args.replicas)
+
+    for replica in replicas:
+        copy_database(url.database, replica)
+    print(f"✓ Created {len(replicas)} replica(s) of {url.database}")
+    print("DATABASE_REPLICA_URLS=" + ",".join(f"sqlite:///{replica}" for replica in replicas))
+    if args.once:
+        return
+
+    print(f"\nRefreshing every {args.interval}s, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(args.interval)
+            for replica in replicas:
+                try:
+                    copy_database(url.database, replica)
+                except sqlite3.Error as e:
+                    print(f"Warning: could not refresh {replica}: {e}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 """
 Simple script to view PathFinder AI database contents
+Only the first rows of each table are read; use export_data.py to dump a
+whole table.
 Usage: python view_database.py
 """
 
@@ -39,7 +41,7 @@ def view_database():
         
         # Get all table names
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
-        tables = cursor.fetchall()
+        tables = [row[0] for row in cursor]
         
         print("="*80)
         print("PATHFINDER AI DATABASE VIEWER")
@@ -53,8 +55,7 @@ def view_database():
             conn.close()
             return
         
-        for table in tables:
-            table_name = table[0]
+        for table_name in tables:
             print(f"\n{'='*80}")
             print(f"TABLE: {table_name.upper()}")
             print(f"{'='*80}")
@@ -67,11 +68,11 @@ def view_database():
             if count > 0:
                 # Get column names
                 cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = [col[1] for col in cursor.fetchall()]
+                columns = [col[1] for col in cursor]
                 
-                # Get all data
-                cursor.execute(f"SELECT * FROM {table_name}")
-                rows = cursor.fetchall()
+                # Only the rows shown are read
+                cursor.execute(f"SELECT * FROM {table_name} LIMIT 20")
+                rows = list(cursor)
                 
                 # Print column headers
                 header = " | ".join([col[:15].ljust(15) for col in columns])
@@ -79,25 +80,29 @@ def view_database():
                 print("-" * len(header))
                 
                 # Print rows (limit to 20 for readability)
-                for row in rows[:20]:
+                for row in rows:
                     formatted_row = []
                     for item in row:
                         formatted_value = format_value(item)
                         formatted_row.append(formatted_value[:15].ljust(15))
                     print(" | ".join(formatted_row))
                 
-                if len(rows) > 20:
-                    print(f"\n... and {len(rows) - 20} more records (showing first 20)")
+                if count > 20:
+                    print(f"\n... and {count - 20} more records (showing first 20)")
                 
                 # Show some statistics
                 print(f"\nSample data from {table_name}:")
                 if table_name == 'users' and rows:
                     print(f"  - First user: {rows[0][1] if len(rows[0]) > 1 else 'N/A'}")
                 elif table_name == 'user_profiles' and rows:
-                    print(f"  - Profiles with skills: {sum(1 for r in rows if r[6])}")
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM user_profiles "
+                        "WHERE skills IS NOT NULL AND skills NOT IN ('', '[]', 'null')"
+                    )
+                    print(f"  - Profiles with skills: {cursor.fetchone()[0]}")
                 elif table_name == 'jobs' and rows:
-                    open_jobs = sum(1 for r in rows if len(r) > 7 and r[7] == 'open')
-                    print(f"  - Open jobs: {open_jobs}")
+                    cursor.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('active', 'open')")
+                    print(f"  - Open jobs: {cursor.fetchone()[0]}")
             else:
                 print("(No records in this table)")
         
@@ -105,8 +110,7 @@ def view_database():
         print(f"\n{'='*80}")
         print("DATABASE SUMMARY")
         print(f"{'='*80}")
-        for table in tables:
-            table_name = table[0]
+        for table_name in tables:
             cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
             count = cursor.fetchone()[0]
             print(f"  {table_name:20} : {count:5} records")
@@ -29,6 +29,7 @@ const JobBoard = () => {
   });
 
   const [showFilters, setShowFilters] = useState(false);
+  const [locationSuggestions, setLocationSuggestions] = useState([]);
 
   useEffect(() => {
     fetchJobs();
@@ -73,6 +74,20 @@ const JobBoard = () => {
     setCurrentPage(0);
   };
 
+  const handleLocationChange = async (key, value) => {
+    handleFilterChange(key, value);
+    if (!value.trim()) {
+      setLocationSuggestions([]);
+      return;
+    }
+    try {
+      const response = await jobAPI.autocompleteLocations(value);
+      setLocationSuggestions(response.data.suggestions || []);
+    } catch (error) {
+      setLocationSuggestions([]);
+    }
+  };
+
   const handleMultiSelect = (key, value) => {
     setFilters(prev => {
       const current = prev[key] || [];
@@ -182,7 +197,8 @@ const JobBoard = () => {
                   <input
                     type="text"
                     value={filters.location_city}
-                    onChange={(e) => handleFilterChange('location_city', e.target.value)}
+                    onChange={(e) => handleLocationChange('location_city', e.target.value)}
+                    list="city-suggestions"
                     placeholder="e.g., Bangalore"
                     className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
                   />
@@ -192,10 +208,21 @@ const JobBoard = () => {
                   <input
                     type="text"
                     value={filters.location_country}
-                    onChange={(e) => handleFilterChange('location_country', e.target.value)}
+                    onChange={(e) => handleLocationChange('location_country', e.target.value)}
+                    list="country-suggestions"
                     placeholder="e.g., India"
                     className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
                   />
+                  <datalist id="city-suggestions">
+                    {locationSuggestions.filter(s => s.type === 'city').map(s => (
+                      <option key={s.id} value={s.name}>{s.label}</option>
+                    ))}
+                  </datalist>
+                  <datalist id="country-suggestions">
+                    {locationSuggestions.filter(s => s.type === 'country').map(s => (
+                      <option key={s.id} value={s.name} />
+                    ))}
+                  </datalist>
                 </div>
                 <div className="flex items-center">
                   <label className="flex items-center cursor-pointer">
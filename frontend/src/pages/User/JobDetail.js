@@ -93,11 +93,26 @@ const JobDetail = () => {
     setRoadmapError('');
     setRoadmapSaved(false);
     
+    setRoadmap(null);
+    
     try {
-      const response = await jobAPI.generateJobRoadmapForUser(id);
-      setRoadmap(response.data.roadmap);
+      // Render each section as soon as the server has finished it
+      await jobAPI.streamJobRoadmapForUser(id, (event) => {
+        if (event.event === 'role_summary' || event.event === 'gap_analysis') {
+          setRoadmap((prev) => ({ ...(prev || {}), [event.event]: event.data }));
+        } else if (event.event === 'phase') {
+          setRoadmap((prev) => {
+            const phases = prev?.roadmap?.phases || [];
+            return { ...(prev || {}), roadmap: { ...(prev?.roadmap || {}), phases: [...phases, event.data] } };
+          });
+        } else if (event.event === 'complete') {
+          setRoadmap(event.data);
+        } else if (event.event === 'error') {
+          setRoadmapError(event.error || 'Failed to generate roadmap');
+        }
+      });
     } catch (error) {
-      setRoadmapError(getErrorFromResponse(error, 'Failed to generate roadmap'));
+      setRoadmapError(error.message || 'Failed to generate roadmap');
     } finally {
       setGeneratingRoadmap(false);
     }
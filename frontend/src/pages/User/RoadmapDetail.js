@@ -10,6 +10,9 @@ const RoadmapDetail = () => {
   const [roadmap, setRoadmap] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  // Phases are fetched with their tasks when expanded: { [index]: { loading, data, error } }
+  const [phaseDetails, setPhaseDetails] = useState({});
+  const [expandedPhases, setExpandedPhases] = useState([]);
 
   useEffect(() => {
     fetchRoadmap();
@@ -18,14 +21,17 @@ const RoadmapDetail = () => {
   const fetchRoadmap = async () => {
     setLoading(true);
     setError('');
+    setPhaseDetails({});
+    setExpandedPhases([]);
     
     try {
-      const response = await roadmapAPI.getSavedRoadmaps();
-      const foundRoadmap = response.data.find(r => r.id === parseInt(id));
-      if (foundRoadmap) {
-        setRoadmap(foundRoadmap);
-      } else {
-        setError('Roadmap not found');
+      const response = await roadmapAPI.getRoadmap(id);
+      setRoadmap(response.data);
+      // Open the first phase straight away
+      const phases = response.data.summary?.phases || [];
+      if (phases.length > 0) {
+        setExpandedPhases([phases[0].index]);
+        fetchPhase(phases[0].index);
       }
     } catch (error) {
       setError(getErrorFromResponse(error, 'Failed to fetch roadmap'));
@@ -34,6 +40,28 @@ const RoadmapDetail = () => {
     }
   };
 
+  const fetchPhase = async (phaseIndex) => {
+    setPhaseDetails(prev => ({ ...prev, [phaseIndex]: { loading: true } }));
+    try {
+      const response = await roadmapAPI.getRoadmapPhase(id, phaseIndex);
+      setPhaseDetails(prev => ({ ...prev, [phaseIndex]: { data: response.data.phase } }));
+    } catch (error) {
+      setPhaseDetails(prev => ({ ...prev, [phaseIndex]: { error: getErrorFromResponse(error, 'Failed to load phase') } }));
+    }
+  };
+
+  const togglePhase = (phaseIndex) => {
+    if (expandedPhases.includes(phaseIndex)) {
+      setExpandedPhases(prev => prev.filter(i => i !== phaseIndex));
+      return;
+    }
+    setExpandedPhases(prev => [...prev, phaseIndex]);
+    const details = phaseDetails[phaseIndex];
+    if (!details || details.error) {
+      fetchPhase(phaseIndex);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gradient-to-br from-slate-50 via-blue-50 to-indigo-100 flex items-center justify-center">
@@ -61,7 +89,9 @@ const RoadmapDetail = () => {
     );
   }
 
-  const roadmapData = roadmap.roadmap_data;
+  // role_summary and gap_analysis come with the roadmap; phases only as an outline
+  const roadmapData = roadmap;
+  const phaseOutline = roadmap.summary?.phases || [];
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-slate-50 via-blue-50 to-indigo-100">
@@ -172,16 +202,20 @@ const RoadmapDetail = () => {
         )}
 
         {/* Roadmap Phases */}
-        {roadmapData?.roadmap && roadmapData.roadmap.phases && roadmapData.roadmap.phases.length > 0 && (
+        {phaseOutline.length > 0 && (
           <div>
             <h3 className="text-2xl font-bold text-gray-900 mb-6">Learning Phases</h3>
             <div className="space-y-6">
-              {roadmapData.roadmap.phases.map((phase, phaseIdx) => (
-                <div key={phase.phase_id || phaseIdx} className="p-6 bg-gradient-to-br from-gray-50 to-blue-50 rounded-xl border border-gray-200">
+              {phaseOutline.map((phase) => {
+                const expanded = expandedPhases.includes(phase.index);
+                const details = phaseDetails[phase.index] || {};
+                const tasks = details.data?.tasks || [];
+                return (
+                <div key={phase.index} className="p-6 bg-gradient-to-br from-gray-50 to-blue-50 rounded-xl border border-gray-200">
                   <div className="flex items-start justify-between mb-4">
                     <div>
                       <h4 className="text-xl font-bold text-gray-900 mb-2">
-                        Phase {phase.phase_id || phaseIdx + 1}: {phase.phase_name}
+                        Phase {phase.phase_id || phase.index + 1}: {phase.phase_name}
                       </h4>
                       {phase.goal && (
                         <p className="text-gray-700 mb-2">{phase.goal}</p>
@@ -192,11 +226,25 @@ const RoadmapDetail = () => {
                         </span>
                       )}
                     </div>
+                    {phase.task_count > 0 && (
+                      <button
+                        onClick={() => togglePhase(phase.index)}
+                        className="ml-4 px-3 py-1 text-sm text-blue-700 bg-white rounded-lg border border-blue-200 hover:bg-blue-50 transition-colors"
+                      >
+                        {expanded ? 'Hide tasks' : `Show ${phase.task_count} tasks`}
+                      </button>
+                    )}
                   </div>
 
-                  {phase.tasks && phase.tasks.length > 0 && (
+                  {expanded && details.loading && (
+                    <p className="text-sm text-gray-500 mt-4">Loading tasks...</p>
+                  )}
+                  {expanded && details.error && (
+                    <p className="text-sm text-red-600 mt-4">{details.error}</p>
+                  )}
+                  {expanded && tasks.length > 0 && (
                     <div className="space-y-4 mt-4">
-                      {phase.tasks.map((task, taskIdx) => (
+                      {tasks.map((task, taskIdx) => (
                         <div key={task.task_id || taskIdx} className="p-4 bg-white rounded-lg border border-gray-200">
                           <h5 className="text-lg font-semibold text-gray-900 mb-2">{task.title}</h5>
                           {task.description && (
@@ -236,7 +284,8 @@ const RoadmapDetail = () => {
                     </div>
                   )}
                 </div>
-              ))}
+                );
+              })}
             </div>
           </div>
         )}
@@ -135,21 +135,22 @@ const Roadmaps = () => {
                 </div>
 
                 {/* Roadmap Preview */}
-                {roadmap.roadmap_data && (
+                {roadmap.summary && (
                   <div className="mb-4 p-3 bg-gradient-to-br from-blue-50 to-purple-50 rounded-lg border border-blue-200">
-                    {roadmap.roadmap_data.role_summary && (
+                    {roadmap.summary.role_title && (
                       <div className="mb-2">
                         <p className="text-xs font-medium text-gray-700 mb-1">Role:</p>
                         <p className="text-sm text-gray-900 font-semibold">
-                          {roadmap.roadmap_data.role_summary.title || 'N/A'}
+                          {roadmap.summary.role_title}
                         </p>
                       </div>
                     )}
-                    {roadmap.roadmap_data.roadmap && roadmap.roadmap_data.roadmap.phases && (
+                    {roadmap.summary.phase_count > 0 && (
                       <div>
                         <p className="text-xs font-medium text-gray-700 mb-1">Phases:</p>
                         <p className="text-sm text-gray-900">
-                          {roadmap.roadmap_data.roadmap.phases.length} learning phases
+                          {roadmap.summary.phase_count} learning phases
+                          {roadmap.summary.total_weeks ? ` · ${roadmap.summary.total_weeks} weeks` : ''}
                         </p>
                       </div>
                     )}
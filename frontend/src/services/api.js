@@ -31,6 +31,42 @@ api.interceptors.response.use(
   }
 );
 
+// POST to an endpoint that responds with newline-delimited JSON and call
+// onEvent for every line as soon as it arrives.
+const streamNdjson = async (path, onEvent) => {
+  const token = localStorage.getItem('token');
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  });
+
+  if (!response.ok) {
+    let detail = `Request failed with status ${response.status}`;
+    try {
+      detail = (await response.json()).detail || detail;
+    } catch {
+      // Non-JSON error body
+    }
+    throw new Error(detail);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.filter((line) => line.trim()).forEach((line) => onEvent(JSON.parse(line)));
+  }
+  if (buffer.trim()) {
+    onEvent(JSON.parse(buffer));
+  }
+};
+
 export const authAPI = {
   registerUser: (userData) => api.post('/api/auth/register-user', userData),
   registerRecruiter: (recruiterData) => api.post('/api/auth/register-recruiter', recruiterData),
@@ -57,6 +93,12 @@ export const jobAPI = {
   getAllJobs: (skip = 0, limit = 50) => api.get(`/api/jobs?skip=${skip}&limit=${limit}`),
   createJob: (jobData) => api.post('/api/recruiter/jobs', jobData),
   createJobEnhanced: (jobData) => api.post('/api/jobs/create', jobData), // New enhanced endpoint
+  importJobs: (file) => {
+    // CSV or JSON Lines; returns { imported, failed, errors: [{ row, errors }], job_ids }
+    const formData = new FormData();
+    formData.append('file', file);
+    return api.post('/api/jobs/import', formData);
+  },
   searchJobs: (filters) => {
     const params = new URLSearchParams();
     Object.keys(filters).forEach(key => {
@@ -66,9 +108,20 @@ export const jobAPI = {
     });
     return api.get(`/api/jobs/search?${params.toString()}`);
   },
+  getJobFacets: (filters) => {
+    const params = new URLSearchParams();
+    Object.keys(filters).forEach(key => {
+      if (filters[key] !== null && filters[key] !== undefined && filters[key] !== '') {
+        params.append(key, filters[key]);
+      }
+    });
+    return api.get(`/api/jobs/facets?${params.toString()}`);
+  },
+  autocompleteLocations: (query, limit = 8) => api.get(`/api/jobs/locations/autocomplete?q=${encodeURIComponent(query)}&limit=${limit}`),
   getJobById: (jobId) => api.get(`/api/jobs/${jobId}`),
   generateJobRoadmap: (jobId) => api.post(`/api/jobs/${jobId}/generate-roadmap`), // For recruiters
   generateJobRoadmapForUser: (jobId) => api.post(`/api/jobs/${jobId}/generate-roadmap-for-user`), // For users
+  streamJobRoadmapForUser: (jobId, onEvent) => streamNdjson(`/api/jobs/${jobId}/generate-roadmap-for-user/stream`, onEvent),
   getRecruiterJobs: () => api.get('/api/recruiter/jobs'),
   updateJob: (jobId, jobData) => api.put(`/api/recruiter/jobs/${jobId}`, jobData),
   deleteJob: (jobId) => api.delete(`/api/recruiter/jobs/${jobId}`),
@@ -84,7 +137,9 @@ export const aiAPI = {
 
 export const roadmapAPI = {
   saveRoadmap: (roadmapData) => api.post('/api/roadmaps/save', roadmapData),
-  getSavedRoadmaps: () => api.get('/api/roadmaps'),
+  getSavedRoadmaps: () => api.get('/api/roadmaps'), // Summaries only
+  getRoadmap: (roadmapId) => api.get(`/api/roadmaps/${roadmapId}`), // Without the phases' tasks
+  getRoadmapPhase: (roadmapId, phaseIndex) => api.get(`/api/roadmaps/${roadmapId}/phases/${phaseIndex}`),
   deleteRoadmap: (roadmapId) => api.delete(`/api/roadmaps/${roadmapId}`),
 };
 
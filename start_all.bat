@@ -5,7 +5,7 @@ echo ========================================
 echo.
 
 echo Starting Backend Server...
-start "PathFinder Backend" cmd /k "cd /d %~dp0backend && python -m uvicorn app.main:app --host 127.0.0.1 --port 8001 --reload"
+start "PathFinder Backend" cmd /k "cd /d %~dp0backend && python migrate.py && python -m uvicorn app.main:app --host 127.0.0.1 --port 8001 --reload"
 
 timeout /t 3 /nobreak >nul
 
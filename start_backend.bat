@@ -42,6 +42,15 @@ echo.
 echo Installing/updating dependencies...
 pip install -r requirements.txt --quiet
 
+echo.
+echo Applying database migrations...
+python migrate.py
+if errorlevel 1 (
+    echo ERROR: Database migration failed
+    pause
+    exit /b 1
+)
+
 echo.
 echo Starting FastAPI server on http://localhost:8001
 echo Press Ctrl+C to stop the server
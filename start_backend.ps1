@@ -48,6 +48,15 @@ Write-Host ""
 Write-Host "Installing/updating dependencies..." -ForegroundColor Yellow
 pip install -r requirements.txt --quiet
 
+Write-Host ""
+Write-Host "Applying database migrations..." -ForegroundColor Yellow
+python migrate.py
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "ERROR: Database migration failed" -ForegroundColor Red
+    pause
+    exit 1
+}
+
 Write-Host ""
 Write-Host "Starting FastAPI server on http://localhost:8001" -ForegroundColor Green
 Write-Host "Press Ctrl+C to stop the server" -ForegroundColor Yellow